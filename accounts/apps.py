@@ -4,5 +4,6 @@ class AccountsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'accounts'
     verbose_name = 'User Accounts'
-    
-    
\ No newline at end of file
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,28 @@
+from datetime import datetime
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from booking.stats import rebuild_stats
+
+
+class Command(BaseCommand):
+    help = 'Build the daily booking statistics rollup from the bookings table'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--from', dest='date_from', help='First booking date to rebuild (YYYY-MM-DD)')
+        parser.add_argument('--to', dest='date_to', help='Last booking date to rebuild (YYYY-MM-DD)')
+
+    def handle(self, *args, **options):
+        try:
+            date_from = datetime.strptime(options['date_from'], '%Y-%m-%d').date() if options['date_from'] else None
+            date_to = datetime.strptime(options['date_to'], '%Y-%m-%d').date() if options['date_to'] else None
+        except ValueError:
+            raise CommandError('Dates must be in YYYY-MM-DD format')
+        if date_from and date_to and date_to < date_from:
+            raise CommandError('--to must not be before --from')
+
+        started = time.perf_counter()
+        count = rebuild_stats(date_from, date_to)
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(f'Built {count} daily statistics rows in {elapsed:.2f}s'))
@@ -0,0 +1,16 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from accounts.models import User
+from accounts.search import index_users
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the user search tokens from the users table'
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        count = index_users(User.objects.all())
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(f'Wrote {count} search tokens in {elapsed:.2f}s'))
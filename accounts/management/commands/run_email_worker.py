@@ -0,0 +1,27 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from booking.outbox import run_worker
+
+
+class Command(BaseCommand):
+    help = 'Deliver queued emails from the email outbox'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=50, help='Emails claimed per batch')
+        parser.add_argument('--sleep', type=float, default=5, help='Seconds to wait when the outbox is empty')
+        parser.add_argument('--once', action='store_true', help='Exit once the outbox is empty')
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be at least 1')
+
+        started = time.perf_counter()
+        sent, failed = run_worker(
+            batch_size=options['batch_size'],
+            poll_seconds=options['sleep'],
+            once=options['once'],
+        )
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(f'Sent {sent} emails ({failed} given up) in {elapsed:.2f}s'))
@@ -0,0 +1,104 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+import threading
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.utils import timezone
+
+from accounts.models import User
+from booking.models import Room, Booking
+from booking.services import place_booking, BookingConflictError
+
+
+class Command(BaseCommand):
+    help = 'Fire parallel booking attempts at the same slot and check that exactly one wins per room'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=50, help='Parallel booking attempts per room')
+        parser.add_argument('--rooms', type=int, default=1, help='Number of rooms to race on at once')
+        parser.add_argument('--workers', type=int, default=16, help='Thread pool size')
+        parser.add_argument('--keep', action='store_true', help='Keep the temporary rooms, user and bookings')
+
+    def handle(self, *args, **options):
+        n_requests = options['requests']
+        n_rooms = options['rooms']
+        if n_requests < 1 or n_rooms < 1:
+            raise CommandError('--requests and --rooms must be at least 1')
+
+        tag = timezone.now().strftime('%Y%m%d%H%M%S')
+        user = User.objects.create_user(
+            email=f'stress-{tag}@example.invalid',
+            student_id=f'STRESS{tag}'[:20],
+            phone_number='000-000-0000',
+            password=None,
+            first_name='Stress',
+            last_name='Test',
+        )
+        rooms = [
+            Room.objects.create(
+                name=f'Stress Room {i + 1}',
+                room_number=f'STRESS-{tag}-{i + 1}',
+                capacity=10,
+            )
+            for i in range(n_rooms)
+        ]
+        start_time = (timezone.now() + timedelta(days=1)).replace(minute=0, second=0, microsecond=0)
+        end_time = start_time + timedelta(hours=1)
+
+        results = {'created': 0, 'conflict': 0, 'error': 0}
+        results_lock = threading.Lock()
+        go = threading.Event()
+
+        def attempt(room):
+            try:
+                go.wait()
+                place_booking(Booking(
+                    user=user,
+                    room=room,
+                    start_time=start_time,
+                    end_time=end_time,
+                    purpose='Stress test',
+                ))
+                outcome = 'created'
+            except BookingConflictError:
+                outcome = 'conflict'
+            except Exception as e:
+                self.stderr.write(f'{type(e).__name__}: {e}')
+                outcome = 'error'
+            finally:
+                connections.close_all()
+            with results_lock:
+                results[outcome] += 1
+
+        jobs = [room for room in rooms for _ in range(n_requests)]
+        with ThreadPoolExecutor(max_workers=options['workers']) as pool:
+            futures = [pool.submit(attempt, room) for room in jobs]
+            started = time.perf_counter()
+            go.set()
+            for future in futures:
+                future.result()
+        elapsed = time.perf_counter() - started
+
+        winners = Booking.objects.filter(
+            room__in=rooms,
+            status__in=['pending', 'confirmed'],
+        ).values_list('room_id', flat=True)
+        per_room = {room.id: 0 for room in rooms}
+        for room_id in winners:
+            per_room[room_id] += 1
+
+        self.stdout.write(f'Backend: {connection.vendor}')
+        self.stdout.write(f'Attempts: {len(jobs)} across {n_rooms} room(s) in {elapsed:.3f}s '
+                          f'({len(jobs) / elapsed:.1f} attempts/s)')
+        self.stdout.write(f"Created: {results['created']}  Conflicts: {results['conflict']}  Errors: {results['error']}")
+
+        if not options['keep']:
+            Booking.objects.filter(room__in=rooms).delete()
+            Room.objects.filter(id__in=[room.id for room in rooms]).delete()
+            user.delete()
+
+        if any(count != 1 for count in per_room.values()):
+            raise CommandError(f'Expected exactly one booking per room, got {sorted(per_room.values())}')
+        self.stdout.write(self.style.SUCCESS('Exactly one booking succeeded per room'))
@@ -0,0 +1,79 @@
+# Generated by Django 4.2.7 on 2026-10-17 18:41
+
+import re
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+# Frozen copy of accounts.search.tokens_for as of this migration, so later
+# changes to the tokenizer do not change what this migration writes
+_WORD_RE = re.compile(r'[^\W_]+(?:[.\-@+][^\W_]+)*')
+
+
+def _normalize(value):
+    return ' '.join((value or '').lower().split())
+
+
+def tokens_for(user):
+    tokens = set()
+    for field in ('first_name', 'last_name', 'student_id'):
+        tokens.update(_WORD_RE.findall(_normalize(getattr(user, field))))
+    email = _normalize(user.email)
+    if email:
+        tokens.add(email)
+        tokens.add(email.split('@', 1)[0])
+        tokens.update(_WORD_RE.findall(email.split('@', 1)[0].replace('.', ' ')))
+    return {token[:100] for token in tokens if token}
+
+
+def index_existing_users(apps, schema_editor):
+    User = apps.get_model('accounts', 'User')
+    UserSearchToken = apps.get_model('accounts', 'UserSearchToken')
+    batch = []
+    for user in User.objects.only('id', 'first_name', 'last_name', 'email', 'student_id').iterator(chunk_size=2000):
+        batch.extend(UserSearchToken(user_id=user.pk, token=token) for token in tokens_for(user))
+        if len(batch) >= 5000:
+            UserSearchToken.objects.bulk_create(batch, ignore_conflicts=True)
+            batch = []
+    UserSearchToken.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0003_alter_user_department_alter_user_faculty_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserSearchToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('token', models.CharField(max_length=100)),
+            ],
+            options={
+                'verbose_name': 'User Search Token',
+                'verbose_name_plural': 'User Search Tokens',
+                'db_table': 'accounts_user_search_token',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['first_name', 'id'], name='accounts_user_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['date_joined', 'id'], name='accounts_user_joined_idx'),
+        ),
+        migrations.AddField(
+            model_name='usersearchtoken',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_tokens', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterUniqueTogether(
+            name='usersearchtoken',
+            unique_together={('token', 'user')},
+        ),
+        migrations.RunPython(index_existing_users, migrations.RunPython.noop),
+    ]
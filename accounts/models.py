@@ -109,6 +109,11 @@ class User(AbstractUser):
         ordering = ['-created_at']
         verbose_name = 'User'
         verbose_name_plural = 'Users'
+        indexes = [
+            # Keyset pagination of the user management pages
+            models.Index(fields=['first_name', 'id'], name='accounts_user_name_idx'),
+            models.Index(fields=['date_joined', 'id'], name='accounts_user_joined_idx'),
+        ]
 
     def __str__(self):
         return f"{self.email} ({self.get_full_name()})"
@@ -135,4 +140,21 @@ class User(AbstractUser):
     
     def is_admin_user(self):
         """Check if user is admin"""
-        return self.is_admin or self.is_staff or self.is_superuser
\ No newline at end of file
+        return self.is_admin or self.is_staff or self.is_superuser
+
+
+class UserSearchToken(models.Model):
+    """One lower-cased word a user can be found by, see accounts.search"""
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='search_tokens')
+    token = models.CharField(max_length=100)
+
+    class Meta:
+        db_table = 'accounts_user_search_token'
+        verbose_name = 'User Search Token'
+        verbose_name_plural = 'User Search Tokens'
+        # Leading token column serves prefix range scans
+        unique_together = ['token', 'user']
+
+    def __str__(self):
+        return self.token
@@ -0,0 +1,137 @@
+# accounts/search.py
+"""
+Indexed user search.
+
+Every user has one UserSearchToken row per lower-cased word of their name,
+their email address (whole and local part) and their student ID. A search
+term is split into words and each word must be a prefix of one of the
+user's tokens. Prefixes are matched with `token LIKE 'jo%'` on the indexed
+token column, so a lookup is an index range scan instead of a full scan of
+accounts_user with LIKE '%...%' on four columns. The database works out the
+range itself: a hand-built upper bound like 'jp' breaks under collations
+that do not sort by code point, such as MySQL's utf8mb4_0900_ai_ci, where
+the bound for 'perez' ('pere{') sorts before 'perez'.
+
+Tokens are rewritten by a post_save signal when one of SEARCH_FIELDS
+changes. Writes that bypass signals (`.update()`, bulk_create) should call
+index_users() afterwards, or the rebuild_user_search command can be run.
+"""
+import re
+
+from django.db import transaction
+from django.db.models import Count, Q
+
+SEARCH_FIELDS = ('first_name', 'last_name', 'email', 'student_id')
+
+TOKEN_MAX_LENGTH = 100
+
+# Words of a search term; at most this many are matched
+MAX_SEARCH_WORDS = 4
+
+_WORD_RE = re.compile(r'[^\W_]+(?:[.\-@+][^\W_]+)*')
+
+
+def normalize(value):
+    """Lower-cased, whitespace-collapsed form of `value`"""
+    return ' '.join((value or '').lower().split())
+
+
+def tokens_for(user):
+    """Set of search tokens for `user`"""
+    tokens = set()
+    for field in ('first_name', 'last_name', 'student_id'):
+        tokens.update(_WORD_RE.findall(normalize(getattr(user, field))))
+    email = normalize(user.email)
+    if email:
+        tokens.add(email)
+        tokens.add(email.split('@', 1)[0])
+        tokens.update(_WORD_RE.findall(email.split('@', 1)[0].replace('.', ' ')))
+    return {token[:TOKEN_MAX_LENGTH] for token in tokens if token}
+
+
+def index_user(user):
+    """Rewrite the search tokens of one user"""
+    from .models import UserSearchToken
+
+    wanted = tokens_for(user)
+    with transaction.atomic():
+        existing = set(UserSearchToken.objects.filter(user_id=user.pk).values_list('token', flat=True))
+        stale = existing - wanted
+        if stale:
+            UserSearchToken.objects.filter(user_id=user.pk, token__in=stale).delete()
+        UserSearchToken.objects.bulk_create(
+            [UserSearchToken(user_id=user.pk, token=token) for token in wanted - existing],
+            ignore_conflicts=True,
+        )
+
+
+def index_users(users, batch_size=2000):
+    """Rebuild the search tokens of `users` (a queryset); returns the number of tokens written"""
+    from .models import UserSearchToken
+
+    written = 0
+    batch_ids, batch_tokens = [], []
+
+    def flush():
+        nonlocal written
+        with transaction.atomic():
+            UserSearchToken.objects.filter(user_id__in=batch_ids).delete()
+            UserSearchToken.objects.bulk_create(batch_tokens, batch_size=batch_size, ignore_conflicts=True)
+        written += len(batch_tokens)
+        batch_ids.clear()
+        batch_tokens.clear()
+
+    for user in users.only('pk', *SEARCH_FIELDS).order_by('pk').iterator(chunk_size=batch_size):
+        batch_ids.append(user.pk)
+        batch_tokens.extend(UserSearchToken(user_id=user.pk, token=token) for token in tokens_for(user))
+        if len(batch_ids) >= batch_size:
+            flush()
+    if batch_ids:
+        flush()
+    return written
+
+
+def search_users(users, query):
+    """`users` narrowed to those matching every word of `query` as a prefix"""
+    from .models import UserSearchToken
+
+    words = _WORD_RE.findall(normalize(query))[:MAX_SEARCH_WORDS]
+    for word in words:
+        users = users.filter(pk__in=UserSearchToken.objects.filter(
+            token__startswith=word[:TOKEN_MAX_LENGTH],
+        ).values('user_id'))
+    return users
+
+
+def user_counts(users):
+    """Role and status counts of `users` in one aggregate query"""
+    counts = users.order_by().aggregate(
+        total=Count('pk'),
+        active=Count('pk', filter=Q(is_active=True)),
+        admins=Count('pk', filter=Q(is_admin=True)),
+        regular=Count('pk', filter=Q(is_admin=False)),
+    )
+    counts['inactive'] = counts['total'] - counts['active']
+    return counts
+
+
+def filter_users(users, params):
+    """`users` narrowed by the `search`, `role` and `active` query parameters"""
+    search = params.get('search', '').strip()
+    if search:
+        users = search_users(users, search)
+
+    role = params.get('role', '')
+    if role == 'admin':
+        users = users.filter(is_admin=True)
+    elif role == 'staff':
+        users = users.filter(is_staff=True, is_admin=False)
+    elif role == 'user':
+        users = users.filter(is_admin=False, is_staff=False)
+
+    active = params.get('active', '')
+    if active == 'true':
+        users = users.filter(is_active=True)
+    elif active == 'false':
+        users = users.filter(is_active=False)
+    return users
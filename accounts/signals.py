@@ -0,0 +1,14 @@
+# accounts/signals.py
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from .models import User
+from .search import SEARCH_FIELDS, index_user
+
+
+@receiver(post_save, sender=User)
+def update_search_tokens(sender, instance, update_fields=None, **kwargs):
+    """Rewrite the user's search tokens when their name, email or student ID may have changed"""
+    if update_fields is not None and not set(update_fields) & set(SEARCH_FIELDS):
+        return
+    index_user(instance)
@@ -0,0 +1,49 @@
+from datetime import timedelta
+
+from django.test import TestCase
+from django.utils import timezone
+
+from booking.models import Booking, Room
+from .models import User
+from .search import search_users
+
+
+class SearchUsersTests(TestCase):
+    """Prefix search over the user search tokens"""
+
+    def setUp(self):
+        self.perez = User.objects.create_user(
+            email='maria.perez@example.com', student_id='2019', phone_number='012345678',
+            first_name='Maria', last_name='Perez',
+        )
+        self.other = User.objects.create_user(
+            email='john.smith@example.com', student_id='e20200042', phone_number='098765432',
+            first_name='John', last_name='Smith',
+        )
+
+    def assertFinds(self, query, *users):
+        self.assertQuerySetEqual(search_users(User.objects.all(), query), users, ordered=False)
+
+    def test_prefix_ending_in_z(self):
+        self.assertFinds('Perez', self.perez)
+        self.assertFinds('Maria Perez', self.perez)
+
+    def test_prefix_ending_in_9(self):
+        self.assertFinds('2019', self.perez)
+        self.assertFinds('201', self.perez)
+
+    def test_all_bookings_search(self):
+        room = Room.objects.create(name='Lab 1', room_number='L-101', capacity=30)
+        start = timezone.now() + timedelta(days=2)
+        booking = Booking.objects.create(
+            user=self.perez, room=room, purpose='Thesis defense', status='confirmed',
+            start_time=start, end_time=start + timedelta(hours=1),
+        )
+        Booking.objects.create(
+            user=self.other, room=room, purpose='Study group', status='confirmed',
+            start_time=start + timedelta(hours=2), end_time=start + timedelta(hours=3),
+        )
+
+        # Same filter as accounts.views.all_bookings_view
+        bookings = Booking.objects.filter(user_id__in=search_users(User.objects.all(), 'perez 2019').values('pk'))
+        self.assertQuerySetEqual(bookings, [booking])
@@ -56,6 +56,7 @@ urlpatterns = [
     
     # AJAX endpoints for frontend integration
     path('ajax/check-availability/', views.check_availability_ajax, name='check_availability_ajax'),
+    path('ajax/release-hold/', views.release_hold_ajax, name='release_hold_ajax'),
     path('ajax/get-rooms/', views.get_rooms_ajax, name='get_rooms_ajax'),
     path('ajax/get-buildings/', views.get_buildings_ajax, name='get_buildings_ajax'),
     path('ajax/get-room-details/', views.get_room_details_ajax, name='get_room_details_ajax'),
@@ -8,6 +8,9 @@ from django.contrib.auth.models import Group
 from django.contrib.auth.hashers import check_password
 from django.http import JsonResponse
 from django.utils import timezone
+from django.utils.http import urlencode
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition
 from django.db.models import Q
 from functools import wraps
 
@@ -281,13 +284,13 @@ def booking_view(request):
         # Get room types for filtering
         room_types = Room.ROOM_TYPES
         
-        # Check if user has reached daily booking limit
-        daily_bookings = user_bookings.filter(
-            start_time__date=today,
-            status__in=['confirmed', 'pending']
-        ).count()
+        # Check if user has reached daily booking limit (rule for the user's faculty)
+        from booking.quotas import get_usage
+        from booking.rules import DEFAULT_RULE, resolve_rule
+        daily_bookings, _ = get_usage(request.user.id, today)
+        max_daily_bookings = resolve_rule(user=request.user, default=DEFAULT_RULE).daily_booking_limit
         
-        can_book_today = daily_bookings < 3  # Maximum 3 bookings per day
+        can_book_today = daily_bookings < max_daily_bookings
         
         context = {
             'user': request.user,
@@ -302,7 +305,7 @@ def booking_view(request):
             'recent_bookings': recent_bookings,
             'can_book_today': can_book_today,
             'daily_bookings': daily_bookings,
-            'max_daily_bookings': 3,
+            'max_daily_bookings': max_daily_bookings,
             # Autofill parameters
             'selected_room': selected_room,
             'autofill_room_id': room_id,
@@ -361,58 +364,74 @@ def booked_view(request):
     # Get user's bookings
     try:
         from booking.models import Booking
+        from booking.occupancy import day_bounds
+        from django.core.paginator import Paginator
+        from django.db.models import Count
         
-        # Get all bookings for the user
-        bookings = Booking.objects.filter(user=request.user).order_by('-start_time')
+        # Get all bookings for the user, with cancel/modify eligibility worked out in SQL
+        bookings = Booking.objects.filter(user=request.user).with_eligibility(request.user).select_related('room')
+        now = timezone.now()
         
         # Separate bookings by status
         pending_bookings = bookings.filter(status='pending')
         confirmed_bookings = bookings.filter(status='confirmed')
-        cancelled_bookings = bookings.filter(status='cancelled')
+        cancelled_bookings = bookings.filter(status='cancelled').order_by('-start_time')
         completed_bookings = bookings.filter(status='completed')
         
-        # Get upcoming bookings (confirmed and pending)
+        # Get upcoming and ongoing bookings (confirmed and pending)
         upcoming_bookings = bookings.filter(
-            start_time__gt=timezone.now(),
+            end_time__gt=now,
             status__in=['confirmed', 'pending']
         ).order_by('start_time')
         
         # Get past bookings
         past_bookings = bookings.filter(
-            end_time__lt=timezone.now()
-        ).order_by('-start_time')
+            end_time__lte=now
+        ).exclude(status='cancelled').order_by('-start_time')
         
         # Get today's bookings
-        today = timezone.now().date()
+        today_start, today_end = day_bounds(timezone.localdate())
         today_bookings = bookings.filter(
-            start_time__date=today,
+            start_time__gte=today_start,
+            start_time__lt=today_end,
             status__in=['confirmed', 'pending']
         ).order_by('start_time')
         
-        # Calculate statistics
-        total_bookings = bookings.count()
-        pending_count = pending_bookings.count()
-        confirmed_count = confirmed_bookings.count()
-        cancelled_count = cancelled_bookings.count()
-        completed_count = completed_bookings.count()
+        # Calculate statistics with one grouped query
+        status_counts = dict(
+            Booking.objects.filter(user=request.user).order_by()
+            .values_list('status').annotate(count=Count('id'))
+        )
+        total_bookings = sum(status_counts.values())
+        pending_count = status_counts.get('pending', 0)
+        confirmed_count = status_counts.get('confirmed', 0)
+        cancelled_count = status_counts.get('cancelled', 0)
+        completed_count = status_counts.get('completed', 0)
         
         # Get booking history for the last 30 days
         from datetime import timedelta
-        thirty_days_ago = timezone.now() - timedelta(days=30)
+        thirty_days_ago = now - timedelta(days=30)
         recent_bookings = bookings.filter(
             created_at__gte=thirty_days_ago
         ).order_by('-created_at')
         
-        # Add cancellation information
-        for booking in bookings:
-            booking.can_cancel = booking.can_cancel() if hasattr(booking, 'can_cancel') else (
-                booking.status in ['pending', 'confirmed'] and 
-                booking.start_time > timezone.now()
-            )
-            booking.can_modify = booking.can_be_modified() if hasattr(booking, 'can_be_modified') else (
-                booking.status == 'pending' and 
-                booking.start_time > timezone.now()
-            )
+        # Each section pages on its own so heavy users only load one page of each
+        sections = []
+        for key, title, queryset in [
+            ('upcoming', 'Upcoming', upcoming_bookings),
+            ('past', 'Past', past_bookings),
+            ('cancelled', 'Cancelled', cancelled_bookings),
+        ]:
+            param = f'{key}_page'
+            other_params = request.GET.copy()
+            other_params.pop(param, None)
+            sections.append({
+                'key': key,
+                'title': title,
+                'param': param,
+                'query': other_params.urlencode(),
+                'page': Paginator(queryset, 10).get_page(request.GET.get(param)),
+            })
         
         # Handle booking actions
         if request.method == 'POST':
@@ -421,12 +440,19 @@ def booked_view(request):
             
             if action and booking_id:
                 try:
-                    booking = Booking.objects.get(id=booking_id, user=request.user)
+                    booking = bookings.get(id=booking_id)
                     
                     if action == 'cancel':
-                        if booking.can_cancel:
-                            booking.status = 'cancelled'
-                            booking.save()
+                        if booking.is_cancellable:
+                            from booking.email_utils import send_admin_notification_email, send_booking_cancellation_email
+                            from django.db import transaction
+                            
+                            # The emails are queued in the same transaction as the status change
+                            with transaction.atomic():
+                                booking.status = 'cancelled'
+                                booking.save()
+                                send_booking_cancellation_email(booking)
+                                send_admin_notification_email(booking, 'cancelled')
                             room = booking.room
                             # If no other confirmed bookings for this room, mark as available
                             if not room.bookings.filter(status='confirmed').exclude(id=booking.id).exists():
@@ -438,7 +464,7 @@ def booked_view(request):
                             messages.error(request, 'This booking cannot be cancelled.')
                     
                     elif action == 'request_modification':
-                        if booking.can_modify:
+                        if booking.is_modifiable:
                             messages.info(request, 'Modification request submitted. Please contact admin for changes.')
                         else:
                             messages.error(request, 'This booking cannot be modified.')
@@ -460,6 +486,7 @@ def booked_view(request):
             'past_bookings': past_bookings,
             'today_bookings': today_bookings,
             'recent_bookings': recent_bookings,
+            'sections': sections,
             'total_bookings': total_bookings,
             'pending_count': pending_count,
             'confirmed_count': confirmed_count,
@@ -481,6 +508,7 @@ def booked_view(request):
             'past_bookings': [],
             'today_bookings': [],
             'recent_bookings': [],
+            'sections': [],
             'total_bookings': 0,
             'pending_count': 0,
             'confirmed_count': 0,
@@ -686,23 +714,8 @@ def create_booking(request):
             start_datetime = timezone.make_aware(datetime.combine(booking_date, start_time))
             end_datetime = timezone.make_aware(datetime.combine(booking_date, end_time))
             
-            # Validate booking is in the future
-            if start_datetime <= timezone.now():
-                messages.error(request, 'Booking time must be in the future.')
-                return redirect('accounts:booking')
-            
-            # Validate end time is after start time
-            if start_datetime >= end_datetime:
-                messages.error(request, 'End time must be after start time.')
-                return redirect('accounts:booking')
-            
-            # Validate booking duration (max 8 hours)
-            duration = end_datetime - start_datetime
-            if duration.total_seconds() > 8 * 3600:
-                messages.error(request, 'Maximum booking duration is 8 hours.')
-                return redirect('accounts:booking')
-            
             # Validate minimum booking duration (30 minutes)
+            duration = end_datetime - start_datetime
             if duration.total_seconds() < 30 * 60:
                 messages.error(request, 'Minimum booking duration is 30 minutes.')
                 return redirect('accounts:booking')
@@ -718,6 +731,18 @@ def create_booking(request):
                 messages.error(request, 'This room is not available for booking.')
                 return redirect('accounts:booking')
             
+            # Future start, duration rule and conflicts, checked once by the
+            # shared pipeline; the stamp lets Booking.save() skip repeating them
+            from booking.validation import BookingValidation
+            from django.core.exceptions import ValidationError
+            validation = BookingValidation(room.pk, start_datetime, end_datetime, user_id=request.user.id,
+                                           room_type=room.room_type, faculty=request.user.faculty)
+            try:
+                validation.run()
+            except ValidationError as e:
+                messages.error(request, e.messages[0])
+                return redirect('accounts:booking')
+            
             # Validate attendees count
             try:
                 attendees_count = int(attendees)
@@ -731,43 +756,34 @@ def create_booking(request):
                 messages.error(request, 'Invalid number of attendees.')
                 return redirect('accounts:booking')
             
-            # Check for conflicts
-            conflicts = Booking.objects.filter(
-                room=room,
-                start_time__lt=end_datetime,
-                end_time__gt=start_datetime,
-                status__in=['confirmed', 'pending']
-            )
-            
-            if conflicts.exists():
-                conflict_booking = conflicts.first()
-                conflict_time = conflict_booking.start_time.strftime('%Y-%m-%d %H:%M')
-                messages.error(request, f'This time slot conflicts with an existing booking at {conflict_time}.')
+            # Duration, daily/weekly limits, advance window and opening hours
+            # from the rule scoped to this room and the user's faculty
+            from booking.quotas import get_usage
+            from booking.rules import DEFAULT_RULE
+            daily_bookings, weekly_bookings = get_usage(request.user.id, booking_date)
+            rule = validation.get_rule() or DEFAULT_RULE
+            violation = rule.check_request(start_datetime, end_datetime, daily_bookings, weekly_bookings)
+            if violation:
+                messages.error(request, violation)
                 return redirect('accounts:booking')
             
-            # Check daily booking limit (optional)
-            daily_bookings = Booking.objects.filter(
-                user=request.user,
-                start_time__date=booking_date,
-                status__in=['confirmed', 'pending']
-            ).count()
-            
-            if daily_bookings >= 3:  # Maximum 3 bookings per day
-                messages.error(request, 'You have reached the maximum number of bookings per day (3).')
+            # Create booking; the conflict check runs under a room lock
+            from booking.services import place_booking, BookingConflictError, SlotHeldError
+            try:
+                booking = place_booking(validation.stamp(Booking(
+                    user=request.user,
+                    room=room,
+                    start_time=start_datetime,
+                    end_time=end_datetime,
+                    purpose=purpose,
+                    attendees=attendees_count,
+                    additional_notes=notes,
+                    status='pending'
+                )))
+            except (BookingConflictError, SlotHeldError) as e:
+                messages.error(request, e.message_dict['start_time'][0])
                 return redirect('accounts:booking')
             
-            # Create booking
-            booking = Booking.objects.create(
-                user=request.user,
-                room=room,
-                start_time=start_datetime,
-                end_time=end_datetime,
-                purpose=purpose,
-                attendees=attendees_count,
-                additional_notes=notes,
-                status='pending'
-            )
-            
             # Check if this is a redirect from user dashboard
             referrer = request.META.get('HTTP_REFERER', '')
             from_dashboard = ('user-dashboard' in referrer or 
@@ -945,6 +961,8 @@ def admin_dashboard_view(request):
         'pending_bookings': pending_bookings,
         'total_rooms': total_rooms,
     }
+    from booking.dashboard import live_update_context
+    context.update(live_update_context(request))
     
     return render(request, 'AdminPage/adminHomePage.html', context)
 
@@ -1128,29 +1146,61 @@ def manage_rooms_view(request):
 def all_bookings_view(request):
     """All bookings - AdminPage/allBookings.html"""
     user_role = get_user_role(request.user)
-    
+
     # Handle booking actions
     if request.method == 'POST':
         try:
             from booking.models import Booking
-            
+
             action = request.POST.get('action')
             booking_id = request.POST.get('booking_id')
-            
-            if action and booking_id:
-                booking = Booking.objects.get(id=booking_id)
+
+            if action in ('bulk_approve_preview', 'bulk_approve'):
+                from booking.approvals import apply_plan, plan_approvals
+                approve_ids = {int(pk) for pk in request.POST.getlist('approve_ids')}
+                reject_ids = {int(pk) for pk in request.POST.getlist('reject_ids')}
+                if action == 'bulk_approve' and (approve_ids or reject_ids):
+                    # Re-plan the previewed bookings and only apply the
+                    # decisions the admin saw; anything else is shown again
+                    plan = plan_approvals(approve_ids | reject_ids)
+                    if ({booking.pk for booking in plan.approved} == approve_ids
+                            and {rejection.booking.pk for rejection in plan.rejected} == reject_ids):
+                        approved, rejected = apply_plan(plan)
+                        messages.success(request, f'{approved} pending booking(s) approved, {rejected} rejected.')
+                        return redirect('accounts:all_bookings')
+                    messages.warning(request, 'Some of these bookings changed since the preview. '
+                                              'Please review the updated plan.')
+                else:
+                    plan = plan_approvals(request.POST.getlist('booking_ids') or None)
+                if plan.approved or plan.rejected:
+                    return render(request, 'AdminPage/bulkApprovalPreview.html', {
+                        'user': request.user,
+                        'user_role': user_role,
+                        'plan': plan,
+                    })
+                messages.info(request, 'There are no pending bookings to approve.')
+            elif action and booking_id:
+                from booking.email_utils import send_booking_cancellation_email, send_booking_confirmation_email
+                from django.db import transaction
+                
+                booking = Booking.objects.select_related('user', 'room').get(id=booking_id)
                 room = booking.room
                 if action == 'approve':
-                    booking.status = 'confirmed'
-                    booking.save()
+                    # The email is queued in the same transaction as the status change
+                    with transaction.atomic():
+                        booking.status = 'confirmed'
+                        booking.save()
+                        send_booking_confirmation_email(booking)
                     # Mark room as occupied
                     room.availability_status = 'occupied'
                     room.is_available = False
                     room.save()
                     messages.success(request, f'Booking for {booking.room.name} has been approved!')
                 elif action == 'reject' or action == 'deny':
-                    booking.status = 'cancelled'
-                    booking.save()
+                    with transaction.atomic():
+                        booking.status = 'cancelled'
+                        booking.save()
+                        send_booking_cancellation_email(booking)
                     # If no other confirmed bookings for this room, mark as available
                     if not room.bookings.filter(status='confirmed').exclude(id=booking.id).exists():
                         room.availability_status = 'available'
@@ -1158,8 +1208,10 @@ def all_bookings_view(request):
                         room.save()
                     messages.success(request, f'Booking for {booking.room.name} has been rejected!')
                 elif action == 'cancel':
-                    booking.status = 'cancelled'
-                    booking.save()
+                    with transaction.atomic():
+                        booking.status = 'cancelled'
+                        booking.save()
+                        send_booking_cancellation_email(booking)
                     # If no other confirmed bookings for this room, mark as available
                     if not room.bookings.filter(status='confirmed').exclude(id=booking.id).exists():
                         room.availability_status = 'available'
@@ -1172,37 +1224,80 @@ def all_bookings_view(request):
         except Exception as e:
             messages.error(request, f'Booking action failed: {str(e)}')
     
-    # Get all bookings
+    # Get bookings, filtered server-side and paged by (start_time, id)
+    filters = {
+        'status': request.GET.get('status', ''),
+        'room': request.GET.get('room', ''),
+        'date_from': request.GET.get('date_from', ''),
+        'date_to': request.GET.get('date_to', ''),
+        'search': request.GET.get('search', '').strip(),
+    }
     try:
-        from booking.models import Booking
-        bookings = Booking.objects.all().order_by('-start_time')
+        from booking.models import Booking, Room
+        from booking.keyset import InvalidCursor, paginate_keyset
+        from booking.occupancy import day_bounds
+        from booking.stats import status_counts
+        from datetime import datetime
+        from .search import search_users
+        
+        bookings = Booking.objects.select_related('user', 'room')
+        if filters['status']:
+            bookings = bookings.filter(status=filters['status'])
+        if filters['room'].isdigit():
+            bookings = bookings.filter(room_id=int(filters['room']))
+        try:
+            if filters['date_from']:
+                day = datetime.strptime(filters['date_from'], '%Y-%m-%d').date()
+                bookings = bookings.filter(start_time__gte=day_bounds(day)[0])
+            if filters['date_to']:
+                day = datetime.strptime(filters['date_to'], '%Y-%m-%d').date()
+                bookings = bookings.filter(start_time__lt=day_bounds(day)[1])
+        except ValueError:
+            messages.error(request, 'Dates must be in YYYY-MM-DD format.')
+        if filters['search']:
+            # Prefix match on the indexed user search tokens (see accounts.search)
+            bookings = bookings.filter(user_id__in=search_users(User.objects.all(), filters['search']).values('pk'))
         
-        # Calculate statistics
-        total_bookings = bookings.count()
-        pending_bookings = bookings.filter(status='pending').count()
-        confirmed_bookings = bookings.filter(status='confirmed').count()
-        cancelled_bookings = bookings.filter(status='cancelled').count()
+        try:
+            page = paginate_keyset(
+                bookings, ['-start_time', '-id'], 25,
+                after=request.GET.get('after'), before=request.GET.get('before'),
+            )
+        except InvalidCursor:
+            messages.error(request, 'Invalid page link; showing the first page.')
+            page = paginate_keyset(bookings, ['-start_time', '-id'], 25)
+        
+        # Counters from the daily rollup (see booking.stats) instead of every booking
+        counts = status_counts()
+        total_bookings = sum(counts.values())
+        pending_bookings = counts.get('pending', 0)
+        confirmed_bookings = counts.get('confirmed', 0)
+        cancelled_bookings = counts.get('cancelled', 0)
         
         # Get rooms for filtering
-        rooms = []
-        if bookings.exists():
-            rooms = bookings.values_list('room', flat=True).distinct()
-            from booking.models import Room
-            rooms = Room.objects.filter(id__in=rooms)
+        rooms = Room.objects.only('id', 'name', 'room_number').order_by('room_number')
+        status_choices = Booking.STATUS_CHOICES
         
     except ImportError:
-        bookings = []
+        page = []
         rooms = []
+        status_choices = []
         total_bookings = 0
         pending_bookings = 0
         confirmed_bookings = 0
         cancelled_bookings = 0
 
+    # Links to the neighbouring pages keep the filters
+    filter_query = urlencode({key: value for key, value in filters.items() if value})
+
     context = {
         'user': request.user,
         'user_role': user_role,
-        'bookings': bookings,
+        'bookings': page,
         'rooms': rooms,
+        'filters': filters,
+        'filter_query': filter_query,
+        'status_choices': status_choices,
         'total_bookings': total_bookings,
         'pending_bookings': pending_bookings,
         'confirmed_bookings': confirmed_bookings,
@@ -1414,41 +1509,43 @@ def manage_users_view(request):
         
         return redirect('accounts:manage_users')
     
-    # Get all users
+    # Filtered users, one keyset page at a time
+    from accounts.search import filter_users, user_counts
+    from booking.keyset import InvalidCursor, paginate_keyset
+    
+    filters = {
+        'search': request.GET.get('search', '').strip(),
+        'role': request.GET.get('role', ''),
+        'active': request.GET.get('active', ''),
+    }
+    users = filter_users(User.objects.all(), filters)
+    ordering = ['-date_joined', '-id']
     try:
-        all_users = User.objects.all().order_by('-date_joined')
-        admin_users = all_users.filter(is_admin=True)
-        regular_users = all_users.filter(is_admin=False)
-        
-        # Calculate statistics
-        total_users = all_users.count()
-        active_users = all_users.filter(is_active=True).count()
-        inactive_users = total_users - active_users
-        admin_count = admin_users.count()
-        user_count = regular_users.count()
-        
-    except Exception as e:
-        messages.error(request, f'Error loading users: {str(e)}')
-        all_users = []
-        admin_users = []
-        regular_users = []
-        total_users = 0
-        active_users = 0
-        inactive_users = 0
-        admin_count = 0
-        user_count = 0
+        page = paginate_keyset(
+            users, ordering, 25,
+            after=request.GET.get('after'), before=request.GET.get('before'),
+        )
+    except InvalidCursor:
+        messages.error(request, 'Invalid page link; showing the first page.')
+        page = paginate_keyset(users, ordering, 25)
+    
+    # Calculate statistics in one query
+    counts = user_counts(User.objects.all())
     
     context = {
         'user': request.user,
         'user_role': user_role,
-        'all_users': all_users,
-        'admin_users': admin_users,
-        'regular_users': regular_users,
-        'total_users': total_users,
-        'active_users': active_users,
-        'inactive_users': inactive_users,
-        'admin_count': admin_count,
-        'user_count': user_count,
+        'all_users': page,
+        'page': page,
+        'total_users': counts['total'],
+        'active_users': counts['active'],
+        'inactive_users': counts['inactive'],
+        'admin_count': counts['admins'],
+        'user_count': counts['regular'],
+        'search_query': filters['search'],
+        'selected_role': filters['role'],
+        'selected_active': filters['active'],
+        'filter_query': urlencode({key: value for key, value in filters.items() if value}),
     }
     
     return render(request, 'AdminPage/manageUsers.html', context)
@@ -2336,15 +2433,12 @@ def check_availability_ajax(request):
                 return JsonResponse({'available': False, 'message': 'End time must be after start time'})
             
             # Check for conflicts
-            conflicts = Booking.objects.filter(
-                room=room,
-                start_time__lt=end_datetime,
-                end_time__gt=start_datetime,
-                status__in=['confirmed', 'pending']
-            )
+            from booking.availability import find_conflicting_ids, room_is_held
+            conflict_ids = find_conflicting_ids(room.id, start_datetime, end_datetime)
             
-            if conflicts.exists():
-                conflict = conflicts.first()
+            # The booking may have been cancelled since the ids were read
+            conflict = Booking.objects.select_related('user').filter(pk__in=conflict_ids[:1]).first()
+            if conflict:
                 conflict_time = conflict.start_time.strftime('%H:%M')
                 return JsonResponse({
                     'available': False, 
@@ -2356,21 +2450,27 @@ def check_availability_ajax(request):
                     }
                 })
             
-            # Check daily booking limit
-            daily_bookings = Booking.objects.filter(
-                user=request.user,
-                start_time__date=booking_date,
-                status__in=['confirmed', 'pending']
-            ).count()
-            
-            if daily_bookings >= 3:
+            # Check the booking rule scoped to this room and the user's faculty
+            from booking.quotas import get_usage
+            from booking.rules import DEFAULT_RULE, resolve_rule
+            daily_bookings, weekly_bookings = get_usage(request.user.id, booking_date)
+            rule = resolve_rule(room, request.user, default=DEFAULT_RULE)
+            violation = rule.check_request(timezone.make_aware(start_datetime), timezone.make_aware(end_datetime),
+                                           daily_bookings, weekly_bookings)
+            if violation:
                 return JsonResponse({
                     'available': False, 
-                    'message': 'You have reached the maximum number of bookings per day (3)'
+                    'message': violation
                 })
             
-            # All checks passed
-            return JsonResponse({
+            if room_is_held(room.id, start_datetime, end_datetime, request.user.id):
+                return JsonResponse({
+                    'available': False,
+                    'held': True,
+                    'message': 'Someone else is booking this time slot right now. Try again in a few minutes.'
+                })
+            
+            response = {
                 'available': True, 
                 'message': 'Room is available for booking',
                 'room_info': {
@@ -2379,7 +2479,23 @@ def check_availability_ajax(request):
                     'room_type': room.get_room_type_display(),
                     'equipment': room.equipment
                 }
-            })
+            }
+            
+            # Reserve the slot while the user finishes the form
+            if data.get('hold'):
+                from booking.services import place_hold, BookingConflictError, SlotHeldError
+                try:
+                    hold = place_hold(request.user, room.id, timezone.make_aware(start_datetime),
+                                      timezone.make_aware(end_datetime))
+                except (BookingConflictError, SlotHeldError) as e:
+                    return JsonResponse({'available': False, 'message': e.message_dict['start_time'][0]})
+                response['hold'] = {
+                    'id': hold.id,
+                    'expires_at': timezone.localtime(hold.expires_at).strftime('%H:%M'),
+                }
+            
+            # All checks passed
+            return JsonResponse(response)
             
         except Exception as e:
             return JsonResponse({'error': str(e)}, status=500)
@@ -2387,6 +2503,25 @@ def check_availability_ajax(request):
     return JsonResponse({'error': 'Invalid request method'}, status=405)
 
 @login_required
+def release_hold_ajax(request):
+    """AJAX endpoint to give up the slot held while filling in the booking form"""
+    if request.method != 'POST':
+        return JsonResponse({'error': 'Invalid request method'}, status=405)
+    
+    from booking.services import release_holds
+    return JsonResponse({'success': True, 'released': release_holds(request.user)})
+
+def _rooms_etag(request):
+    """ETag of get_rooms_ajax: room catalog and bookings versions, plus the current minute
+    
+    The minute is included because next_booking moves on as bookings start.
+    """
+    from booking.etags import BOOKINGS_VERSION_KEY, make_etag
+    return make_etag(request, [BOOKINGS_VERSION_KEY], timezone.now().strftime('%Y-%m-%d %H:%M'))
+
+@login_required
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=_rooms_etag)
 def get_rooms_ajax(request):
     """AJAX endpoint to get rooms for a specific building"""
     building_id = request.GET.get('building_id')
@@ -2424,15 +2559,17 @@ def get_rooms_ajax(request):
             except ValueError:
                 pass
         
+        # Next booking of every room in the same query
+        from django.db.models import Min
+        rooms = rooms.annotate(next_booking_start=Min(
+            'bookings__start_time',
+            filter=Q(bookings__start_time__gt=timezone.now(), bookings__status__in=['confirmed', 'pending']),
+        ))
+        
         rooms_data = []
         for room in rooms:
             try:
-                # Get next booking for this room
-                next_booking = room.bookings.filter(
-                    start_time__gt=timezone.now(),
-                    status__in=['confirmed', 'pending']
-                ).order_by('start_time').first()
-                
+                next_start = room.next_booking_start
                 rooms_data.append({
                     'id': room.id,
                     'name': room.name,
@@ -2444,7 +2581,7 @@ def get_rooms_ajax(request):
                     'equipment': room.equipment or '',
                     'location': f"{room.name} ({room.room_number})",
                     'available': room.is_available,
-                    'next_booking': next_booking.start_time.strftime('%Y-%m-%d %H:%M') if next_booking else None
+                    'next_booking': next_start.strftime('%Y-%m-%d %H:%M') if next_start else None
                 })
             except Exception as e:
                 # Skip this room if there's an error (e.g., missing field)
@@ -2534,8 +2671,15 @@ def cancel_booking_view(request, booking_id):
         if request.method == 'POST':
             # Check if booking can be cancelled
             if booking.status in ['pending', 'confirmed'] and booking.start_time > timezone.now():
-                booking.status = 'cancelled'
-                booking.save()
+                from booking.email_utils import send_admin_notification_email, send_booking_cancellation_email
+                from django.db import transaction
+                
+                # The emails are queued in the same transaction as the status change
+                with transaction.atomic():
+                    booking.status = 'cancelled'
+                    booking.save()
+                    send_booking_cancellation_email(booking)
+                    send_admin_notification_email(booking, 'cancelled')
                 
                 messages.success(request, f'Booking for {booking.room.name} on {booking.start_time.strftime("%Y-%m-%d at %H:%M")} has been cancelled.')
                 
@@ -2,7 +2,7 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
 from django.utils.html import format_html
-from .models import Room, Booking, BookingRule, Announcement
+from .models import Room, Booking, BookingRule, Announcement, BookingSeries, EmailOutbox
 
 # @admin.register(CustomUser)
 class CustomUserAdmin(UserAdmin):
@@ -202,10 +202,13 @@ class BookingRuleAdmin(admin.ModelAdmin):
         # 'max_daily_bookings',
         # 'max_weekly_bookings',
         'max_advance_days',
+        'room',
+        'room_type',
+        'faculty',
         'is_active'
     )
     
-    list_filter = ('is_active', 'created_at')
+    list_filter = ('is_active', 'room_type', 'faculty', 'created_at')
     
     search_fields = ('name',)
     
@@ -215,6 +218,9 @@ class BookingRuleAdmin(admin.ModelAdmin):
         ('Rule Name', {
             'fields': ('name', 'is_active')
         }),
+        ('Scope', {
+            'fields': ('room', 'room_type', 'faculty')
+        }),
         ('Booking Limits', {
             'fields': (
                 'max_duration_hours',
@@ -224,7 +230,7 @@ class BookingRuleAdmin(admin.ModelAdmin):
         }),
         ('Time Constraints', {
             'fields': (
-                'max_advancee_days',
+                'max_advance_days',
                 'min_advance_hours',
                 'booking_start_time',
                 'booking_end_time'
@@ -295,6 +301,25 @@ class AnnouncementAdmin(admin.ModelAdmin):
             obj.created_by = request.user
         super().save_model(request, obj, form, change)
 
+@admin.register(BookingSeries)
+class BookingSeriesAdmin(admin.ModelAdmin):
+    """Admin configuration for BookingSeries"""
+    
+    list_display = ('room', 'user', 'frequency', 'start_date', 'end_date', 'start_time', 'end_time')
+    list_filter = ('frequency', 'room')
+    search_fields = ('purpose', 'user__email', 'room__name')
+    list_select_related = ('room', 'user')
+    readonly_fields = ('created_at',)
+
+@admin.register(EmailOutbox)
+class EmailOutboxAdmin(admin.ModelAdmin):
+    """Admin configuration for the email outbox"""
+    
+    list_display = ('subject', 'recipients', 'status', 'attempts', 'next_attempt_at', 'sent_at', 'created_at')
+    list_filter = ('status',)
+    search_fields = ('subject', 'recipients')
+    readonly_fields = ('booking', 'attempts', 'last_error', 'created_at', 'sent_at')
+
 # Admin site customization
 admin.site.site_header = 'Room Booking Administration'
 admin.site.site_title = 'Room Booking Admin'
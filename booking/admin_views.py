@@ -2,14 +2,27 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.http import JsonResponse
+from django.http import HttpResponse, HttpResponseForbidden, JsonResponse, StreamingHttpResponse
+from asgiref.sync import sync_to_async
 from django.core.paginator import Paginator
-from django.db.models import Q, Count
+from django.core.exceptions import ValidationError
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition
+from django.db import transaction
+from django.db.models import Q, Sum
 from django.utils import timezone
 from datetime import datetime, timedelta
-from .models import Room, Booking, BookingRule, Announcement
+from .models import Room, Booking, BookingDailyStats, BookingRule, Announcement
 from .forms import RoomForm, BookingRuleForm, AnnouncementForm, AdminBookingForm
+from .dashboard import (
+    dashboard_changed, dashboard_counters, dashboard_events, get_dashboard_stats, live_update_context,
+    streaming_supported,
+)
+from .etags import catalog_changed, make_etag, room_day_key
 from .decorators import admin_required
+from .email_utils import send_booking_cancellation_email, send_booking_confirmation_email
+from .occupancy import get_day_occupancy, occupancy_string, slot_mask
+from .services import place_booking
 from accounts.models import User
 import json
 
@@ -17,69 +30,37 @@ import json
 @admin_required
 def admin_dashboard(request):
     """Admin dashboard with system statistics"""
-    # Get statistics
-    total_rooms = Room.objects.count()
-    total_bookings = Booking.objects.count()
-    active_bookings = Booking.objects.filter(
-        status='confirmed',
-        end_time__gte=timezone.now()
-    ).count()
-    
-    # Pending bookings that need approval
-    pending_bookings = Booking.objects.filter(status='pending').count()
-    
-    # Today's bookings
-    today = timezone.now().date()
-    today_bookings = Booking.objects.filter(
-        start_time__date=today,
-        status='confirmed'
-    ).count()
-    
-    # Recent bookings
-    recent_bookings = Booking.objects.select_related('user', 'room').order_by('-created_at')[:10]
-    
-    # Room utilization stats
-    room_stats = Room.objects.annotate(
-        booking_count=Count('booking')
-    ).order_by('-booking_count')[:5]
-    
-    # Users statistics
-    total_users = User.objects.count()
-    active_users = User.objects.filter(is_active=True).count()
-    admin_count = User.objects.filter(is_admin=True).count()
-    staff_count = User.objects.filter(is_staff=True, is_admin=False).count()
-    regular_count = total_users - admin_count - staff_count
-    
-    # Get most booked rooms
-    most_booked_rooms = Room.objects.annotate(
-        booking_count=Count('booking')
-    ).order_by('-booking_count')[:5]
-    
-    # Get upcoming bookings
-    upcoming_bookings = Booking.objects.filter(
-        start_time__gt=timezone.now(),
-        status='confirmed'
-    ).order_by('start_time')[:5]
-    
-    context = {
-        'total_rooms': total_rooms,
-        'total_bookings': total_bookings,
-        'active_bookings': active_bookings,
-        'pending_bookings': pending_bookings,
-        'today_bookings': today_bookings,
-        'recent_bookings': recent_bookings,
-        'room_stats': room_stats,
-        'total_users': total_users,
-        'active_users': active_users,
-        'admin_count': admin_count,
-        'staff_count': staff_count,
-        'regular_count': regular_count,
-        'most_booked_rooms': most_booked_rooms,
-        'upcoming_bookings': upcoming_bookings,
-    }
-    
+    context = {**get_dashboard_stats(), **live_update_context(request)}
     return render(request, 'AdminPage/adminHomePage.html', context)
 
+@login_required
+@admin_required
+@cache_control(private=True, no_cache=True)
+def admin_dashboard_counters(request):
+    """Dashboard counters for polling, from the cached snapshot"""
+    return JsonResponse({'success': True, 'stats': dashboard_counters()})
+
+async def admin_dashboard_stream(request):
+    """Server-Sent Events stream of the dashboard counters
+
+    Async so that idle dashboards only hold a coroutine, not a worker thread.
+    Under WSGI it would tie up a sync worker until the worker timeout, so it
+    answers 204, which tells EventSource not to reconnect; the dashboard
+    polls admin_dashboard_counters instead.
+    The sync auth decorators cannot wrap an async view, so access is checked here.
+    """
+    if not streaming_supported(request):
+        return HttpResponse(status=204)
+    user = await sync_to_async(lambda: request.user if request.user.is_authenticated else None)()
+    if user is None or not user.is_admin:
+        return HttpResponseForbidden('Access denied. Admin privileges required.')
+
+    response = StreamingHttpResponse(dashboard_events(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Stop reverse proxies from buffering the stream
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
 # Step 19: Admin Room Management
 @login_required
 @admin_required
@@ -241,6 +222,10 @@ def admin_room_bulk_action(request):
         elif action == 'set_unavailable':
             rooms.update(availability_status='unavailable')
             messages.success(request, f'{rooms.count()} rooms set to unavailable.')
+        
+        # .update() skips the Room signals
+        catalog_changed()
+        dashboard_changed()
     
     return redirect('booking:admin_room_list')
 
@@ -310,6 +295,45 @@ def admin_booking_list(request):
     
     return render(request, 'AdminPage/allBookings.html', context)
 
+@login_required
+@admin_required
+def admin_booking_export(request):
+    """Stream the filtered bookings as CSV or NDJSON"""
+    from .export import FORMATS
+    from .occupancy import day_bounds
+
+    export_format = request.GET.get('format', 'csv')
+    if export_format not in FORMATS:
+        return JsonResponse({'success': False, 'error': f"format must be one of: {', '.join(FORMATS)}"}, status=400)
+
+    bookings = Booking.objects.all()
+    try:
+        # Whole local days, so date_to includes bookings later that day
+        date_from = request.GET.get('date_from')
+        if date_from:
+            bookings = bookings.filter(start_time__gte=day_bounds(datetime.strptime(date_from, '%Y-%m-%d').date())[0])
+        date_to = request.GET.get('date_to')
+        if date_to:
+            bookings = bookings.filter(start_time__lt=day_bounds(datetime.strptime(date_to, '%Y-%m-%d').date())[1])
+        room_id = request.GET.get('room')
+        if room_id:
+            bookings = bookings.filter(room_id=int(room_id))
+    except ValueError:
+        return JsonResponse({'success': False, 'error': 'Dates must be YYYY-MM-DD and room an integer'}, status=400)
+
+    statuses = [status for value in request.GET.getlist('status') for status in value.split(',') if status]
+    if statuses:
+        bookings = bookings.filter(status__in=statuses)
+    faculty = request.GET.get('faculty')
+    if faculty:
+        bookings = bookings.filter(user__faculty=faculty)
+
+    stream, content_type, extension = FORMATS[export_format]
+    response = StreamingHttpResponse(stream(bookings), content_type=content_type)
+    filename = f'bookings-{timezone.localdate():%Y%m%d}.{extension}'
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
 @login_required
 @admin_required
 def admin_booking_create(request):
@@ -317,9 +341,13 @@ def admin_booking_create(request):
     if request.method == 'POST':
         form = AdminBookingForm(request.POST)
         if form.is_valid():
-            booking = form.save()
-            messages.success(request, f'Booking created successfully for {booking.user.get_full_name()}!')
-            return redirect('booking:admin_booking_list')
+            try:
+                booking = place_booking(form.save(commit=False))
+            except ValidationError as e:
+                messages.error(request, e.messages[0])
+            else:
+                messages.success(request, f'Booking created successfully for {booking.user.get_full_name()}!')
+                return redirect('booking:admin_booking_list')
         else:
             messages.error(request, 'Please correct the errors below.')
     else:
@@ -340,9 +368,13 @@ def admin_booking_edit(request, booking_id):
     if request.method == 'POST':
         form = AdminBookingForm(request.POST, instance=booking)
         if form.is_valid():
-            booking = form.save()
-            messages.success(request, f'Booking updated successfully!')
-            return redirect('booking:admin_booking_list')
+            try:
+                booking = place_booking(form.save(commit=False))
+            except ValidationError as e:
+                messages.error(request, e.messages[0])
+            else:
+                messages.success(request, f'Booking updated successfully!')
+                return redirect('booking:admin_booking_list')
         else:
             messages.error(request, 'Please correct the errors below.')
     else:
@@ -375,18 +407,25 @@ def admin_booking_delete(request, booking_id):
 @admin_required
 def admin_booking_update_status(request, booking_id):
     """Update booking status"""
-    booking = get_object_or_404(Booking, id=booking_id)
+    booking = get_object_or_404(Booking.objects.select_related('user', 'room'), id=booking_id)
     
     if request.method == 'POST':
         new_status = request.POST.get('status')
         if new_status in [choice[0] for choice in Booking.STATUS_CHOICES]:
-            booking.status = new_status
-            booking.save()
+            old_status = booking.status
+            with transaction.atomic():
+                booking.status = new_status
+                booking.save()
+                # Queued for run_email_worker, committed together with the status
+                if new_status != old_status and new_status == 'confirmed':
+                    send_booking_confirmation_email(booking)
+                elif new_status != old_status and new_status == 'cancelled':
+                    send_booking_cancellation_email(booking)
             messages.success(request, f'Booking status updated to {new_status}!')
         else:
             messages.error(request, 'Invalid status selected.')
     
-    return redirect('admin_booking_list')
+    return redirect('booking:admin_booking_list')
 
 # Step 21: System Configuration
 @login_required
@@ -543,50 +582,41 @@ def admin_user_management(request):
         
         return redirect('booking:admin_user_management')
     
-    # GET request - display users
-    all_users = User.objects.all().order_by('first_name')
-    
-    # Calculate statistics
-    total_users = all_users.count()
-    active_users = all_users.filter(is_active=True).count()
-    admin_count = all_users.filter(is_admin=True).count()
-    user_count = all_users.filter(is_admin=False).count()
+    # GET request - display users, one keyset page at a time
+    from accounts.search import filter_users, user_counts
+    from django.utils.http import urlencode
+    from .keyset import InvalidCursor, paginate_keyset
     
-    # Search functionality
-    search_query = request.GET.get('search', '')
-    if search_query:
-        all_users = all_users.filter(
-            Q(first_name__icontains=search_query) |
-            Q(last_name__icontains=search_query) |
-            Q(email__icontains=search_query) |
-            Q(student_id__icontains=search_query)
+    filters = {
+        'search': request.GET.get('search', '').strip(),
+        'role': request.GET.get('role', ''),
+        'active': request.GET.get('active', ''),
+    }
+    users = filter_users(User.objects.all(), filters)
+    ordering = ['first_name', 'id']
+    try:
+        page = paginate_keyset(
+            users, ordering, 25,
+            after=request.GET.get('after'), before=request.GET.get('before'),
         )
+    except InvalidCursor:
+        messages.error(request, 'Invalid page link; showing the first page.')
+        page = paginate_keyset(users, ordering, 25)
     
-    # Filter by role
-    role = request.GET.get('role', '')
-    if role == 'admin':
-        all_users = all_users.filter(is_admin=True)
-    elif role == 'staff':
-        all_users = all_users.filter(is_staff=True, is_admin=False)
-    elif role == 'user':
-        all_users = all_users.filter(is_admin=False, is_staff=False)
-    
-    # Filter by active status
-    active = request.GET.get('active', '')
-    if active == 'true':
-        all_users = all_users.filter(is_active=True)
-    elif active == 'false':
-        all_users = all_users.filter(is_active=False)
+    # Calculate statistics in one query
+    counts = user_counts(User.objects.all())
     
     context = {
-        'all_users': all_users,
-        'total_users': total_users,
-        'active_users': active_users,
-        'admin_count': admin_count,
-        'user_count': user_count,
-        'search_query': search_query,
-        'selected_role': role,
-        'selected_active': active,
+        'all_users': page,
+        'page': page,
+        'total_users': counts['total'],
+        'active_users': counts['active'],
+        'admin_count': counts['admins'],
+        'user_count': counts['regular'],
+        'search_query': filters['search'],
+        'selected_role': filters['role'],
+        'selected_active': filters['active'],
+        'filter_query': urlencode({key: value for key, value in filters.items() if value}),
     }
     
     return render(request, 'AdminPage/manageUsers.html', context)
@@ -607,8 +637,19 @@ def admin_user_toggle_status(request, user_id):
     return redirect('booking:admin_user_management')
 
 # API endpoints for admin
+def _room_availability_etag(request):
+    """ETag of admin_get_room_availability from the (room, date) version"""
+    try:
+        room_id = int(request.GET.get('room_id', ''))
+        target_date = datetime.strptime(request.GET.get('date', ''), '%Y-%m-%d').date()
+    except ValueError:
+        return None
+    return make_etag(request, [room_day_key(room_id, target_date)])
+
 @login_required
 @admin_required
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=_room_availability_etag)
 def admin_get_room_availability(request):
     """Get room availability for admin dashboard"""
     room_id = request.GET.get('room_id')
@@ -620,31 +661,46 @@ def admin_get_room_availability(request):
     try:
         room = Room.objects.get(id=room_id)
         target_date = datetime.strptime(date, '%Y-%m-%d').date()
+        occupied = get_day_occupancy(target_date, [room.id]).get(room.id, 0)
         
-        # Get bookings for the specific date
-        bookings = Booking.objects.filter(
-            room=room,
-            start_time__date=target_date,
-            status__in=['confirmed', 'pending']
-        ).order_by('start_time')
-        
+        # Get bookings for the specific date (none to fetch if the bitmap is empty)
         booking_data = []
-        for booking in bookings:
-            booking_data.append({
-                'id': booking.id,
-                'start_time': booking.start_time.strftime('%H:%M'),
-                'end_time': booking.end_time.strftime('%H:%M'),
-                'user': booking.user.get_full_name(),
-                'purpose': booking.purpose,
-                'status': booking.status,
-            })
+        if occupied:
+            bookings = Booking.objects.filter(
+                room=room,
+                start_time__date=target_date,
+                status__in=['confirmed', 'pending']
+            ).select_related('user').order_by('start_time')
+            
+            for booking in bookings:
+                booking_data.append({
+                    'id': booking.id,
+                    'start_time': timezone.localtime(booking.start_time).strftime('%H:%M'),
+                    'end_time': timezone.localtime(booking.end_time).strftime('%H:%M'),
+                    'user': booking.user.get_full_name(),
+                    'purpose': booking.purpose,
+                    'status': booking.status,
+                })
         
-        return JsonResponse({
+        response = {
             'success': True,
             'room': room.name,
             'date': date,
-            'bookings': booking_data
-        })
+            'bookings': booking_data,
+            'occupancy': occupancy_string(occupied),
+        }
+        
+        # Optional window check answered from the bitmap
+        start_time = request.GET.get('start_time')
+        end_time = request.GET.get('end_time')
+        if start_time and end_time:
+            mask = slot_mask(
+                datetime.strptime(start_time, '%H:%M').time(),
+                datetime.strptime(end_time, '%H:%M').time(),
+            )
+            response['is_free'] = not (occupied & mask)
+        
+        return JsonResponse(response)
         
     except Room.DoesNotExist:
         return JsonResponse({'error': 'Room not found'}, status=404)
@@ -657,29 +713,30 @@ def admin_booking_stats(request):
     """Get booking statistics for admin dashboard"""
     # Get date range
     days = int(request.GET.get('days', 7))
-    end_date = timezone.now().date()
+    end_date = timezone.localdate()
     start_date = end_date - timedelta(days=days)
-    
-    # Get bookings in date range
-    bookings = Booking.objects.filter(
-        created_at__date__range=[start_date, end_date]
-    )
-    
+
+    # Read the daily rollup (see booking.stats) instead of every booking
+    rows = BookingDailyStats.objects.filter(
+        date__range=[start_date, end_date]
+    ).values('date', 'status').annotate(
+        bookings=Sum('count'),
+        minutes=Sum('booked_minutes'),
+    ).order_by('date')
+
     # Group by date
     daily_stats = {}
-    for booking in bookings:
-        date_str = booking.created_at.strftime('%Y-%m-%d')
+    for row in rows:
+        if not row['bookings']:
+            continue
+        date_str = row['date'].strftime('%Y-%m-%d')
         if date_str not in daily_stats:
-            daily_stats[date_str] = {
-                'total': 0,
-                'confirmed': 0,
-                'pending': 0,
-                'cancelled': 0,
-                'rejected': 0,
-            }
-        daily_stats[date_str]['total'] += 1
-        daily_stats[date_str][booking.status] += 1
-    
+            daily_stats[date_str] = {'total': 0, 'rejected': 0, 'booked_minutes': 0}
+            daily_stats[date_str].update((status, 0) for status, _ in Booking.STATUS_CHOICES)
+        daily_stats[date_str]['total'] += row['bookings']
+        daily_stats[date_str][row['status']] += row['bookings']
+        daily_stats[date_str]['booked_minutes'] += row['minutes']
+
     return JsonResponse({
         'success': True,
         'daily_stats': daily_stats,
@@ -687,4 +744,63 @@ def admin_booking_stats(request):
             'start': start_date.isoformat(),
             'end': end_date.isoformat(),
         }
-    })
\ No newline at end of file
+    })
+
+
+# Maximum range a utilization report covers
+UTILIZATION_MAX_DAYS = 366
+
+
+def _utilization_request(request):
+    """Rooms and (first_day, last_day) of a utilization request; raises ValueError"""
+    today = timezone.localdate()
+    start_str = request.GET.get('start_date')
+    end_str = request.GET.get('end_date')
+    last_day = datetime.strptime(end_str, '%Y-%m-%d').date() if end_str else today
+    first_day = datetime.strptime(start_str, '%Y-%m-%d').date() if start_str else last_day - timedelta(days=29)
+    if last_day < first_day:
+        raise ValueError('end_date must not be before start_date')
+    if (last_day - first_day).days + 1 > UTILIZATION_MAX_DAYS:
+        raise ValueError(f'The range can cover at most {UTILIZATION_MAX_DAYS} days')
+
+    rooms = Room.objects.order_by('room_number')
+    room_type = request.GET.get('room_type', '')
+    if room_type:
+        rooms = rooms.filter(room_type=room_type)
+    return rooms, first_day, last_day
+
+@login_required
+@admin_required
+def admin_utilization(request):
+    """Room utilization analytics page"""
+    from .utilization import build_report
+
+    report = None
+    try:
+        rooms, first_day, last_day = _utilization_request(request)
+        report = build_report(rooms, first_day, last_day)
+        report['rooms'].sort(key=lambda room: room['occupancy'], reverse=True)
+    except ValueError as e:
+        messages.error(request, f'Invalid date range: {e}')
+
+    return render(request, 'AdminPage/utilization.html', {
+        'report': report,
+        'weekday_rows': zip(report['weekdays'], report['by_weekday_hour']) if report else [],
+        'hours': range(24),
+        'room_types': Room.ROOM_TYPES,
+        'selected_room_type': request.GET.get('room_type', ''),
+        'start_date': request.GET.get('start_date', report['start_date'] if report else ''),
+        'end_date': request.GET.get('end_date', report['end_date'] if report else ''),
+    })
+
+@login_required
+@admin_required
+def admin_utilization_api(request):
+    """Room utilization analytics as JSON"""
+    from .utilization import build_report
+
+    try:
+        rooms, first_day, last_day = _utilization_request(request)
+    except ValueError as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+    return JsonResponse({'success': True, **build_report(rooms, first_day, last_day)})
@@ -0,0 +1,158 @@
+# booking/approvals.py
+"""
+Bulk approval of pending bookings.
+
+plan_approvals() loads the pending bookings, the confirmed bookings they
+could collide with and the owners' quota counters in three queries, no
+matter how many bookings are pending. Rules come from the compiled rule
+set. Bookings are then decided in memory in the order they were made:
+each approved booking blocks later pending ones for the same room and
+counts towards its owner's limits. The admin views show the plan for
+confirmation before apply_plan() writes the decisions with two bulk
+UPDATEs.
+"""
+from bisect import bisect_left, insort
+from collections import Counter, defaultdict, namedtuple
+
+from django.db import transaction
+from django.utils import timezone
+
+from . import occupancy, quotas, stats
+from .availability import room_changed
+from .dashboard import dashboard_changed
+from .email_utils import queue_booking_status_emails
+from .models import Booking, BookingQuota
+from .rules import DEFAULT_RULE, get_rule_set
+
+ApprovalPlan = namedtuple('ApprovalPlan', ['approved', 'rejected'])
+Rejection = namedtuple('Rejection', ['booking', 'reason'])
+
+
+class _RoomSchedule:
+    """Non-overlapping confirmed intervals of one room, sorted by start"""
+
+    def __init__(self):
+        self.intervals = []
+
+    def conflicts(self, start, end):
+        i = bisect_left(self.intervals, (start, end))
+        if i and self.intervals[i - 1][1] > start:
+            return True
+        return i < len(self.intervals) and self.intervals[i][0] < end
+
+    def add(self, start, end):
+        insort(self.intervals, (start, end))
+
+
+def plan_approvals(booking_ids=None, now=None):
+    """Decide which pending bookings to approve; returns an ApprovalPlan
+
+    `booking_ids` limits the plan to those bookings; by default every
+    pending booking is considered.
+    """
+    now = now or timezone.now()
+    pending = Booking.objects.filter(status='pending').select_related('room', 'user')
+    if booking_ids is not None:
+        pending = pending.filter(pk__in=list(booking_ids))
+    pending = sorted(pending, key=lambda booking: (booking.created_at, booking.pk))
+    if not pending:
+        return ApprovalPlan([], [])
+
+    schedules = defaultdict(_RoomSchedule)
+    for room_id, start_time, end_time in Booking.objects.filter(
+        room_id__in={booking.room_id for booking in pending},
+        status='confirmed',
+        start_time__lt=max(booking.end_time for booking in pending),
+        end_time__gt=min(booking.start_time for booking in pending),
+    ).order_by().values_list('room_id', 'start_time', 'end_time'):
+        schedules[room_id].add(start_time, end_time)
+
+    # Counters hold every active booking, the pending ones included. Take
+    # the batch back out so they only count once approved.
+    days = {booking.pk: timezone.localtime(booking.start_time).date() for booking in pending}
+    counts = Counter()
+    for user_id, period, period_start, count in BookingQuota.objects.filter(
+        user_id__in={booking.user_id for booking in pending},
+        period_start__in={quotas.week_start(day) for day in days.values()} | set(days.values()),
+    ).values_list('user_id', 'period', 'period_start', 'count'):
+        counts[(user_id, period, period_start)] = count
+    for booking in pending:
+        day = days[booking.pk]
+        counts[(booking.user_id, quotas.DAY, day)] -= 1
+        counts[(booking.user_id, quotas.WEEK, quotas.week_start(day))] -= 1
+
+    rules = get_rule_set()
+    approved, rejected = [], []
+    for booking in pending:
+        if booking.start_time <= now:
+            rejected.append(Rejection(booking, 'The booking has already started.'))
+            continue
+        if schedules[booking.room_id].conflicts(booking.start_time, booking.end_time):
+            rejected.append(Rejection(booking, 'The room is already booked for this time.'))
+            continue
+        day = days[booking.pk]
+        day_key = (booking.user_id, quotas.DAY, day)
+        week_key = (booking.user_id, quotas.WEEK, quotas.week_start(day))
+        rule = rules.resolve(booking.room_id, booking.room.room_type, booking.user.faculty) or DEFAULT_RULE
+        reason = rule.check_booking(booking.start_time, booking.end_time,
+                                    max(counts[day_key], 0), max(counts[week_key], 0))
+        if reason:
+            rejected.append(Rejection(booking, reason))
+            continue
+        approved.append(booking)
+        schedules[booking.room_id].add(booking.start_time, booking.end_time)
+        counts[day_key] += 1
+        counts[week_key] += 1
+    return ApprovalPlan(approved, rejected)
+
+
+def apply_plan(plan):
+    """Confirm the approved and cancel the rejected bookings in bulk
+
+    Bookings that stopped being pending since the plan was made are left
+    alone. The owners' confirmation and cancellation emails are queued in
+    the same transaction. Returns (approved_count, rejected_count).
+    """
+    now = timezone.now()
+    fields = ('pk', 'user_id', 'room_id', 'start_time', 'end_time', 'created_at')
+    with transaction.atomic():
+        approved_rows = list(Booking.objects.select_for_update().filter(
+            pk__in=[booking.pk for booking in plan.approved], status='pending',
+        ).values_list(*fields))
+        Booking.objects.filter(pk__in=[row[0] for row in approved_rows]).update(
+            status='confirmed', updated_at=now)
+
+        rejected_rows = list(Booking.objects.select_for_update().filter(
+            pk__in=[rejection.booking.pk for rejection in plan.rejected], status='pending',
+        ).values_list(*fields))
+        Booking.objects.filter(pk__in=[row[0] for row in rejected_rows]).update(
+            status='cancelled', updated_at=now)
+
+        # .update() skips the Booking signals that keep the derived data current
+        by_user = defaultdict(list)
+        by_room = defaultdict(set)
+        for _, user_id, room_id, start_time, end_time, _ in rejected_rows:
+            by_user[user_id].append(start_time)
+        # Confirmed and cancelled bookings both change what the room shows
+        for _, _, room_id, start_time, end_time, _ in approved_rows + rejected_rows:
+            by_room[room_id].update(occupancy.local_dates(start_time, end_time))
+        for user_id, start_times in by_user.items():
+            quotas.bookings_removed(user_id, start_times)
+        stats.status_changed([(row[5], row[2], row[3], row[4]) for row in approved_rows], 'pending', 'confirmed')
+        stats.status_changed([(row[5], row[2], row[3], row[4]) for row in rejected_rows], 'pending', 'cancelled')
+
+        # The owners hear about the decisions only if they are committed
+        locked = {row[0] for row in approved_rows} | {row[0] for row in rejected_rows}
+        confirmed = [booking for booking in plan.approved if booking.pk in locked]
+        cancelled = [rejection.booking for rejection in plan.rejected if rejection.booking.pk in locked]
+        for booking in confirmed:
+            booking.status = 'confirmed'
+        for booking in cancelled:
+            booking.status = 'cancelled'
+        queue_booking_status_emails(confirmed, cancelled)
+
+        for room_id, dates in by_room.items():
+            transaction.on_commit(lambda room_id=room_id: room_changed(room_id))
+            transaction.on_commit(lambda room_id=room_id, dates=dates: occupancy.refresh_occupancy(room_id, dates))
+        transaction.on_commit(dashboard_changed)
+    return len(approved_rows), len(rejected_rows)
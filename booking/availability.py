@@ -0,0 +1,340 @@
+# booking/availability.py
+"""
+In-process availability index.
+
+Every room gets a small index of its active (pending/confirmed) bookings kept
+as start-sorted arrays plus a running maximum of end times, so "does anything
+overlap [start, end)?" is a binary search instead of a query against the
+bookings table. Indexes are loaded lazily on first use, updated from the
+Booking post_save/post_delete signals and cross-checked against a per-room
+version number held in the Django cache so other worker processes notice
+writes they did not see themselves.
+
+That cross-check only reaches other processes when the cache is shared
+between them (Memcached, Redis, the database cache; see CACHES in the
+settings). With Django's default per-process LocMemCache each worker sees
+its own writes at once, but a booking made through another worker is only
+picked up when the index expires after INDEX_TTL_SECONDS.
+
+The index is therefore only a filter for the read side. A conflict it
+reports is confirmed against the database before anyone is told the slot
+is taken, so a cancelled or moved booking never blocks a request, and
+writes ask the database directly (`exact=True`, and the locked check in
+booking.services.place_booking).
+
+Live slot holds (BookingHold) are kept next to the bookings and count as
+occupied for everyone except the user holding them.
+"""
+import threading
+import time as _time
+from bisect import bisect_left, insort
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.utils import timezone
+
+ACTIVE_STATUSES = ('pending', 'confirmed')
+
+# How far back an index reaches. Checks that start before this window are
+# answered by the database instead.
+INDEX_LOOKBACK = timedelta(days=1)
+
+# Safety net for deployments whose cache is not shared between workers.
+INDEX_TTL_SECONDS = 300
+
+ROOM_VERSION_KEY = 'booking:room-version:{}'
+
+_indexes = {}
+_lock = threading.Lock()
+
+
+def _aware(value):
+    """Treat naive datetimes as local time, the same way the ORM does"""
+    if value is not None and timezone.is_naive(value):
+        return timezone.make_aware(value)
+    return value
+
+
+def get_room_version(room_id):
+    """Current write version of a room's bookings"""
+    return cache.get(ROOM_VERSION_KEY.format(room_id), 0)
+
+
+def bump_room_version(room_id):
+    """Record that a room's bookings changed and return the new version"""
+    key = ROOM_VERSION_KEY.format(room_id)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        cache.add(key, 0, None)
+        return cache.incr(key)
+
+
+class RoomIntervalIndex:
+    """Active bookings of one room as sorted start/end arrays"""
+
+    def __init__(self, room_id, rows, window_start, version, holds=()):
+        self.room_id = room_id
+        self.window_start = window_start
+        self.version = version
+        self.loaded_at = _time.monotonic()
+        self._rows = sorted(rows)
+        # (start, end, expires_at, user_id); a handful at most, scanned linearly
+        self.holds = list(holds)
+        self._rebuild()
+
+    def _rebuild(self):
+        self.starts = [row[0] for row in self._rows]
+        self.ends = [row[1] for row in self._rows]
+        self.ids = [row[2] for row in self._rows]
+        # Epoch seconds for sweeps that compare against many windows at once
+        self.start_stamps = [start.timestamp() for start in self.starts]
+        self.end_stamps = [end.timestamp() for end in self.ends]
+        self.max_ends = []
+        running = None
+        for end in self.ends:
+            running = end if running is None or end > running else running
+            self.max_ends.append(running)
+
+    def __len__(self):
+        return len(self._rows)
+
+    def is_stale(self):
+        return _time.monotonic() - self.loaded_at > INDEX_TTL_SECONDS
+
+    def covers(self, start):
+        return start >= self.window_start
+
+    def conflicts(self, start, end, exclude_pk=None):
+        """Ids of indexed bookings overlapping [start, end)"""
+        # Only bookings starting before `end` can overlap; among those,
+        # walk back while the running max end still reaches past `start`.
+        i = bisect_left(self.starts, end) - 1
+        found = []
+        while i >= 0 and self.max_ends[i] > start:
+            if self.ends[i] > start and self.ids[i] != exclude_pk:
+                found.append(self.ids[i])
+            i -= 1
+        found.reverse()
+        return found
+
+    def has_conflict(self, start, end, exclude_pk=None):
+        i = bisect_left(self.starts, end) - 1
+        if i < 0 or self.max_ends[i] <= start:
+            return False
+        if exclude_pk is None and self.ends[i] > start:
+            return True
+        return bool(self.conflicts(start, end, exclude_pk))
+
+    def is_held(self, start, end, user_id=None):
+        """True if another user's unexpired hold overlaps [start, end)"""
+        if not self.holds:
+            return False
+        now = timezone.now()
+        return any(
+            hold_start < end and hold_end > start and expires_at > now and holder_id != user_id
+            for hold_start, hold_end, expires_at, holder_id in self.holds
+        )
+
+    def discard(self, booking_id):
+        rows = [row for row in self._rows if row[2] != booking_id]
+        if len(rows) != len(self._rows):
+            self._rows = rows
+            self._rebuild()
+
+    def apply(self, booking):
+        """Bring a single booking's entry in line with its saved state"""
+        self._rows = [row for row in self._rows if row[2] != booking.pk]
+        if (booking.status in ACTIVE_STATUSES
+                and booking.room_id == self.room_id
+                and booking.end_time >= self.window_start):
+            insort(self._rows, (booking.start_time, booking.end_time, booking.pk))
+        self._rebuild()
+
+
+def _live_holds(room_ids):
+    from .models import BookingHold
+
+    return BookingHold.objects.filter(
+        room_id__in=room_ids,
+        expires_at__gt=timezone.now(),
+    ).order_by().values_list('room_id', 'start_time', 'end_time', 'expires_at', 'user_id')
+
+
+def _load_index(room_id):
+    from .models import Booking
+
+    version = get_room_version(room_id)
+    window_start = timezone.now() - INDEX_LOOKBACK
+    rows = Booking.objects.filter(
+        room_id=room_id,
+        status__in=ACTIVE_STATUSES,
+        end_time__gte=window_start,
+    ).order_by().values_list('start_time', 'end_time', 'id')
+    holds = [hold[1:] for hold in _live_holds([room_id])]
+    return RoomIntervalIndex(room_id, list(rows), window_start, version, holds)
+
+
+def get_room_index(room_id):
+    """Return a current index for the room, loading it on a miss"""
+    with _lock:
+        index = _indexes.get(room_id)
+    if index is not None and not index.is_stale() and index.version == get_room_version(room_id):
+        return index
+    index = _load_index(room_id)
+    with _lock:
+        _indexes[room_id] = index
+    return index
+
+
+def get_room_indexes(room_ids):
+    """Current indexes for many rooms, loading every miss in one query"""
+    from .models import Booking
+
+    room_ids = list(room_ids)
+    stored = cache.get_many([ROOM_VERSION_KEY.format(room_id) for room_id in room_ids])
+    versions = {room_id: stored.get(ROOM_VERSION_KEY.format(room_id), 0) for room_id in room_ids}
+    result = {}
+    with _lock:
+        for room_id in room_ids:
+            index = _indexes.get(room_id)
+            if index is not None and not index.is_stale() and index.version == versions[room_id]:
+                result[room_id] = index
+    missing = [room_id for room_id in room_ids if room_id not in result]
+    if not missing:
+        return result
+
+    window_start = timezone.now() - INDEX_LOOKBACK
+    rows = {room_id: [] for room_id in missing}
+    for room_id, start, end, booking_id in Booking.objects.filter(
+        room_id__in=missing,
+        status__in=ACTIVE_STATUSES,
+        end_time__gte=window_start,
+    ).order_by().values_list('room_id', 'start_time', 'end_time', 'id'):
+        rows[room_id].append((start, end, booking_id))
+    holds = {room_id: [] for room_id in missing}
+    for hold in _live_holds(missing):
+        holds[hold[0]].append(hold[1:])
+    with _lock:
+        for room_id in missing:
+            index = RoomIntervalIndex(room_id, rows[room_id], window_start, versions[room_id], holds[room_id])
+            _indexes[room_id] = index
+            result[room_id] = index
+    return result
+
+
+def find_conflicting_ids(room_id, start, end, exclude_pk=None):
+    """Ids of active bookings in the room overlapping [start, end)
+
+    Ids found in the index are confirmed against the database, so every id
+    returned belonged to an active booking when it was checked.
+    """
+    start, end = _aware(start), _aware(end)
+    index = get_room_index(room_id)
+    conflicts = _conflicts_queryset(room_id, start, end, exclude_pk)
+    if index.covers(start):
+        ids = index.conflicts(start, end, exclude_pk)
+        if not ids:
+            return []
+        conflicts = conflicts.filter(pk__in=ids)
+    return list(conflicts.order_by('start_time').values_list('id', flat=True))
+
+
+def room_is_held(room_id, start, end, user_id=None):
+    """True if a live hold of someone other than `user_id` overlaps [start, end)"""
+    start, end = _aware(start), _aware(end)
+    return get_room_index(room_id).is_held(start, end, user_id) and _holds_queryset(room_id, start, end, user_id).exists()
+
+
+def room_has_conflict(room_id, start, end, exclude_pk=None, user_id=None, exact=False):
+    """True if an active booking or another user's hold overlaps [start, end)
+
+    Holds placed by `user_id` are ignored; with no user every hold counts.
+    A conflict the index reports is confirmed against the database. With
+    `exact` the index is skipped and the database answers, as writes need.
+    """
+    start, end = _aware(start), _aware(end)
+    if not exact:
+        index = get_room_index(room_id)
+        held = index.is_held(start, end, user_id)
+        if index.covers(start) and not held and not index.has_conflict(start, end, exclude_pk):
+            return False
+    return (_conflicts_queryset(room_id, start, end, exclude_pk).exists()
+            or _holds_queryset(room_id, start, end, user_id).exists())
+
+
+def _conflicts_queryset(room_id, start, end, exclude_pk=None):
+    from .models import Booking
+
+    conflicts = Booking.objects.filter(
+        room_id=room_id,
+        status__in=ACTIVE_STATUSES,
+        start_time__lt=end,
+        end_time__gt=start,
+    )
+    if exclude_pk:
+        conflicts = conflicts.exclude(pk=exclude_pk)
+    return conflicts
+
+
+def _holds_queryset(room_id, start, end, user_id=None):
+    from .models import BookingHold
+
+    holds = BookingHold.objects.filter(
+        room_id=room_id,
+        start_time__lt=end,
+        end_time__gt=start,
+        expires_at__gt=timezone.now(),
+    )
+    if user_id:
+        holds = holds.exclude(user_id=user_id)
+    return holds
+
+
+def booking_changed(booking, previous_room_id=None):
+    """Apply a committed booking write to the local index and bump versions"""
+    room_ids = {booking.room_id}
+    if previous_room_id and previous_room_id != booking.room_id:
+        room_ids.add(previous_room_id)
+    for room_id in room_ids:
+        new_version = bump_room_version(room_id)
+        with _lock:
+            index = _indexes.get(room_id)
+            if index is None:
+                continue
+            if index.version != new_version - 1:
+                # Another process wrote in between; reload on next use
+                del _indexes[room_id]
+                continue
+            if room_id == booking.room_id:
+                index.apply(booking)
+            else:
+                index.discard(booking.pk)
+            index.version = new_version
+
+
+def booking_deleted(booking_id, room_id):
+    """Drop a deleted booking from the local index and bump the room version"""
+    new_version = bump_room_version(room_id)
+    with _lock:
+        index = _indexes.get(room_id)
+        if index is None:
+            return
+        if index.version != new_version - 1:
+            del _indexes[room_id]
+            return
+        index.discard(booking_id)
+        index.version = new_version
+
+
+def room_changed(room_id):
+    """Invalidate a room after a bulk write that bypassed the Booking signals"""
+    bump_room_version(room_id)
+    with _lock:
+        _indexes.pop(room_id, None)
+
+
+def clear_indexes():
+    """Forget every loaded index (used after bulk changes)"""
+    with _lock:
+        _indexes.clear()
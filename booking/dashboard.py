@@ -0,0 +1,172 @@
+# booking/dashboard.py
+"""
+Cached admin dashboard statistics.
+
+The dashboard counters come from one conditional-aggregation query per
+table, the room ranking is computed once and the recent/upcoming lists are
+loaded with their users and rooms. The resulting snapshot is kept in the
+Django cache for a short time and dropped whenever a booking or room is
+written (see booking.signals), so admins see their own changes at once.
+
+Open dashboards poll the counters every DASHBOARD_POLL_SECONDS from the
+cached snapshot. When the site runs under ASGI they receive the changes
+over Server-Sent Events instead; under WSGI (the default gunicorn sync
+workers) a stream would hold a worker for its whole lifetime, so it is
+only offered to ASGI requests. Every write bumps a version number in the cache; each stream only
+reads that number while idle and rebuilds the counters when it moves, so
+an idle connection costs no database queries and a change is computed
+once per snapshot however many admins are watching. Streams also re-read
+the snapshot every DASHBOARD_TTL_SECONDS to pick up writes that skip the
+signals or were made in a process that does not share the cache.
+"""
+import asyncio
+import json
+import time
+
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.core.handlers.asgi import ASGIRequest
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from .models import Booking, Room
+from .occupancy import day_bounds
+from accounts.models import User
+
+DASHBOARD_KEY = 'booking:admin-dashboard'
+
+# Upper bound on staleness for writes that skip the signals (e.g. .update())
+DASHBOARD_TTL_SECONDS = 60
+
+DASHBOARD_VERSION_KEY = 'booking:admin-dashboard:version'
+
+# Counters pushed to open dashboards
+STREAM_COUNTERS = (
+    'pending_bookings',
+    'today_bookings',
+    'new_bookings',
+    'active_bookings',
+    'total_bookings',
+    'total_rooms',
+)
+
+# How often dashboards without a stream fetch the counters
+DASHBOARD_POLL_SECONDS = 30
+
+# How often an idle stream checks the version, and sends a keep-alive comment
+STREAM_POLL_SECONDS = 1
+STREAM_KEEPALIVE_SECONDS = 15
+
+# Streams are closed after this long; EventSource reconnects on its own
+STREAM_MAX_SECONDS = 300
+STREAM_RETRY_MILLISECONDS = 3000
+
+
+def compute_dashboard_stats():
+    """Dashboard statistics straight from the database"""
+    now = timezone.now()
+    today_start, today_end = day_bounds(timezone.localdate())
+
+    bookings = Booking.objects.aggregate(
+        total_bookings=Count('id'),
+        active_bookings=Count('id', filter=Q(status='confirmed', end_time__gte=now)),
+        pending_bookings=Count('id', filter=Q(status='pending')),
+        today_bookings=Count('id', filter=Q(
+            status='confirmed', start_time__gte=today_start, start_time__lt=today_end,
+        )),
+        new_bookings=Count('id', filter=Q(created_at__gte=today_start, created_at__lt=today_end)),
+    )
+    users = User.objects.aggregate(
+        total_users=Count('id'),
+        active_users=Count('id', filter=Q(is_active=True)),
+        admin_count=Count('id', filter=Q(is_admin=True)),
+        staff_count=Count('id', filter=Q(is_staff=True, is_admin=False)),
+    )
+    users['regular_count'] = users['total_users'] - users['admin_count'] - users['staff_count']
+
+    most_booked_rooms = list(
+        Room.objects.annotate(booking_count=Count('bookings')).order_by('-booking_count', 'pk')[:5]
+    )
+    recent_bookings = list(Booking.objects.select_related('user', 'room').order_by('-created_at')[:10])
+    upcoming_bookings = list(
+        Booking.objects.select_related('user', 'room')
+        .filter(start_time__gt=now, status='confirmed')
+        .order_by('start_time')[:5]
+    )
+
+    return {
+        'total_rooms': Room.objects.count(),
+        **bookings,
+        **users,
+        'recent_bookings': recent_bookings,
+        'room_stats': most_booked_rooms,
+        'most_booked_rooms': most_booked_rooms,
+        'upcoming_bookings': upcoming_bookings,
+    }
+
+
+def get_dashboard_stats():
+    """The cached dashboard snapshot, recomputed when missing"""
+    stats = cache.get(DASHBOARD_KEY)
+    if stats is None:
+        stats = compute_dashboard_stats()
+        cache.set(DASHBOARD_KEY, stats, DASHBOARD_TTL_SECONDS)
+    return stats
+
+
+def dashboard_changed():
+    """Drop the cached snapshot after a booking or room write"""
+    cache.delete(DASHBOARD_KEY)
+    try:
+        cache.incr(DASHBOARD_VERSION_KEY)
+    except ValueError:
+        cache.add(DASHBOARD_VERSION_KEY, 1, None)
+
+
+def dashboard_counters():
+    """The streamed counters of the current snapshot"""
+    stats = get_dashboard_stats()
+    return {name: stats[name] for name in STREAM_COUNTERS}
+
+
+def streaming_supported(request):
+    """True if `request` is served by an ASGI server that can hold a stream open"""
+    return isinstance(request, ASGIRequest)
+
+
+def live_update_context(request):
+    """Template context telling the dashboard how to keep its counters current"""
+    return {
+        'dashboard_stream': streaming_supported(request),
+        'dashboard_poll_seconds': DASHBOARD_POLL_SECONDS,
+    }
+
+
+def _event(name, data):
+    return f'event: {name}\ndata: {json.dumps(data)}\n\n'
+
+
+async def dashboard_events():
+    """Server-Sent Events: a `snapshot` of the counters, then a `delta` of those that change"""
+    yield f'retry: {STREAM_RETRY_MILLISECONDS}\n\n'
+    version = await cache.aget(DASHBOARD_VERSION_KEY)
+    counters = await sync_to_async(dashboard_counters)()
+    yield _event('snapshot', counters)
+
+    started = last_read = last_sent = time.monotonic()
+    while time.monotonic() - started < STREAM_MAX_SECONDS:
+        await asyncio.sleep(STREAM_POLL_SECONDS)
+        now = time.monotonic()
+        current = await cache.aget(DASHBOARD_VERSION_KEY)
+        if current != version or now - last_read >= DASHBOARD_TTL_SECONDS:
+            version, last_read = current, now
+            latest = await sync_to_async(dashboard_counters)()
+            delta = {name: value for name, value in latest.items() if counters.get(name) != value}
+            counters = latest
+            if delta:
+                last_sent = now
+                yield _event('delta', delta)
+                continue
+        if now - last_sent >= STREAM_KEEPALIVE_SECONDS:
+            last_sent = now
+            yield ': keep-alive\n\n'
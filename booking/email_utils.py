@@ -5,14 +5,15 @@ from django.utils import timezone
 from datetime import timedelta
 import logging
 
+from .outbox import enqueue_email, enqueue_emails
+
 logger = logging.getLogger(__name__)
 
-def send_booking_confirmation_email(booking):
-    """Send booking confirmation email to user"""
-    try:
-        subject = f"Booking Confirmed - {booking.room.name}"
-        
-        message = f"""
+def _confirmation_email(booking):
+    """(subject, message) of the confirmation email for `booking`"""
+    subject = f"Booking Confirmed - {booking.room.name}"
+    
+    message = f"""
 Hello {booking.user.first_name}!
 
 Your room booking has been confirmed successfully. Here are the details:
@@ -34,29 +35,14 @@ Thank you for using our Room Booking System!
 
 This is an automated email. Please do not reply to this email.
 If you have any questions, please contact our support team.
-        """
-        
-        send_mail(
-            subject=subject,
-            message=message,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=[booking.user.email],
-            fail_silently=False,
-        )
-        
-        logger.info(f"Booking confirmation email sent to {booking.user.email}")
-        return True
-        
-    except Exception as e:
-        logger.error(f"Failed to send booking confirmation email: {str(e)}")
-        return False
+    """
+    return subject, message
 
-def send_booking_cancellation_email(booking):
-    """Send booking cancellation email to user"""
-    try:
-        subject = f"Booking Cancelled - {booking.room.name}"
-        
-        message = f"""
+def _cancellation_email(booking):
+    """(subject, message) of the cancellation email for `booking`"""
+    subject = f"Booking Cancelled - {booking.room.name}"
+    
+    message = f"""
 Hello {booking.user.first_name}!
 
 Your room booking has been cancelled. Here are the details of the cancelled booking:
@@ -75,23 +61,60 @@ Thank you for using our Room Booking System!
 
 This is an automated email. Please do not reply to this email.
 If you have any questions, please contact our support team.
-        """
+    """
+    return subject, message
+
+def send_booking_confirmation_email(booking):
+    """Queue a booking confirmation email to the user"""
+    try:
+        subject, message = _confirmation_email(booking)
         
-        send_mail(
+        enqueue_email(
             subject=subject,
             message=message,
             from_email=settings.DEFAULT_FROM_EMAIL,
             recipient_list=[booking.user.email],
-            fail_silently=False,
+            booking=booking,
+        )
+        
+        logger.info(f"Booking confirmation email queued for {booking.user.email}")
+        return True
+        
+    except Exception as e:
+        logger.error(f"Failed to queue booking confirmation email: {str(e)}")
+        return False
+
+def send_booking_cancellation_email(booking):
+    """Queue a booking cancellation email to the user"""
+    try:
+        subject, message = _cancellation_email(booking)
+        
+        enqueue_email(
+            subject=subject,
+            message=message,
+            from_email=settings.DEFAULT_FROM_EMAIL,
+            recipient_list=[booking.user.email],
+            booking=booking,
         )
         
-        logger.info(f"Booking cancellation email sent to {booking.user.email}")
+        logger.info(f"Booking cancellation email queued for {booking.user.email}")
         return True
         
     except Exception as e:
-        logger.error(f"Failed to send booking cancellation email: {str(e)}")
+        logger.error(f"Failed to queue booking cancellation email: {str(e)}")
         return False
 
+def queue_booking_status_emails(confirmed=(), cancelled=()):
+    """Queue confirmation and cancellation emails for many bookings with one insert"""
+    emails = [(booking, *_confirmation_email(booking)) for booking in confirmed]
+    emails += [(booking, *_cancellation_email(booking)) for booking in cancelled]
+    queued = enqueue_emails([
+        dict(subject=subject, message=message, recipient_list=[booking.user.email], booking=booking)
+        for booking, subject, message in emails
+    ])
+    logger.info(f"{len(queued)} booking status email(s) queued")
+    return queued
+
 def send_booking_reminder_email(booking):
     """Send booking reminder email to user"""
     try:
@@ -138,7 +161,7 @@ This is an automated email. Please do not reply to this email.
         return False
 
 def send_admin_notification_email(booking, action):
-    """Send notification email to admin about booking actions"""
+    """Queue a notification email to the admin about a booking action"""
     try:
         subject = f"New Booking {action.title()} - {booking.room.name}"
         
@@ -164,19 +187,19 @@ Please review this booking in the admin dashboard if necessary.
 Room Booking System - Admin Notification
         """
         
-        send_mail(
+        enqueue_email(
             subject=subject,
             message=message,
             from_email=settings.DEFAULT_FROM_EMAIL,
             recipient_list=[settings.ADMIN_EMAIL],
-            fail_silently=False,
+            booking=booking,
         )
         
-        logger.info(f"Admin notification email sent for booking {action}")
+        logger.info(f"Admin notification email queued for booking {action}")
         return True
         
     except Exception as e:
-        logger.error(f"Failed to send admin notification email: {str(e)}")
+        logger.error(f"Failed to queue admin notification email: {str(e)}")
         return False
 
 def send_booking_reminder_batch():
@@ -0,0 +1,95 @@
+# booking/etags.py
+"""
+Version numbers and ETags for the availability JSON endpoints.
+
+Three kinds of counters are kept in the Django cache:
+
+* one per (room, local date), bumped whenever the bookings of that room on
+  that day are refreshed (see booking.occupancy.refresh_occupancy), together
+  with one per date and one for all bookings;
+* one for the room catalog, bumped on every room write;
+* a generation number, bumped when derived data is rebuilt wholesale.
+
+An endpoint's ETag is a hash of the request's query string and the counters
+its response depends on, so it can be compared with If-None-Match and a 304
+returned before any booking is read. Missing counters start from the current
+time in nanoseconds, so a cache that was flushed or restarted never hands
+out a number that has been used before.
+
+Counters are bumped in the cache of the process that handled the write, so
+other processes only see the bump through a cache they share (see CACHES
+in the settings). Every counter also expires VERSION_TTL_SECONDS after it
+was created and restarts from a new number; with a per-process cache such
+as the default LocMemCache that bounds how long another worker can keep
+answering 304 for a response that has changed.
+"""
+import hashlib
+import time
+
+from django.core.cache import cache
+
+ROOM_DAY_VERSION_KEY = 'booking:room-day-version:{}:{}'
+DAY_VERSION_KEY = 'booking:day-version:{}'
+BOOKINGS_VERSION_KEY = 'booking:bookings-version'
+CATALOG_VERSION_KEY = 'booking:room-catalog-version'
+GENERATION_KEY = 'booking:availability-generation'
+
+# Lifetime of a counter; the longest a client can be told 304 after a change
+# made in a process that does not share this cache
+VERSION_TTL_SECONDS = 60
+
+
+def _fresh():
+    return time.time_ns()
+
+
+def _bump(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, _fresh(), VERSION_TTL_SECONDS)
+
+
+def get_versions(keys):
+    """Current values of the counters in `keys`, in the same order"""
+    keys = list(keys)
+    values = cache.get_many(keys)
+    missing = [key for key in keys if key not in values]
+    if missing:
+        for key in missing:
+            cache.add(key, _fresh(), VERSION_TTL_SECONDS)
+        values.update(cache.get_many(missing))
+    return [values.get(key) for key in keys]
+
+
+def room_day_key(room_id, day):
+    return ROOM_DAY_VERSION_KEY.format(room_id, day.isoformat())
+
+
+def day_key(day):
+    return DAY_VERSION_KEY.format(day.isoformat())
+
+
+def bookings_changed(room_id, dates):
+    """Record that the bookings of a room changed on the given local dates"""
+    for day in dates:
+        _bump(room_day_key(room_id, day))
+        _bump(day_key(day))
+    _bump(BOOKINGS_VERSION_KEY)
+
+
+def catalog_changed():
+    """Record that a room was created, edited or deleted"""
+    _bump(CATALOG_VERSION_KEY)
+
+
+def everything_changed():
+    """Invalidate every ETag, e.g. after derived tables were rebuilt"""
+    _bump(GENERATION_KEY)
+
+
+def make_etag(request, keys, *extra):
+    """Strong ETag value (unquoted) for `request` given the counters in `keys`"""
+    versions = get_versions([GENERATION_KEY, CATALOG_VERSION_KEY, *keys])
+    parts = [request.path, request.META.get('QUERY_STRING', ''), *versions, *extra]
+    return hashlib.sha1('|'.join(str(part) for part in parts).encode()).hexdigest()
@@ -0,0 +1,104 @@
+# booking/export.py
+"""
+Streaming booking export.
+
+Bookings are read joined with their user and room as plain tuples with
+values_list(), EXPORT_CHUNK_SIZE rows per query. Each query seeks past the
+(start_time, id) of the last row of the one before instead of keeping one
+cursor open, because PyMySQL's default cursor (like most drivers') buffers
+a whole result set client side, iterator() or not. So only one chunk of
+rows is in memory at a time and no model instances are built. Every row
+is encoded and handed to the StreamingHttpResponse as soon as it is read:
+the first bytes reach the client after the first chunk, and memory use
+does not grow with the number of bookings exported.
+"""
+import csv
+import json
+
+from django.db.models import Q
+from django.utils import timezone
+
+EXPORT_CHUNK_SIZE = 2000
+
+EXPORT_COLUMNS = [
+    'id',
+    'room_number',
+    'room_name',
+    'user_email',
+    'user_name',
+    'faculty',
+    'start_time',
+    'end_time',
+    'status',
+    'attendees',
+    'purpose',
+    'created_at',
+]
+
+EXPORT_FIELDS = [
+    'id', 'room__room_number', 'room__name', 'user__email', 'user__first_name', 'user__last_name',
+    'user__faculty', 'start_time', 'end_time', 'status', 'attendees', 'purpose', 'created_at',
+]
+
+
+def _chunks(bookings):
+    """Lists of EXPORT_FIELDS tuples in (start_time, id) order, one query each"""
+    bookings = bookings.order_by('start_time', 'id').values_list(*EXPORT_FIELDS)
+    chunk = list(bookings[:EXPORT_CHUNK_SIZE])
+    while chunk:
+        yield chunk
+        if len(chunk) < EXPORT_CHUNK_SIZE:
+            return
+        last = chunk[-1]
+        last_id, last_start = last[0], last[EXPORT_FIELDS.index('start_time')]
+        chunk = list(bookings.filter(
+            Q(start_time__gt=last_start) | Q(start_time=last_start, id__gt=last_id),
+        )[:EXPORT_CHUNK_SIZE])
+
+
+def _rows(bookings):
+    tz = timezone.get_current_timezone()
+    for (booking_id, room_number, room_name, email, first_name, last_name, faculty,
+         start_time, end_time, status, attendees, purpose, created_at) in (
+            row for chunk in _chunks(bookings) for row in chunk):
+        yield [
+            booking_id,
+            room_number,
+            room_name,
+            email,
+            f'{first_name} {last_name}'.strip(),
+            faculty,
+            start_time.astimezone(tz).isoformat(),
+            end_time.astimezone(tz).isoformat(),
+            status,
+            attendees,
+            purpose,
+            created_at.astimezone(tz).isoformat(),
+        ]
+
+
+class _Echo:
+    """File-like object whose write() returns the value instead of storing it"""
+
+    def write(self, value):
+        return value
+
+
+def stream_csv(bookings):
+    """CSV lines, header first"""
+    writer = csv.writer(_Echo())
+    yield writer.writerow(EXPORT_COLUMNS)
+    for row in _rows(bookings):
+        yield writer.writerow(row)
+
+
+def stream_ndjson(bookings):
+    """One JSON object per line"""
+    for row in _rows(bookings):
+        yield json.dumps(dict(zip(EXPORT_COLUMNS, row)), ensure_ascii=False) + '\n'
+
+
+FORMATS = {
+    'csv': (stream_csv, 'text/csv', 'csv'),
+    'ndjson': (stream_ndjson, 'application/x-ndjson', 'ndjson'),
+}
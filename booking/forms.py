@@ -4,11 +4,26 @@ from django.contrib.auth.models import User
 from django.utils import timezone
 from datetime import datetime, time, timedelta
 from .models import Room, Booking, BookingRule
-from .models import Room, Booking, BookingRule, Announcement
+from .models import Room, Booking, BookingRule, Announcement, BookingSeries
+from .validation import BookingValidation
+from django.core.exceptions import ValidationError
 from django.contrib.auth import get_user_model
 User = get_user_model()
 
 
+def run_booking_validation(room, start_datetime, end_datetime, user=None, exclude_pk=None):
+    """Run the shared booking validation pipeline, reporting failures as form errors"""
+    validation = BookingValidation(room.pk if room else None, start_datetime, end_datetime,
+                                   user_id=user.pk if user else None, exclude_pk=exclude_pk,
+                                   room_type=room.room_type if room else None,
+                                   faculty=getattr(user, 'faculty', None))
+    try:
+        validation.run()
+    except ValidationError as e:
+        raise forms.ValidationError(e.messages)
+    return validation
+
+
 class RoomForm(forms.ModelForm):
     """Form for creating and editing rooms"""
     
@@ -184,7 +199,9 @@ class BookingForm(forms.ModelForm):
     
     class Meta:
         model = Booking
-        fields = ['room', 'purpose', 'attendees', 'start_date', 'start_time', 'end_time']
+        # start_date/start_time/end_time are form-only; clean() combines them
+        # into the model's datetimes
+        fields = ['room', 'purpose', 'attendees']
         widgets = {
             'room': forms.Select(attrs={
                 'class': 'form-control'
@@ -202,6 +219,7 @@ class BookingForm(forms.ModelForm):
 
     def __init__(self, *args, **kwargs):
         self.user = kwargs.pop('user', None)
+        self.validation = None
         super().__init__(*args, **kwargs)
         
         # Only show available rooms
@@ -234,42 +252,31 @@ class BookingForm(forms.ModelForm):
         if not all([start_date, start_time, end_time]):
             return cleaned_data
         
-        # Validate time range
-        if start_time >= end_time:
-            raise forms.ValidationError('Start time must be before end time.')
-        
         # Create datetime objects
         start_datetime = timezone.make_aware(datetime.combine(start_date, start_time))
         end_datetime = timezone.make_aware(datetime.combine(start_date, end_time))
         
-        # Check if booking is in the past
-        if start_datetime <= timezone.now():
-            raise forms.ValidationError('Booking cannot be in the past.')
+        # Times, duration rule and conflicts (excluding this booking if editing)
+        user = self.user or (self.instance.user if self.instance.user_id else None)
+        self.validation = run_booking_validation(room, start_datetime, end_datetime,
+                                                 user=user, exclude_pk=self.instance.pk)
         
         # Check if booking is too far in the future (e.g., 6 months)
         if start_datetime > timezone.now() + timedelta(days=180):
             raise forms.ValidationError('Booking cannot be more than 6 months in advance.')
         
-        # Check for conflicts (exclude current booking if editing)
-        if room:
-            conflicts = Booking.objects.filter(
-                room=room,
-                start_time__lt=end_datetime,
-                end_time__gt=start_datetime,
-                status__in=['pending', 'confirmed']
-            )
-            
-            # Exclude current booking if editing
-            if self.instance.pk:
-                conflicts = conflicts.exclude(pk=self.instance.pk)
-            
-            if conflicts.exists():
-                raise forms.ValidationError('This time slot conflicts with an existing booking.')
-        
         # Store combined datetime for use in views
         cleaned_data['start_datetime'] = start_datetime
         cleaned_data['end_datetime'] = end_datetime
         
+        # The instance carries the checked values, so Booking.clean() and
+        # save() do not validate them again
+        self.instance.start_time = start_datetime
+        self.instance.end_time = end_datetime
+        if self.user:
+            self.instance.user = self.user
+        self.validation.stamp(self.instance)
+        
         return cleaned_data
 
 
@@ -380,6 +387,8 @@ class QuickBookingForm(forms.Form):
     )
 
     def __init__(self, *args, **kwargs):
+        self.user = kwargs.pop('user', None)
+        self.validation = None
         super().__init__(*args, **kwargs)
         # Set default values
         self.fields['date'].initial = timezone.now().date()
@@ -401,27 +410,14 @@ class QuickBookingForm(forms.Form):
         start_datetime = timezone.make_aware(datetime.combine(date, start_time))
         end_datetime = start_datetime + timedelta(minutes=int(duration))
         
-        # Validate booking time
-        if start_datetime <= timezone.now():
-            raise forms.ValidationError('Booking cannot be in the past.')
-        
         # Check room capacity
         if room and attendees and attendees > room.capacity:
             raise forms.ValidationError(
                 f'Number of attendees ({attendees}) exceeds room capacity ({room.capacity}).'
             )
         
-        # Check for conflicts
-        if room:
-            conflicts = Booking.objects.filter(
-                room=room,
-                start_time__lt=end_datetime,
-                end_time__gt=start_datetime,
-                status__in=['pending', 'confirmed']
-            )
-            
-            if conflicts.exists():
-                raise forms.ValidationError('This time slot conflicts with an existing booking.')
+        # Times, duration rule and conflicts; views stamp the Booking they build
+        self.validation = run_booking_validation(room, start_datetime, end_datetime, user=self.user)
         
         # Store calculated values
         cleaned_data['start_datetime'] = start_datetime
@@ -430,6 +426,80 @@ class QuickBookingForm(forms.Form):
         return cleaned_data
 
 
+class RecurringBookingForm(forms.ModelForm):
+    """Form for booking the same room and time every week or two"""
+    
+    exception_dates = forms.CharField(
+        required=False,
+        widget=forms.TextInput(attrs={
+            'class': 'form-control',
+            'placeholder': 'Dates to skip, e.g. 2025-03-10, 2025-04-14'
+        })
+    )
+    
+    skip_conflicts = forms.BooleanField(
+        required=False,
+        label='Book the remaining dates if some are taken'
+    )
+    
+    class Meta:
+        model = BookingSeries
+        fields = ['room', 'frequency', 'start_date', 'end_date', 'start_time', 'end_time',
+                  'exception_dates', 'purpose', 'attendees']
+        widgets = {
+            'room': forms.Select(attrs={'class': 'form-control'}),
+            'frequency': forms.Select(attrs={'class': 'form-control'}),
+            'start_date': forms.DateInput(attrs={'class': 'form-control', 'type': 'date'}),
+            'end_date': forms.DateInput(attrs={'class': 'form-control', 'type': 'date'}),
+            'start_time': forms.TimeInput(attrs={'class': 'form-control', 'type': 'time'}),
+            'end_time': forms.TimeInput(attrs={'class': 'form-control', 'type': 'time'}),
+            'purpose': forms.TextInput(attrs={'class': 'form-control', 'placeholder': 'Meeting purpose'}),
+            'attendees': forms.NumberInput(attrs={'class': 'form-control', 'min': '1'}),
+        }
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields['room'].queryset = Room.objects.filter(is_available=True)
+    
+    def clean_exception_dates(self):
+        value = self.cleaned_data.get('exception_dates') or ''
+        dates = []
+        for part in value.replace(';', ',').split(','):
+            part = part.strip()
+            if not part:
+                continue
+            try:
+                dates.append(datetime.strptime(part, '%Y-%m-%d').date().isoformat())
+            except ValueError:
+                raise forms.ValidationError(f'"{part}" is not a valid date (use YYYY-MM-DD).')
+        return dates
+    
+    def clean(self):
+        cleaned_data = super().clean()
+        start_date = cleaned_data.get('start_date')
+        end_date = cleaned_data.get('end_date')
+        start_time = cleaned_data.get('start_time')
+        end_time = cleaned_data.get('end_time')
+        room = cleaned_data.get('room')
+        attendees = cleaned_data.get('attendees')
+        
+        if start_date and end_date:
+            if end_date < start_date:
+                raise forms.ValidationError('End date must be on or after the start date.')
+            if (end_date - start_date).days > 366:
+                raise forms.ValidationError('A series cannot span more than a year.')
+        
+        if start_time and end_time and start_time >= end_time:
+            raise forms.ValidationError('End time must be after start time.')
+        
+        if room and attendees and attendees > room.capacity:
+            raise forms.ValidationError(
+                f'Number of attendees ({attendees}) exceeds room capacity ({room.capacity}).'
+            )
+        
+        return cleaned_data
+
+
 class BookingRuleForm(forms.ModelForm):
     """Form for creating and editing booking rules"""
     
@@ -446,6 +516,9 @@ class BookingRuleForm(forms.ModelForm):
             'min_modify_hours',
             'booking_start_time',
             'booking_end_time',
+            'room',
+            'room_type',
+            'faculty',
             'is_active',
         ]
 #         widgets = {
@@ -577,6 +650,7 @@ class AdminBookingForm(forms.ModelForm):
         }
     
     def __init__(self, *args, **kwargs):
+        self.validation = None
         super().__init__(*args, **kwargs)
         # Only show active users
         self.fields['user'].queryset = User.objects.filter(is_active=True).order_by('first_name')
@@ -590,22 +664,13 @@ class AdminBookingForm(forms.ModelForm):
         room = cleaned_data.get('room')
         
         if start_time and end_time:
-            if start_time >= end_time:
-                raise forms.ValidationError("End time must be after start time.")
-            
-            # Check for conflicts (exclude current booking if editing)
-            conflicts = Booking.objects.filter(
-                room=room,
-                status__in=['pending', 'confirmed'],
-                start_time__lt=end_time,
-                end_time__gt=start_time
-            )
-            
-            if self.instance.pk:
-                conflicts = conflicts.exclude(pk=self.instance.pk)
-            
-            if conflicts.exists():
-                raise forms.ValidationError("This time slot conflicts with an existing booking.")
+            # Times, duration rule and conflicts (exclude current booking if editing)
+            user = cleaned_data.get('user')
+            self.validation = run_booking_validation(room, start_time, end_time, user=user,
+                                                     exclude_pk=self.instance.pk)
+            # _post_clean() copies the same values onto the instance, so the
+            # Booking.clean() it triggers is skipped
+            self.validation.stamp(self.instance)
         
         return cleaned_data
 
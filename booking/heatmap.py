@@ -0,0 +1,138 @@
+# booking/heatmap.py
+"""
+Rooms x time-slots occupancy heatmap.
+
+The active bookings of every room in the range are gathered once, either
+from the in-process availability indexes or, for ranges the indexes do not
+cover, from a single ranged query. They are then rasterized into a boolean
+NumPy matrix with one row per room and one column per 15-minute slot.
+Rasterizing uses a difference array, so the cost is one scatter-add per
+interval plus a cumulative sum, not a loop over slots.
+"""
+import base64
+from bisect import bisect_left
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+
+import numpy as np
+from django.utils import timezone
+
+from .availability import ACTIVE_STATUSES, INDEX_LOOKBACK, get_room_indexes
+from .models import Booking
+from .occupancy import SLOT_MINUTES, SLOTS_PER_DAY
+
+SLOT_SECONDS = SLOT_MINUTES * 60
+
+
+def _intervals_from_indexes(room_ids, range_start, range_end):
+    indexes = get_room_indexes(room_ids)
+    rows, starts, ends = [], [], []
+    for row, room_id in enumerate(room_ids):
+        index = indexes[room_id]
+        # Bookings starting before the end of the range; ends are filtered later
+        count = bisect_left(index.start_stamps, range_end)
+        rows.extend([row] * count)
+        starts.extend(index.start_stamps[:count])
+        ends.extend(index.end_stamps[:count])
+    return rows, starts, ends
+
+
+def _intervals_from_database(room_ids, range_start, range_end):
+    position = {room_id: row for row, room_id in enumerate(room_ids)}
+    rows, starts, ends = [], [], []
+    for room_id, start_time, end_time in Booking.objects.filter(
+        room_id__in=room_ids,
+        status__in=ACTIVE_STATUSES,
+        start_time__lt=datetime.fromtimestamp(range_end, tz=dt_timezone.utc),
+        end_time__gt=datetime.fromtimestamp(range_start, tz=dt_timezone.utc),
+    ).order_by().values_list('room_id', 'start_time', 'end_time'):
+        rows.append(position[room_id])
+        starts.append(start_time.timestamp())
+        ends.append(end_time.timestamp())
+    return rows, starts, ends
+
+
+def occupancy_matrix(room_ids, first_day, days=7):
+    """Boolean array of shape (len(room_ids), days * SLOTS_PER_DAY)
+
+    Column 0 is 00:00 local time on `first_day`; a cell is True when an
+    active booking overlaps that slot.
+    """
+    room_ids = list(room_ids)
+    n_slots = days * SLOTS_PER_DAY
+    origin = timezone.make_aware(datetime.combine(first_day, time.min))
+    range_start = origin.timestamp()
+    range_end = range_start + n_slots * SLOT_SECONDS
+
+    if origin >= timezone.now() - INDEX_LOOKBACK:
+        rows, starts, ends = _intervals_from_indexes(room_ids, range_start, range_end)
+    else:
+        rows, starts, ends = _intervals_from_database(room_ids, range_start, range_end)
+
+    matrix = np.zeros((len(room_ids), n_slots), dtype=bool)
+    if not rows:
+        return matrix
+
+    rows = np.asarray(rows, dtype=np.intp)
+    first = np.floor((np.asarray(starts) - range_start) / SLOT_SECONDS)
+    last = np.ceil((np.asarray(ends) - range_start) / SLOT_SECONDS)
+    first = np.clip(first, 0, n_slots).astype(np.intp)
+    last = np.clip(last, 0, n_slots).astype(np.intp)
+    keep = last > first
+    rows, first, last = rows[keep], first[keep], last[keep]
+
+    # +1 where a booking starts covering slots, -1 where it stops
+    diff = np.zeros((len(room_ids), n_slots + 1), dtype=np.int32)
+    np.add.at(diff, (rows, first), 1)
+    np.add.at(diff, (rows, last), -1)
+    np.greater(np.cumsum(diff[:, :-1], axis=1), 0, out=matrix)
+    return matrix
+
+
+def encode_bits(matrix):
+    """Base64 of each row packed 8 slots per byte, first slot in the high bit"""
+    packed = np.packbits(matrix, axis=1)
+    return [base64.b64encode(row.tobytes()).decode('ascii') for row in packed]
+
+
+def encode_runs(matrix):
+    """Each row as a list of [first_slot, length] runs of booked slots"""
+    padded = np.zeros((matrix.shape[0], matrix.shape[1] + 2), dtype=np.int8)
+    padded[:, 1:-1] = matrix
+    edges = np.diff(padded, axis=1)
+    start_rows, start_cols = np.nonzero(edges == 1)
+    _, end_cols = np.nonzero(edges == -1)
+    lengths = end_cols - start_cols
+    runs = [[] for _ in range(matrix.shape[0])]
+    for row, col, length in zip(start_rows.tolist(), start_cols.tolist(), lengths.tolist()):
+        runs[row].append([col, length])
+    return runs
+
+
+ENCODERS = {
+    'bits': encode_bits,
+    'rle': encode_runs,
+}
+
+
+def build_heatmap(rooms, first_day, days=7, encoding='bits'):
+    """JSON-ready heatmap for the given rooms starting at `first_day`"""
+    rooms = list(rooms)
+    matrix = occupancy_matrix([room.id for room in rooms], first_day, days)
+    encoded = ENCODERS[encoding](matrix)
+    return {
+        'start_date': first_day.strftime('%Y-%m-%d'),
+        'end_date': (first_day + timedelta(days=days - 1)).strftime('%Y-%m-%d'),
+        'days': days,
+        'slot_minutes': SLOT_MINUTES,
+        'slots_per_day': SLOTS_PER_DAY,
+        'encoding': encoding,
+        'rooms': [{
+            'id': room.id,
+            'name': room.name,
+            'room_number': room.room_number,
+            'capacity': room.capacity,
+            'occupancy': row,
+        } for room, row in zip(rooms, encoded)],
+        # Number of booked rooms in every slot, for colouring the summary row
+        'booked_rooms': matrix.sum(axis=0).tolist(),
+    }
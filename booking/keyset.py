@@ -0,0 +1,111 @@
+# booking/keyset.py
+"""
+Keyset (seek) pagination.
+
+Instead of OFFSET, a page is fetched with a WHERE clause on the ordering
+columns of the last row the client saw ("rows after (start_time, id)"),
+so every page costs one index range scan of `per_page + 1` rows no matter
+how deep into the table it is. The ordering must end in a unique column,
+usually the primary key, so that no two rows share a position.
+
+Cursors are opaque, URL-safe tokens holding the ordering values of a row.
+"""
+import base64
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def _fields(ordering):
+    return [(name.lstrip('-'), name.startswith('-')) for name in ordering]
+
+
+def _value(obj, name):
+    for part in name.split('__'):
+        obj = getattr(obj, part)
+    return obj
+
+
+def encode_cursor(obj, ordering):
+    """Cursor pointing at `obj` for the given ordering"""
+    values = []
+    for name, _ in _fields(ordering):
+        value = _value(obj, name)
+        values.append(value.isoformat() if hasattr(value, 'isoformat') else value)
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode('ascii').rstrip('=')
+
+
+def decode_cursor(token, model, ordering):
+    """Ordering values stored in `token`, converted to the fields' types"""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)))
+        fields = _fields(ordering)
+        if not isinstance(values, list) or len(values) != len(fields):
+            raise InvalidCursor('Malformed cursor')
+        converted = []
+        for (name, _), value in zip(fields, values):
+            field = model._meta.get_field(name) if '__' not in name else None
+            converted.append(field.to_python(value) if field is not None else value)
+        return converted
+    except (ValueError, TypeError, ValidationError) as e:
+        raise InvalidCursor(str(e))
+
+
+def _seek(ordering, values, backwards=False):
+    """Q for the rows strictly after (or before) `values` in `ordering`"""
+    condition = Q()
+    equal = Q()
+    for (name, descending), value in zip(_fields(ordering), values):
+        lookup = 'lt' if descending != backwards else 'gt'
+        condition |= equal & Q(**{f'{name}__{lookup}': value})
+        equal &= Q(**{name: value})
+    return condition
+
+
+def _reverse(ordering):
+    return [name[1:] if name.startswith('-') else f'-{name}' for name in ordering]
+
+
+class KeysetPage:
+    """One page of a keyset-paginated queryset"""
+
+    def __init__(self, items, ordering, has_next, has_previous):
+        self.object_list = items
+        self.has_next = has_next
+        self.has_previous = has_previous
+        self.next_cursor = encode_cursor(items[-1], ordering) if items and has_next else None
+        self.previous_cursor = encode_cursor(items[0], ordering) if items and has_previous else None
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_other_pages(self):
+        return self.has_next or self.has_previous
+
+
+def paginate_keyset(queryset, ordering, per_page, after=None, before=None):
+    """Page of `queryset` in `ordering` following the `after` cursor or preceding `before`
+
+    Raises InvalidCursor for tokens that cannot be decoded.
+    """
+    model = queryset.model
+    if before:
+        values = decode_cursor(before, model, ordering)
+        rows = list(queryset.filter(_seek(ordering, values, backwards=True))
+                    .order_by(*_reverse(ordering))[:per_page + 1])
+        has_previous = len(rows) > per_page
+        items = rows[:per_page][::-1]
+        return KeysetPage(items, ordering, has_next=True, has_previous=has_previous)
+
+    if after:
+        queryset = queryset.filter(_seek(ordering, decode_cursor(after, model, ordering)))
+    rows = list(queryset.order_by(*ordering)[:per_page + 1])
+    return KeysetPage(rows[:per_page], ordering, has_next=len(rows) > per_page, has_previous=bool(after))
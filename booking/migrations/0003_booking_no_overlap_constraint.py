@@ -0,0 +1,52 @@
+from django.db import migrations
+
+CONSTRAINT_NAME = 'bookings_no_overlap'
+
+
+def add_no_overlap_constraint(apps, schema_editor):
+    """Reject overlapping active bookings in the database (PostgreSQL only)"""
+    if schema_editor.connection.vendor != 'postgresql':
+        # MySQL/SQLite keep relying on the locked check in booking.services
+        return
+
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("""
+            SELECT COUNT(*) FROM bookings a
+            JOIN bookings b ON a.room_id = b.room_id AND a.id < b.id
+            WHERE a.status IN ('pending', 'confirmed')
+              AND b.status IN ('pending', 'confirmed')
+              AND a.start_time < b.end_time AND b.start_time < a.end_time
+        """)
+        overlapping = cursor.fetchone()[0]
+    if overlapping:
+        raise RuntimeError(
+            f'Cannot add {CONSTRAINT_NAME}: {overlapping} pairs of active bookings overlap. '
+            'Cancel or move them before migrating.'
+        )
+
+    # btree_gist lets the GiST index cover the plain room_id equality
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS btree_gist')
+    schema_editor.execute(f"""
+        ALTER TABLE bookings ADD CONSTRAINT {CONSTRAINT_NAME}
+        EXCLUDE USING gist (
+            room_id WITH =,
+            tstzrange(start_time, end_time, '[)') WITH &&
+        ) WHERE (status IN ('pending', 'confirmed'))
+    """)
+
+
+def remove_no_overlap_constraint(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(f'ALTER TABLE bookings DROP CONSTRAINT IF EXISTS {CONSTRAINT_NAME}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('booking', '0002_remove_room_is_active'),
+    ]
+
+    operations = [
+        migrations.RunPython(add_no_overlap_constraint, remove_no_overlap_constraint),
+    ]
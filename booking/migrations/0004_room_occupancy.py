@@ -0,0 +1,62 @@
+# Generated by Django 4.2.7 on 2026-10-17 18:07
+
+from datetime import datetime, time, timedelta
+
+from django.db import migrations, models
+from django.utils import timezone
+import django.db.models.deletion
+
+
+def build_occupancy(apps, schema_editor):
+    """Fill the bitmaps for bookings that already exist (same as rebuild_occupancy)"""
+    Booking = apps.get_model('booking', 'Booking')
+    RoomOccupancy = apps.get_model('booking', 'RoomOccupancy')
+    slot = timedelta(minutes=15)
+    bitmaps = {}
+    rows = Booking.objects.filter(status__in=['pending', 'confirmed']).values_list(
+        'room_id', 'start_time', 'end_time')
+    for room_id, start_time, end_time in rows.iterator():
+        day = timezone.localtime(start_time).date()
+        while True:
+            day_start = timezone.make_aware(datetime.combine(day, time.min))
+            day_end = timezone.make_aware(datetime.combine(day + timedelta(days=1), time.min))
+            if day_start >= end_time:
+                break
+            start, end = max(start_time, day_start), min(end_time, day_end)
+            first = (start - day_start) // slot
+            last = min(-((day_start - end) // slot), 96)
+            bitmaps[room_id, day] = bitmaps.get((room_id, day), 0) | (((1 << (last - first)) - 1) << first)
+            day += timedelta(days=1)
+    RoomOccupancy.objects.bulk_create([
+        RoomOccupancy(room_id=room_id, date=day, am_slots=bits & (2 ** 48 - 1), pm_slots=bits >> 48)
+        for (room_id, day), bits in bitmaps.items() if bits
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('booking', '0003_booking_no_overlap_constraint'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RoomOccupancy',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('am_slots', models.BigIntegerField(default=0, help_text='Slots 00:00-11:45 (bits 0-47)')),
+                ('pm_slots', models.BigIntegerField(default=0, help_text='Slots 12:00-23:45 (bits 0-47)')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('room', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='occupancy', to='booking.room')),
+            ],
+            options={
+                'verbose_name': 'Room Occupancy',
+                'verbose_name_plural': 'Room Occupancy',
+                'db_table': 'room_occupancy',
+                'indexes': [models.Index(fields=['date', 'room'], name='room_occupa_date_6751e4_idx')],
+                'unique_together': {('room', 'date')},
+            },
+        ),
+        migrations.RunPython(build_occupancy, migrations.RunPython.noop),
+    ]
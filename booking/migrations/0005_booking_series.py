@@ -0,0 +1,44 @@
+# Generated by Django 4.2.7 on 2026-10-17 18:10
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('booking', '0004_room_occupancy'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BookingSeries',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('frequency', models.CharField(choices=[('weekly', 'Weekly'), ('biweekly', 'Every two weeks')], default='weekly', max_length=10)),
+                ('start_date', models.DateField(help_text='Date of the first occurrence')),
+                ('end_date', models.DateField(help_text='Last date an occurrence may fall on')),
+                ('start_time', models.TimeField()),
+                ('end_time', models.TimeField()),
+                ('exception_dates', models.JSONField(blank=True, default=list, help_text='Dates (YYYY-MM-DD) to skip')),
+                ('purpose', models.CharField(max_length=200)),
+                ('attendees', models.IntegerField(default=1)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('room', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='booking_series', to='booking.room')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='booking_series', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Booking Series',
+                'verbose_name_plural': 'Booking Series',
+                'db_table': 'booking_series',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.AddField(
+            model_name='booking',
+            name='series',
+            field=models.ForeignKey(blank=True, help_text='Recurring series this booking belongs to', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='bookings', to='booking.bookingseries'),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 4.2.7 on 2026-10-17 18:12
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('booking', '0005_booking_series'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BookingHold',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('start_time', models.DateTimeField()),
+                ('end_time', models.DateTimeField()),
+                ('expires_at', models.DateTimeField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('room', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='holds', to='booking.room')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='booking_holds', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Booking Hold',
+                'verbose_name_plural': 'Booking Holds',
+                'db_table': 'booking_holds',
+                'ordering': ['expires_at'],
+                'indexes': [models.Index(fields=['room', 'expires_at'], name='booking_hol_room_id_bbd59a_idx'), models.Index(fields=['user'], name='booking_hol_user_id_fa6f49_idx')],
+            },
+        ),
+    ]
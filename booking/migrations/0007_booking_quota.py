@@ -0,0 +1,54 @@
+# Generated by Django 4.2.7 on 2026-10-17 18:17
+
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import migrations, models
+from django.utils import timezone
+import django.db.models.deletion
+
+
+def backfill_quotas(apps, schema_editor):
+    """Count the existing active bookings per user, local day and ISO week (same as rebuild_quotas)"""
+    Booking = apps.get_model('booking', 'Booking')
+    BookingQuota = apps.get_model('booking', 'BookingQuota')
+    counts = Counter()
+    for user_id, start_time in Booking.objects.filter(
+        status__in=['pending', 'confirmed']
+    ).values_list('user_id', 'start_time').iterator():
+        day = timezone.localtime(start_time).date()
+        counts[(user_id, 'day', day)] += 1
+        counts[(user_id, 'week', day - timedelta(days=day.weekday()))] += 1
+    BookingQuota.objects.bulk_create([
+        BookingQuota(user_id=user_id, period=period, period_start=period_start, count=count)
+        for (user_id, period, period_start), count in counts.items()
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('booking', '0006_booking_hold'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BookingQuota',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period', models.CharField(choices=[('day', 'Day'), ('week', 'Week')], max_length=4)),
+                ('period_start', models.DateField(help_text='The day, or the Monday of the ISO week')),
+                ('count', models.IntegerField(default=0)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='booking_quotas', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Booking Quota',
+                'verbose_name_plural': 'Booking Quotas',
+                'db_table': 'booking_quotas',
+                'unique_together': {('user', 'period', 'period_start')},
+            },
+        ),
+        migrations.RunPython(backfill_quotas, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.7 on 2026-10-17 18:20
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('booking', '0007_booking_quota'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='bookingrule',
+            name='faculty',
+            field=models.CharField(blank=True, choices=[('science', 'Faculty of Science'), ('engineering', 'Faculty of Engineering'), ('social', 'Faculty of Social Sciences'), ('business', 'Faculty of Business'), ('education', 'Faculty of Education'), ('arts', 'Faculty of Arts'), ('law', 'Faculty of Law'), ('medicine', 'Faculty of Medicine'), ('agriculture', 'Faculty of Agriculture')], help_text='Only apply to users of this faculty', max_length=50),
+        ),
+        migrations.AddField(
+            model_name='bookingrule',
+            name='room',
+            field=models.ForeignKey(blank=True, help_text='Only apply to this room', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='booking_rules', to='booking.room'),
+        ),
+        migrations.AddField(
+            model_name='bookingrule',
+            name='room_type',
+            field=models.CharField(blank=True, choices=[('classroom', 'Classroom'), ('lab', 'Laboratory'), ('conference', 'Conference Room'), ('auditorium', 'Auditorium'), ('library', 'Library Room'), ('study', 'Study Room'), ('other', 'Other')], help_text='Only apply to rooms of this type', max_length=20),
+        ),
+    ]
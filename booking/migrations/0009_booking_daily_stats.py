@@ -0,0 +1,56 @@
+# Generated by Django 4.2.7 on 2026-10-17 18:31
+
+from collections import Counter
+
+from django.db import migrations, models
+from django.utils import timezone
+import django.db.models.deletion
+
+
+def backfill_stats(apps, schema_editor):
+    """Count the existing bookings per local creation date, room and status (same as rebuild_stats)"""
+    Booking = apps.get_model('booking', 'Booking')
+    BookingDailyStats = apps.get_model('booking', 'BookingDailyStats')
+    counts = Counter()
+    minutes = Counter()
+    for created_at, room_id, status, start_time, end_time in Booking.objects.values_list(
+        'created_at', 'room_id', 'status', 'start_time', 'end_time'
+    ).iterator():
+        if not (created_at and room_id and status and start_time and end_time):
+            continue
+        key = (timezone.localtime(created_at).date(), room_id, status)
+        counts[key] += 1
+        minutes[key] += int((end_time - start_time).total_seconds() // 60)
+    BookingDailyStats.objects.bulk_create([
+        BookingDailyStats(date=day, room_id=room_id, status=status, count=count,
+                          booked_minutes=minutes[(day, room_id, status)])
+        for (day, room_id, status), count in counts.items()
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('booking', '0008_booking_rule_scope'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BookingDailyStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(help_text='Local date the bookings were made')),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('confirmed', 'Confirmed'), ('cancelled', 'Cancelled'), ('completed', 'Completed'), ('no_show', 'No Show')], max_length=20)),
+                ('count', models.IntegerField(default=0)),
+                ('booked_minutes', models.IntegerField(default=0, help_text='Total length of the bookings')),
+                ('room', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_stats', to='booking.room')),
+            ],
+            options={
+                'verbose_name': 'Booking Daily Stats',
+                'verbose_name_plural': 'Booking Daily Stats',
+                'db_table': 'booking_daily_stats',
+                'unique_together': {('date', 'room', 'status')},
+            },
+        ),
+        migrations.RunPython(backfill_stats, migrations.RunPython.noop),
+    ]
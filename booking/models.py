@@ -1,10 +1,13 @@
-from django.db import models
+from django.db import models, connections, router, transaction, IntegrityError
 from django.conf import settings
 from django.core.validators import MinValueValidator, MaxValueValidator, RegexValidator
 from django.core.exceptions import ValidationError
 from django.utils import timezone
 from django.contrib.auth.models import AbstractUser
 from datetime import timedelta, datetime, time
+from accounts.models import User
+from .rules import get_active_rule, get_rule_set, resolve_rule
+from .validation import BookingValidation
 
 
 class Room(models.Model):
@@ -113,13 +116,8 @@ class Room(models.Model):
         if not self.is_bookable():
             return False
         
-        conflicts = self.bookings.filter(
-            start_time__lt=end_datetime,
-            end_time__gt=start_datetime,
-            status__in=['confirmed', 'pending']
-        )
-        
-        return not conflicts.exists()
+        from .availability import room_has_conflict
+        return not room_has_conflict(self.pk, start_datetime, end_datetime)
     
     def get_next_booking(self):
         """Get the next upcoming booking for this room"""
@@ -206,6 +204,31 @@ class BookingRule(models.Model):
         help_text='Whether this rule set is active'
     )
     
+    # Scope; a blank scope field matches everything. The most specific
+    # active rule wins: room, then room type, then faculty alone, then global.
+    room = models.ForeignKey(
+        Room,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='booking_rules',
+        help_text='Only apply to this room'
+    )
+    
+    room_type = models.CharField(
+        max_length=20,
+        choices=Room.ROOM_TYPES,
+        blank=True,
+        help_text='Only apply to rooms of this type'
+    )
+    
+    faculty = models.CharField(
+        max_length=50,
+        choices=User.FACULTY_CHOICES,
+        blank=True,
+        help_text="Only apply to users of this faculty"
+    )
+    
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
@@ -281,8 +304,47 @@ class BookingRule(models.Model):
         return f"{self.name} ({'Active' if self.is_active else 'Inactive'})"
 
 
+class BookingQuerySet(models.QuerySet):
+    """Booking queries"""
+
+    def with_eligibility(self, user=None, now=None):
+        """Annotate cancel_deadline, is_cancellable and is_modifiable in SQL
+
+        Matches get_cancellation_deadline(), can_cancel() and
+        can_be_modified() without loading the rules per row: the rule set
+        is compiled into one CASE over room, room type and faculty. Pass
+        `user` when every booking belongs to the same user to keep the
+        faculty test out of the query.
+        """
+        now = now or timezone.now()
+        pairs, fallback = get_rule_set().conditions(user)
+
+        def notice(rule):
+            return models.Value(timedelta(hours=getattr(rule, 'min_cancel_hours', 0) or 0))
+
+        cancel_notice = models.Case(
+            *(models.When(condition, then=notice(rule)) for condition, rule in pairs),
+            default=notice(fallback),
+            output_field=models.DurationField(),
+        )
+        return self.annotate(
+            cancel_deadline=models.ExpressionWrapper(models.F('start_time') - cancel_notice, output_field=models.DateTimeField()),
+        ).annotate(
+            is_cancellable=models.Case(
+                models.When(status__in=['pending', 'confirmed'], start_time__gt=now, then=models.Value(True)),
+                default=models.Value(False),
+                output_field=models.BooleanField(),
+            ),
+            is_modifiable=models.Case(
+                models.When(status='pending', cancel_deadline__gte=now, then=models.Value(True)),
+                default=models.Value(False),
+                output_field=models.BooleanField(),
+            ),
+        )
+
+
 # Custom managers for efficient queries
-class BookingManager(models.Manager):
+class BookingManager(models.Manager.from_queryset(BookingQuerySet)):
     """Custom manager for Booking model"""
     
     def active_bookings(self):
@@ -363,6 +425,15 @@ class Booking(models.Model):
         help_text='Additional notes or requirements'
     )
     
+    series = models.ForeignKey(
+        'BookingSeries',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='bookings',
+        help_text='Recurring series this booking belongs to'
+    )
+    
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
@@ -377,7 +448,7 @@ class Booking(models.Model):
         indexes = [
             models.Index(fields=['user', 'start_time']),
             models.Index(fields=['room', 'start_time']),
-            models.Index(fields=['status']),
+            models.Index(fields=['status', 'start_time']),
             models.Index(fields=['start_time', 'end_time']),
         ]
         constraints = [
@@ -392,54 +463,34 @@ class Booking(models.Model):
         if not self.start_time or not self.end_time:
             return
         
-        # Check if start time is before end time
-        if self.start_time >= self.end_time:
-            raise ValidationError({
-                'end_time': 'End time must be after start time.'
-            })
-        
-        # Check if booking is in the past
-        if self.start_time < timezone.now():
-            raise ValidationError({
-                'start_time': 'Cannot book rooms in the past.'
-            })
+        # Already checked by a form or view running the same pipeline
+        if BookingValidation.is_current(self):
+            return
         
-        # Check booking duration
-        duration = self.end_time - self.start_time
-        max_duration = timedelta(hours=8)  # Default max duration
+        # PostgreSQL enforces non-overlap with an exclusion constraint instead
+        check_overlap = not database_enforces_no_overlap(router.db_for_write(Booking, instance=self))
+        BookingValidation.for_booking(self, check_overlap=check_overlap).run().stamp(self)
+    
+    def save(self, *args, **kwargs):
+        self.clean()
+        using = kwargs.get('using') or router.db_for_write(Booking, instance=self)
+        if not database_enforces_no_overlap(using):
+            # One transaction so the quota counters (post_save) move with the row
+            with transaction.atomic(using=using):
+                super().save(*args, **kwargs)
+            return
         
         try:
-            rule = BookingRule.objects.filter(is_active=True).first()
-            if rule:
-                max_duration = timedelta(hours=rule.max_duration_hours)
-        except:
-            pass
-        
-        if duration > max_duration:
-            raise ValidationError({
-                'end_time': f'Booking duration cannot exceed {max_duration.total_seconds()/3600} hours.'
-            })
-        
-        # Check for overlapping bookings (exclude current booking if updating)
-        overlapping_bookings = Booking.objects.filter(
-            room=self.room,
-            status__in=['pending', 'confirmed'],
-            start_time__lt=self.end_time,
-            end_time__gt=self.start_time
-        )
-        
-        if self.pk:
-            overlapping_bookings = overlapping_bookings.exclude(pk=self.pk)
-        
-        if overlapping_bookings.exists():
+            # Savepoint so a rejected insert does not break the caller's transaction
+            with transaction.atomic(using=using):
+                super().save(*args, **kwargs)
+        except IntegrityError as e:
+            if NO_OVERLAP_CONSTRAINT not in str(e):
+                raise
             raise ValidationError({
-                'start_time': 'This room is already booked for the selected time period.'
+                'start_time': ValidationError(OVERLAP_MESSAGE, code='overlap')
             })
     
-    def save(self, *args, **kwargs):
-        self.clean()
-        super().save(*args, **kwargs)
-    
     @property
     def duration(self):
         """Return booking duration as timedelta"""
@@ -463,14 +514,11 @@ class Booking(models.Model):
     
     def can_be_cancelled(self):
         """Check if booking can be cancelled based on time restrictions"""
-        try:
-            rules = BookingRule.objects.filter(is_active=True).first()
-            if rules:
-                time_until_start = self.start_time - timezone.now()
-                return time_until_start >= timedelta(hours=rules.min_cancel_hours)
-            return True  # Allow cancellation if no rules
-        except:
-            return True
+        rules = resolve_rule(self.room, self.user)
+        if rules:
+            time_until_start = self.start_time - timezone.now()
+            return time_until_start >= timedelta(hours=rules.min_cancel_hours)
+        return True  # Allow cancellation if no rules
     
     def can_be_modified(self):
         """Check if booking can be modified"""
@@ -478,18 +526,261 @@ class Booking(models.Model):
     
     def get_cancellation_deadline(self):
         """Get the deadline for cancellation"""
-        try:
-            rules = BookingRule.objects.filter(is_active=True).first()
-            if rules:
-                return self.start_time - timedelta(hours=rules.min_cancel_hours)
-            return self.start_time
-        except:
-            return self.start_time
+        rules = resolve_rule(self.room, self.user)
+        if rules:
+            return rules.cancellation_deadline(self.start_time)
+        return self.start_time
     
     def __str__(self):
         return f"{self.room.name} - {self.user.get_full_name()} ({self.start_time.strftime('%Y-%m-%d %H:%M')})"
 
 
+class BookingSeries(models.Model):
+    """Recurring booking: the same room and time every week or every two weeks"""
+    
+    FREQUENCY_CHOICES = [
+        ('weekly', 'Weekly'),
+        ('biweekly', 'Every two weeks'),
+    ]
+    
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='booking_series'
+    )
+    room = models.ForeignKey(
+        Room,
+        on_delete=models.CASCADE,
+        related_name='booking_series'
+    )
+    frequency = models.CharField(max_length=10, choices=FREQUENCY_CHOICES, default='weekly')
+    start_date = models.DateField(help_text='Date of the first occurrence')
+    end_date = models.DateField(help_text='Last date an occurrence may fall on')
+    start_time = models.TimeField()
+    end_time = models.TimeField()
+    exception_dates = models.JSONField(
+        default=list,
+        blank=True,
+        help_text='Dates (YYYY-MM-DD) to skip'
+    )
+    purpose = models.CharField(max_length=200)
+    attendees = models.IntegerField(default=1)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        db_table = 'booking_series'
+        verbose_name = 'Booking Series'
+        verbose_name_plural = 'Booking Series'
+        ordering = ['-created_at']
+    
+    @property
+    def interval(self):
+        return timedelta(weeks=2 if self.frequency == 'biweekly' else 1)
+    
+    def occurrence_dates(self):
+        """Dates of every occurrence, exceptions removed"""
+        skipped = {str(day) for day in self.exception_dates}
+        dates = []
+        day = self.start_date
+        while day <= self.end_date:
+            if day.isoformat() not in skipped:
+                dates.append(day)
+            day += self.interval
+        return dates
+    
+    def occurrences(self):
+        """(start_time, end_time) aware datetimes of every occurrence"""
+        return [
+            (timezone.make_aware(datetime.combine(day, self.start_time)),
+             timezone.make_aware(datetime.combine(day, self.end_time)))
+            for day in self.occurrence_dates()
+        ]
+    
+    def __str__(self):
+        return f"{self.room.name} {self.get_frequency_display().lower()} {self.start_date} - {self.end_date}"
+
+
+class BookingHold(models.Model):
+    """A few minutes' reservation of a slot while a user fills in the booking form
+
+    Availability checks treat live holds of other users as occupied. Holds
+    are never swept by a job: expired rows are simply ignored and get
+    deleted the next time someone places a hold in the room.
+    """
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='booking_holds'
+    )
+    room = models.ForeignKey(
+        Room,
+        on_delete=models.CASCADE,
+        related_name='holds'
+    )
+    start_time = models.DateTimeField()
+    end_time = models.DateTimeField()
+    expires_at = models.DateTimeField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        db_table = 'booking_holds'
+        verbose_name = 'Booking Hold'
+        verbose_name_plural = 'Booking Holds'
+        ordering = ['expires_at']
+        indexes = [
+            models.Index(fields=['room', 'expires_at']),
+            models.Index(fields=['user']),
+        ]
+    
+    def is_expired(self):
+        return self.expires_at <= timezone.now()
+    
+    def __str__(self):
+        return f"Hold on {self.room_id} by {self.user_id} until {self.expires_at:%H:%M}"
+
+
+class RoomOccupancy(models.Model):
+    """Booked 15-minute slots of one room on one day, kept as a bitmap
+
+    Bit n is set when an active booking overlaps slot n (local time,
+    n = minutes since midnight // 15). The 96 bits are split over two
+    columns so the database can test them with a bitwise AND. Days without
+    active bookings have no row. Maintained by booking.occupancy.
+    """
+    room = models.ForeignKey(
+        Room,
+        on_delete=models.CASCADE,
+        related_name='occupancy'
+    )
+    date = models.DateField()
+    am_slots = models.BigIntegerField(default=0, help_text='Slots 00:00-11:45 (bits 0-47)')
+    pm_slots = models.BigIntegerField(default=0, help_text='Slots 12:00-23:45 (bits 0-47)')
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'room_occupancy'
+        verbose_name = 'Room Occupancy'
+        verbose_name_plural = 'Room Occupancy'
+        unique_together = ['room', 'date']
+        indexes = [
+            models.Index(fields=['date', 'room']),
+        ]
+    
+    @property
+    def bits(self):
+        """All 96 slots as one integer"""
+        return self.am_slots | (self.pm_slots << 48)
+    
+    def __str__(self):
+        return f"{self.room_id} on {self.date}"
+
+
+class BookingQuota(models.Model):
+    """Number of active bookings a user has on one day or in one ISO week
+
+    Bookings count on the local date they start; weekly rows are keyed by
+    the Monday of the week. Kept current by booking.quotas on every booking
+    write, so limit checks read a row instead of counting bookings.
+    """
+    PERIOD_CHOICES = [
+        ('day', 'Day'),
+        ('week', 'Week'),
+    ]
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='booking_quotas'
+    )
+    period = models.CharField(max_length=4, choices=PERIOD_CHOICES)
+    period_start = models.DateField(help_text='The day, or the Monday of the ISO week')
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        db_table = 'booking_quotas'
+        verbose_name = 'Booking Quota'
+        verbose_name_plural = 'Booking Quotas'
+        unique_together = ['user', 'period', 'period_start']
+
+    def __str__(self):
+        return f"{self.user_id} {self.period} {self.period_start}: {self.count}"
+
+
+class BookingDailyStats(models.Model):
+    """Bookings made on one local date, per room and status
+
+    Kept current by booking.stats on every booking write; rebuilt from the
+    bookings table by `manage.py backfill_booking_stats`.
+    """
+    date = models.DateField(help_text='Local date the bookings were made')
+    room = models.ForeignKey(
+        Room,
+        on_delete=models.CASCADE,
+        related_name='daily_stats'
+    )
+    status = models.CharField(max_length=20, choices=Booking.STATUS_CHOICES)
+    count = models.IntegerField(default=0)
+    booked_minutes = models.IntegerField(default=0, help_text='Total length of the bookings')
+
+    class Meta:
+        db_table = 'booking_daily_stats'
+        verbose_name = 'Booking Daily Stats'
+        verbose_name_plural = 'Booking Daily Stats'
+        unique_together = ['date', 'room', 'status']
+
+    def __str__(self):
+        return f"{self.date} {self.room_id} {self.status}: {self.count}"
+
+
+class EmailOutbox(models.Model):
+    """An email waiting to be sent, or already sent, by `manage.py run_email_worker`
+
+    Views enqueue rows in the same transaction as the write the email is
+    about (see booking.outbox) instead of talking to the mail server.
+    """
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('sending', 'Sending'),
+        ('sent', 'Sent'),
+        ('failed', 'Failed'),
+    ]
+
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    from_email = models.CharField(max_length=254, blank=True)
+    recipients = models.TextField(help_text='Comma-separated email addresses')
+    booking = models.ForeignKey(
+        Booking,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='emails'
+    )
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    attempts = models.IntegerField(default=0)
+    next_attempt_at = models.DateTimeField(
+        default=timezone.now,
+        help_text='When the email may next be claimed by a worker'
+    )
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'booking_email_outbox'
+        verbose_name = 'Outgoing Email'
+        verbose_name_plural = 'Email Outbox'
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='email_outbox_due_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} -> {self.recipients} ({self.status})"
+
+    def recipient_list(self):
+        return [address for address in self.recipients.split(',') if address]
+
+
 class Announcement(models.Model):
     """Model for admin announcements"""
     # In booking/models.py
@@ -594,10 +885,21 @@ class Announcement(models.Model):
 # Utility functions and validation
 # =============================================
 
+# PostgreSQL exclusion constraint added by migration 0003
+NO_OVERLAP_CONSTRAINT = 'bookings_no_overlap'
+
+OVERLAP_MESSAGE = 'This room is already booked for the selected time period.'
+
+
+def database_enforces_no_overlap(using='default'):
+    """True when the database itself rejects overlapping active bookings"""
+    return connections[using].vendor == 'postgresql'
+
+
 def validate_booking_time_slot(start_time, end_time):
     """Utility function to validate booking time slots"""
     try:
-        rule = BookingRule.objects.filter(is_active=True).first()
+        rule = get_active_rule()
         if not rule:
             return True  # No rules defined, allow booking
         
@@ -0,0 +1,212 @@
+# booking/occupancy.py
+"""
+Per-room, per-day occupancy bitmaps.
+
+RoomOccupancy stores one 96-bit bitmap per (room, local date), one bit per
+15-minute slot. A slot is marked when any active booking overlaps it, so
+"is the room free from 14:00 to 15:00?" becomes a bitwise AND. Requests that
+do not fall on slot boundaries are checked against every slot they touch.
+
+Rows are refreshed for the affected days whenever a booking is saved or
+deleted (see booking.signals), which also moves the (room, date) versions
+in booking.etags; `manage.py rebuild_occupancy` regenerates the whole table.
+"""
+from datetime import datetime, time, timedelta
+
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from . import etags
+from .availability import ACTIVE_STATUSES
+from .models import Booking, RoomOccupancy
+
+SLOT_MINUTES = 15
+SLOTS_PER_DAY = 24 * 60 // SLOT_MINUTES
+HALF_DAY_SLOTS = SLOTS_PER_DAY // 2
+HALF_DAY_MASK = (1 << HALF_DAY_SLOTS) - 1
+
+
+def day_bounds(day):
+    """Aware start of `day` and of the following day in local time"""
+    start = timezone.make_aware(datetime.combine(day, time.min))
+    end = timezone.make_aware(datetime.combine(day + timedelta(days=1), time.min))
+    return start, end
+
+
+def local_dates(start_time, end_time):
+    """Local dates touched by [start_time, end_time)"""
+    first = timezone.localtime(start_time).date()
+    last = timezone.localtime(end_time - timedelta(microseconds=1)).date()
+    dates = []
+    while first <= last:
+        dates.append(first)
+        first += timedelta(days=1)
+    return dates
+
+
+def slot_mask(start, end):
+    """Bitmap of the slots a time-of-day range touches
+
+    `start` and `end` are datetime.time values; an `end` of midnight or
+    earlier than `start` runs to the end of the day.
+    """
+    first = (start.hour * 60 + start.minute) // SLOT_MINUTES
+    end_minutes = end.hour * 60 + end.minute + (1 if end.second or end.microsecond else 0)
+    if end_minutes == 0 or end <= start:
+        end_minutes = 24 * 60
+    last = -(-end_minutes // SLOT_MINUTES)
+    if last <= first:
+        return 0
+    return ((1 << (last - first)) - 1) << first
+
+
+def interval_mask(day_start, day_end, start_time, end_time):
+    """Bitmap of one booking's slots on the day [day_start, day_end)"""
+    start = max(start_time, day_start)
+    end = min(end_time, day_end)
+    if end <= start:
+        return 0
+    slot = timedelta(minutes=SLOT_MINUTES)
+    first = (start - day_start) // slot
+    last = min(-((day_start - end) // slot), SLOTS_PER_DAY)
+    return ((1 << (last - first)) - 1) << first
+
+
+def split_bits(bits):
+    """(am_slots, pm_slots) column values for a 96-bit bitmap"""
+    return bits & HALF_DAY_MASK, (bits >> HALF_DAY_SLOTS) & HALF_DAY_MASK
+
+
+def occupancy_string(bits):
+    """Bitmap as 96 '0'/'1' characters, slot 0 (00:00) first"""
+    return format(bits, f'0{SLOTS_PER_DAY}b')[::-1]
+
+
+def compute_occupancy(intervals, dates):
+    """{date: bits} for (start_time, end_time) intervals over the given dates"""
+    result = {}
+    for day in dates:
+        day_start, day_end = day_bounds(day)
+        bits = 0
+        for start_time, end_time in intervals:
+            if start_time < day_end and end_time > day_start:
+                bits |= interval_mask(day_start, day_end, start_time, end_time)
+        result[day] = bits
+    return result
+
+
+def refresh_occupancy(room_id, dates):
+    """Recompute the stored bitmaps of one room for the given dates"""
+    dates = sorted(set(dates))
+    if not dates:
+        return
+    range_start = day_bounds(dates[0])[0]
+    range_end = day_bounds(dates[-1])[1]
+    intervals = list(Booking.objects.filter(
+        room_id=room_id,
+        status__in=ACTIVE_STATUSES,
+        start_time__lt=range_end,
+        end_time__gt=range_start,
+    ).order_by().values_list('start_time', 'end_time'))
+
+    existing = {row.date: row for row in RoomOccupancy.objects.filter(room_id=room_id, date__in=dates)}
+    empty, changed, created = [], [], []
+    now = timezone.now()
+    for day, bits in compute_occupancy(intervals, dates).items():
+        row = existing.get(day)
+        if not bits:
+            if row is not None:
+                empty.append(day)
+            continue
+        am_slots, pm_slots = split_bits(bits)
+        if row is None:
+            created.append(RoomOccupancy(room_id=room_id, date=day, am_slots=am_slots, pm_slots=pm_slots))
+        elif (row.am_slots, row.pm_slots) != (am_slots, pm_slots):
+            row.am_slots, row.pm_slots, row.updated_at = am_slots, pm_slots, now
+            changed.append(row)
+
+    with transaction.atomic():
+        if empty:
+            RoomOccupancy.objects.filter(room_id=room_id, date__in=empty).delete()
+        if changed:
+            RoomOccupancy.objects.bulk_update(changed, ['am_slots', 'pm_slots', 'updated_at'])
+        if created:
+            # A concurrent refresh may have inserted the same day already
+            RoomOccupancy.objects.bulk_create(created, ignore_conflicts=True)
+    etags.bookings_changed(room_id, dates)
+
+
+def booking_changed(booking, previous=None):
+    """Refresh the days a saved booking covers now and covered before
+
+    `previous` is the (room_id, start_time, end_time) the booking was loaded
+    with, if any.
+    """
+    affected = {}
+    if booking.room_id and booking.start_time and booking.end_time:
+        affected.setdefault(booking.room_id, set()).update(
+            local_dates(booking.start_time, booking.end_time))
+    if previous and all(previous):
+        room_id, start_time, end_time = previous
+        affected.setdefault(room_id, set()).update(local_dates(start_time, end_time))
+    for room_id, dates in affected.items():
+        refresh_occupancy(room_id, dates)
+
+
+def get_day_occupancy(day, room_ids=None):
+    """{room_id: bits} for one date; rooms missing from the result are free"""
+    rows = RoomOccupancy.objects.filter(date=day)
+    if room_ids is not None:
+        rows = rows.filter(room_id__in=list(room_ids))
+    return {
+        room_id: am_slots | (pm_slots << HALF_DAY_SLOTS)
+        for room_id, am_slots, pm_slots in rows.values_list('room_id', 'am_slots', 'pm_slots')
+    }
+
+
+def busy_room_ids(day, start, end):
+    """Subquery of rooms with any occupied slot in [start, end) on `day`"""
+    am_mask, pm_mask = split_bits(slot_mask(start, end))
+    return RoomOccupancy.objects.filter(date=day).annotate(
+        am_hit=F('am_slots').bitand(am_mask),
+        pm_hit=F('pm_slots').bitand(pm_mask),
+    ).filter(Q(am_hit__gt=0) | Q(pm_hit__gt=0)).values('room_id')
+
+
+def filter_free_rooms(rooms, day, start, end):
+    """Narrow a Room queryset to rooms with no booking in [start, end) on `day`"""
+    return rooms.exclude(id__in=busy_room_ids(day, start, end))
+
+
+def rebuild_occupancy(date_from=None, date_to=None, batch_size=1000):
+    """Regenerate RoomOccupancy from the bookings table and return the row count"""
+    bookings = Booking.objects.filter(status__in=ACTIVE_STATUSES)
+    rows = RoomOccupancy.objects.all()
+    if date_from:
+        bookings = bookings.filter(end_time__gt=day_bounds(date_from)[0])
+        rows = rows.filter(date__gte=date_from)
+    if date_to:
+        bookings = bookings.filter(start_time__lt=day_bounds(date_to)[1])
+        rows = rows.filter(date__lte=date_to)
+
+    bitmaps = {}
+    for room_id, start_time, end_time in bookings.order_by().values_list(
+            'room_id', 'start_time', 'end_time').iterator(chunk_size=2000):
+        for day in local_dates(start_time, end_time):
+            if (date_from and day < date_from) or (date_to and day > date_to):
+                continue
+            day_start, day_end = day_bounds(day)
+            key = (room_id, day)
+            bitmaps[key] = bitmaps.get(key, 0) | interval_mask(day_start, day_end, start_time, end_time)
+
+    objects = []
+    for (room_id, day), bits in bitmaps.items():
+        am_slots, pm_slots = split_bits(bits)
+        objects.append(RoomOccupancy(room_id=room_id, date=day, am_slots=am_slots, pm_slots=pm_slots))
+
+    with transaction.atomic():
+        rows.delete()
+        RoomOccupancy.objects.bulk_create(objects, batch_size=batch_size)
+    etags.everything_changed()
+    return len(objects)
@@ -0,0 +1,161 @@
+# booking/outbox.py
+"""
+Transactional email outbox.
+
+Views do not talk to the mail server. They add an EmailOutbox row, in the
+same transaction as the booking write the email is about, so an email is
+only ever queued for a change that was committed. `manage.py
+run_email_worker` delivers the queue in the background:
+
+* batches are claimed with SELECT ... FOR UPDATE SKIP LOCKED, so several
+  workers can run side by side without blocking on or double-sending each
+  other's rows. A claim is a lease: rows a crashed worker left in
+  'sending' become claimable again after CLAIM_LEASE_SECONDS. The lease
+  covers one email, not the batch: each outcome is recorded as soon as it
+  is known and the rest of the batch is leased again before the next send,
+  so a slow mail server cannot let another worker take over emails still
+  waiting their turn;
+* every email of a batch goes over one mail connection, which stays open
+  while there is work and is closed when the queue runs dry;
+* failures are retried with exponential backoff and give up after
+  MAX_ATTEMPTS, with the last error kept on the row.
+
+Delivery is at least once: a worker that dies between sending an email and
+recording it leaves the row to be sent again when its lease runs out.
+"""
+import logging
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.utils import timezone
+
+from .models import EmailOutbox
+
+logger = logging.getLogger(__name__)
+
+MAX_ATTEMPTS = 6
+BACKOFF_BASE_SECONDS = 60
+BACKOFF_MAX_SECONDS = 3600
+
+CLAIM_LEASE_SECONDS = 300
+
+
+def enqueue_email(subject, message, recipient_list, from_email=None, booking=None):
+    """Queue an email for the worker and return its outbox row"""
+    # Savepoint: a failed insert must not break the caller's transaction
+    with transaction.atomic():
+        return EmailOutbox.objects.create(
+            subject=subject[:255],
+            body=message,
+            from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+            recipients=','.join(recipient_list),
+            booking=booking,
+        )
+
+
+def enqueue_emails(emails):
+    """Queue many emails with one insert; `emails` are enqueue_email keyword dicts"""
+    return EmailOutbox.objects.bulk_create([
+        EmailOutbox(
+            subject=email['subject'][:255],
+            body=email['message'],
+            from_email=email.get('from_email') or settings.DEFAULT_FROM_EMAIL,
+            recipients=','.join(email['recipient_list']),
+            booking=email.get('booking'),
+        )
+        for email in emails
+    ])
+
+
+def retry_delay(attempts):
+    """How long to wait before the next try after `attempts` failed ones"""
+    return timedelta(seconds=min(BACKOFF_BASE_SECONDS * 2 ** (attempts - 1), BACKOFF_MAX_SECONDS))
+
+
+def claim_batch(batch_size=50, now=None):
+    """Lock up to `batch_size` due emails no other worker holds and lease them to this one"""
+    now = now or timezone.now()
+    with transaction.atomic():
+        batch = list(
+            EmailOutbox.objects.select_for_update(skip_locked=True)
+            .filter(status__in=['pending', 'sending'], next_attempt_at__lte=now)
+            .order_by('next_attempt_at', 'id')[:batch_size]
+        )
+        if batch:
+            EmailOutbox.objects.filter(pk__in=[email.pk for email in batch]).update(
+                status='sending',
+                next_attempt_at=now + timedelta(seconds=CLAIM_LEASE_SECONDS),
+            )
+    return batch
+
+
+def _renew_lease(emails):
+    """Give this worker another CLAIM_LEASE_SECONDS on the emails it still has to send"""
+    EmailOutbox.objects.filter(pk__in=[email.pk for email in emails], status='sending').update(
+        next_attempt_at=timezone.now() + timedelta(seconds=CLAIM_LEASE_SECONDS),
+    )
+
+
+def deliver_batch(batch, connection):
+    """Send claimed emails over `connection` and record each outcome; returns (sent, failed)"""
+    sent = failed = 0
+    for i, email in enumerate(batch):
+        if i:
+            _renew_lease(batch[i:])
+        message = EmailMessage(
+            email.subject,
+            email.body,
+            email.from_email or settings.DEFAULT_FROM_EMAIL,
+            email.recipient_list(),
+            connection=connection,
+        )
+        email.attempts += 1
+        try:
+            # Opens the connection the first time and after an error closed it
+            connection.open()
+            message.send()
+        except Exception as e:
+            email.last_error = f'{type(e).__name__}: {e}'
+            if email.attempts >= MAX_ATTEMPTS:
+                email.status = 'failed'
+                failed += 1
+            else:
+                email.status = 'pending'
+                email.next_attempt_at = timezone.now() + retry_delay(email.attempts)
+            logger.warning(f"Email {email.pk} attempt {email.attempts} failed: {email.last_error}")
+            # The connection may be broken; start the next email on a fresh one
+            connection.close()
+        else:
+            email.status = 'sent'
+            email.sent_at = timezone.now()
+            email.last_error = ''
+            sent += 1
+        email.save(update_fields=['status', 'attempts', 'next_attempt_at', 'last_error', 'sent_at'])
+    return sent, failed
+
+
+def run_worker(batch_size=50, poll_seconds=5, once=False):
+    """Deliver the outbox until interrupted (or until it is empty with `once`); returns (sent, failed)"""
+    connection = get_connection()
+    sent = failed = 0
+    try:
+        while True:
+            batch = claim_batch(batch_size)
+            if batch:
+                batch_sent, batch_failed = deliver_batch(batch, connection)
+                sent += batch_sent
+                failed += batch_failed
+                continue
+            # Do not hold an idle connection the server will drop anyway
+            connection.close()
+            if once:
+                return sent, failed
+            time.sleep(poll_seconds)
+    except KeyboardInterrupt:
+        # Claimed emails that were not sent are picked up again when their lease expires
+        return sent, failed
+    finally:
+        connection.close()
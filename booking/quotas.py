@@ -0,0 +1,154 @@
+# booking/quotas.py
+"""
+Per-user booking quota counters.
+
+BookingQuota holds, for every user, the number of active bookings starting
+on each local day and in each ISO week. The Booking signals move a booking's
+count whenever it is created, deleted, moved, reassigned or changes status,
+inside the same transaction as the write, so daily/weekly limit checks read
+one row instead of counting bookings. `manage.py reconcile_booking_quotas`
+recomputes the counters from the bookings table.
+"""
+from collections import Counter
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .availability import ACTIVE_STATUSES
+from .models import Booking, BookingQuota
+from .occupancy import day_bounds
+
+DAY = 'day'
+WEEK = 'week'
+
+
+def week_start(day):
+    """Monday of the ISO week containing `day`"""
+    return day - timedelta(days=day.weekday())
+
+
+def _counted_day(user_id, start_time, status):
+    """(user_id, local start date) a booking counts against, or None"""
+    if user_id and start_time and status in ACTIVE_STATUSES:
+        return user_id, timezone.localtime(start_time).date()
+    return None
+
+
+def _add(user_id, day, delta):
+    """Add `delta` to the user's counters for `day` and its week"""
+    for period, period_start in ((DAY, day), (WEEK, week_start(day))):
+        rows = BookingQuota.objects.filter(user_id=user_id, period=period, period_start=period_start)
+        if rows.update(count=F('count') + delta) or delta < 0:
+            continue
+        # First booking of the period; a concurrent writer may create it too
+        BookingQuota.objects.bulk_create(
+            [BookingQuota(user_id=user_id, period=period, period_start=period_start)],
+            ignore_conflicts=True,
+        )
+        rows.update(count=F('count') + delta)
+
+
+def booking_changed(booking, previous=None):
+    """Move a saved booking's count from where it was loaded to where it is now
+
+    `previous` is the (user_id, start_time, status) the booking was loaded
+    with, or None for a new booking.
+    """
+    old = _counted_day(*previous) if previous else None
+    new = _counted_day(booking.user_id, booking.start_time, booking.status)
+    if old == new:
+        return
+    with transaction.atomic():
+        if old:
+            _add(*old, -1)
+        if new:
+            _add(*new, 1)
+
+
+def booking_deleted(user_id, start_time, status):
+    """Remove a deleted booking's count"""
+    counted = _counted_day(user_id, start_time, status)
+    if counted:
+        _add(*counted, -1)
+
+
+def bookings_added(user_id, start_times, status='pending'):
+    """Count bookings inserted without signals (bulk_create)"""
+    if status not in ACTIVE_STATUSES:
+        return
+    days = Counter(timezone.localtime(start_time).date() for start_time in start_times)
+    with transaction.atomic():
+        for day, count in sorted(days.items()):
+            _add(user_id, day, count)
+
+
+def bookings_removed(user_id, start_times):
+    """Uncount active bookings cancelled without signals (bulk .update())"""
+    days = Counter(timezone.localtime(start_time).date() for start_time in start_times)
+    with transaction.atomic():
+        for day, count in sorted(days.items()):
+            _add(user_id, day, -count)
+
+
+def get_usage(user_id, day):
+    """(bookings on `day`, bookings in its ISO week) for one user, in one query"""
+    usage = {DAY: 0, WEEK: 0}
+    rows = BookingQuota.objects.filter(user_id=user_id).filter(
+        Q(period=DAY, period_start=day) | Q(period=WEEK, period_start=week_start(day))
+    ).values_list('period', 'count')
+    for period, count in rows:
+        usage[period] = max(count, 0)
+    return usage[DAY], usage[WEEK]
+
+
+def get_usage_range(user_id, date_from, date_to):
+    """({day: count}, {week start: count}) for one user over a date range, in one query
+
+    Covers every day from `date_from` to `date_to` and every ISO week
+    touching them; days and weeks without bookings are left out.
+    """
+    days, weeks = {}, {}
+    rows = BookingQuota.objects.filter(user_id=user_id).filter(
+        Q(period=DAY, period_start__gte=date_from, period_start__lte=date_to)
+        | Q(period=WEEK, period_start__gte=week_start(date_from), period_start__lte=date_to)
+    ).values_list('period', 'period_start', 'count')
+    for period, period_start, count in rows:
+        (days if period == DAY else weeks)[period_start] = max(count, 0)
+    return days, weeks
+
+
+def rebuild_quotas(date_from=None, date_to=None, batch_size=1000):
+    """Recompute BookingQuota from the bookings table and return the row count
+
+    The range is widened to whole ISO weeks so weekly counters stay exact.
+    """
+    if date_from:
+        date_from = week_start(date_from)
+    if date_to:
+        date_to = week_start(date_to) + timedelta(days=6)
+
+    bookings = Booking.objects.filter(status__in=ACTIVE_STATUSES)
+    rows = BookingQuota.objects.all()
+    if date_from:
+        bookings = bookings.filter(start_time__gte=day_bounds(date_from)[0])
+        rows = rows.filter(period_start__gte=date_from)
+    if date_to:
+        bookings = bookings.filter(start_time__lt=day_bounds(date_to)[1])
+        rows = rows.filter(period_start__lte=date_to)
+
+    counts = Counter()
+    for user_id, start_time in bookings.order_by().values_list('user_id', 'start_time').iterator(chunk_size=2000):
+        day = timezone.localtime(start_time).date()
+        counts[(user_id, DAY, day)] += 1
+        counts[(user_id, WEEK, week_start(day))] += 1
+
+    objects = [
+        BookingQuota(user_id=user_id, period=period, period_start=period_start, count=count)
+        for (user_id, period, period_start), count in counts.items()
+    ]
+    with transaction.atomic():
+        rows.delete()
+        BookingQuota.objects.bulk_create(objects, batch_size=batch_size)
+    return len(objects)
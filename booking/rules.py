@@ -0,0 +1,297 @@
+# booking/rules.py
+"""
+Cached, compiled booking rules.
+
+Active BookingRules are loaded once into immutable RuleSnapshots, stored in
+the Django cache under the current rules version and compiled per process
+into a RuleSet: a dict from scope to rule. Resolving the rule for a
+booking request is a few dict lookups, memoized per (room, room type,
+faculty), and checking the request against it is a handful of
+comparisons. Saving or deleting a BookingRule bumps the version (see
+booking.signals), so every process recompiles on its next read.
+
+The version only reaches other processes through a cache they share. With
+a per-process cache (Django's default LocMemCache) a process also reloads
+its rules once they are RULES_TTL_SECONDS old, so a rule edited through
+another worker applies everywhere within that time.
+
+Rules can be scoped by room, room type and user faculty; blank scope
+fields match everything. The most specific rule wins: a room rule, then a
+room type rule, then a faculty-only rule, then the global rule. Within
+each of those a rule that also names the user's faculty is preferred.
+"""
+import threading
+import time
+from collections import namedtuple
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db.models import Q
+from django.utils import timezone
+
+RULES_VERSION_KEY = 'booking:rules-version'
+RULES_SNAPSHOT_KEY = 'booking:rule-snapshots:{}'
+
+# How long a process keeps compiled rules, and the cache keeps snapshots,
+# before reloading them; bounds how stale rules get without a shared cache
+RULES_TTL_SECONDS = 60
+
+RULE_FIELDS = (
+    'id',
+    'name',
+    'max_duration_hours',
+    'daily_booking_limit',
+    'weekly_booking_limit',
+    'max_advance_days',
+    'min_advance_hours',
+    'min_cancel_hours',
+    'min_modify_hours',
+    'booking_start_time',
+    'booking_end_time',
+    'room_id',
+    'room_type',
+    'faculty',
+)
+
+_memo = {}
+_lock = threading.Lock()
+
+
+class RuleSnapshot(namedtuple('RuleSnapshot', RULE_FIELDS)):
+    """Read-only copy of a BookingRule's settings
+
+    Limits set to None are not enforced.
+    """
+
+    __slots__ = ()
+
+    @classmethod
+    def from_rule(cls, rule):
+        return cls(*(getattr(rule, field) for field in RULE_FIELDS))
+
+    @property
+    def scope(self):
+        """(room_id, room_type, faculty) this rule applies to; None matches all"""
+        if self.room_id:
+            return (self.room_id, None, self.faculty or None)
+        return (None, self.room_type or None, self.faculty or None)
+
+    @property
+    def max_duration(self):
+        return timedelta(hours=self.max_duration_hours)
+
+    def cancellation_deadline(self, start_time):
+        return start_time - timedelta(hours=self.min_cancel_hours)
+
+    def check_request(self, start_time, end_time, daily_count=0, weekly_count=0, now=None):
+        """First rule the request breaks, as a message, or None if it complies
+
+        `daily_count` and `weekly_count` are the user's active bookings on
+        the start day and in its week before this request.
+        """
+        message = self.check_booking(start_time, end_time, daily_count, weekly_count)
+        if message:
+            return message
+        now = now or timezone.now()
+        if self.max_advance_days is not None and start_time - now > timedelta(days=self.max_advance_days):
+            return f'Bookings can only be made {self.max_advance_days} days in advance.'
+        if self.min_advance_hours and start_time - now < timedelta(hours=self.min_advance_hours):
+            return f'Bookings must be made at least {self.min_advance_hours} hours in advance.'
+        return None
+
+    def check_booking(self, start_time, end_time, daily_count=0, weekly_count=0):
+        """Like check_request, without the rules that depend on when it is asked"""
+        duration = end_time - start_time
+        if self.max_duration_hours is not None and duration > timedelta(hours=self.max_duration_hours):
+            return f'Maximum booking duration is {self.max_duration_hours} hours.'
+        if self.daily_booking_limit is not None and daily_count >= self.daily_booking_limit:
+            return f'You have reached the maximum number of bookings per day ({self.daily_booking_limit}).'
+        if self.weekly_booking_limit is not None and weekly_count >= self.weekly_booking_limit:
+            return f'You have reached the maximum number of bookings per week ({self.weekly_booking_limit}).'
+        if self.booking_start_time is not None:
+            local_start = timezone.localtime(start_time)
+            local_end = timezone.localtime(end_time)
+            if (local_start.time() < self.booking_start_time or local_end.time() > self.booking_end_time
+                    or local_end.date() != local_start.date()):
+                return (f'Bookings are only allowed between {self.booking_start_time:%H:%M} '
+                        f'and {self.booking_end_time:%H:%M}.')
+        return None
+
+    def check_user_can_book(self, user, booking_datetime):
+        """Check if user can make a booking at the given datetime"""
+        errors = []
+        advance_time = booking_datetime - timezone.now()
+        if advance_time.days > self.max_advance_days:
+            errors.append(f"Bookings can only be made {self.max_advance_days} days in advance.")
+        return errors
+
+    def can_cancel_booking(self, booking):
+        """Check if booking can be cancelled based on rules"""
+        if not self.min_cancel_hours:
+            return True, ""
+
+        time_until_booking = booking.start_time - timezone.now()
+        if time_until_booking.total_seconds() < self.min_cancel_hours * 3600:
+            return False, f"Bookings can only be cancelled {self.min_cancel_hours} hours in advance."
+
+        return True, ""
+
+
+# What accounts.create_booking enforced before rules were configurable
+DEFAULT_RULE = RuleSnapshot(
+    id=None,
+    name='Default',
+    max_duration_hours=8,
+    daily_booking_limit=3,
+    weekly_booking_limit=None,
+    max_advance_days=None,
+    min_advance_hours=0,
+    min_cancel_hours=0,
+    min_modify_hours=0,
+    booking_start_time=None,
+    booking_end_time=None,
+    room_id=None,
+    room_type='',
+    faculty='',
+)
+
+
+class RuleSet:
+    """Active rules compiled into a scope -> rule dispatch table"""
+
+    def __init__(self, rules):
+        self.table = {}
+        # `rules` come in name order; the first rule of a scope wins, as
+        # BookingRule.objects.filter(is_active=True).first() did
+        for rule in rules:
+            self.table.setdefault(rule.scope, rule)
+        self.by_room = any(room_id for room_id, _, _ in self.table)
+        self.by_room_type = any(room_type for _, room_type, _ in self.table)
+        self.by_faculty = any(faculty for _, _, faculty in self.table)
+        self._resolved = {}
+
+    def resolve(self, room_id=None, room_type=None, faculty=None):
+        """Most specific rule for the request, or None when nothing applies"""
+        # Scope values no rule uses cannot change the outcome
+        room_id = room_id if self.by_room else None
+        room_type = (room_type or None) if self.by_room_type else None
+        faculty = (faculty or None) if self.by_faculty else None
+        key = (room_id, room_type, faculty)
+        try:
+            return self._resolved[key]
+        except KeyError:
+            pass
+        scopes = []
+        if room_id is not None:
+            scopes += [(room_id, None, faculty), (room_id, None, None)]
+        if room_type is not None:
+            scopes += [(None, room_type, faculty), (None, room_type, None)]
+        scopes += [(None, None, faculty), (None, None, None)]
+        rule = None
+        for scope in scopes:
+            rule = self.table.get(scope)
+            if rule is not None:
+                break
+        self._resolved[key] = rule
+        return rule
+
+    def conditions(self, user=None):
+        """Rules as ([(Q on Booking, rule), ...], fallback rule) in resolve() order
+
+        For building SQL CASE expressions over bookings. With `user` given,
+        rules for other faculties are dropped and no faculty test is emitted.
+        """
+        faculty = getattr(user, 'faculty', None) or None
+        pairs = []
+        for scope in sorted(self.table, key=lambda scope: tuple(part is None for part in scope)):
+            room_id, room_type, rule_faculty = scope
+            if user is not None and rule_faculty is not None:
+                if rule_faculty != faculty:
+                    continue
+                rule_faculty = None
+            condition = Q()
+            if room_id is not None:
+                condition &= Q(room_id=room_id)
+            if room_type is not None:
+                condition &= Q(room__room_type=room_type)
+            if rule_faculty is not None:
+                condition &= Q(user__faculty=rule_faculty)
+            if not condition:
+                # Matches every booking, so nothing after it can apply
+                return pairs, self.table[scope]
+            pairs.append((condition, self.table[scope]))
+        return pairs, None
+
+
+def get_rules_version():
+    """Current version of the booking rules"""
+    return cache.get(RULES_VERSION_KEY, 0)
+
+
+def bump_rules_version():
+    """Record that the booking rules changed and return the new version"""
+    try:
+        return cache.incr(RULES_VERSION_KEY)
+    except ValueError:
+        cache.add(RULES_VERSION_KEY, 0, None)
+        return cache.incr(RULES_VERSION_KEY)
+
+
+def _load_snapshots():
+    from .models import BookingRule
+    rules = BookingRule.objects.filter(is_active=True).order_by('name', 'pk')
+    return [RuleSnapshot.from_rule(rule) for rule in rules]
+
+
+def get_rule_set():
+    """The compiled RuleSet for the current rules version
+
+    Costs one cache read when the rules have not changed; the database is
+    only queried once per rules version and RULES_TTL_SECONDS across all
+    processes sharing the cache.
+    """
+    version = get_rules_version()
+    now = time.time()
+    memo = _memo.get('rules')
+    if memo is not None and memo[0] == version and now - memo[1] < RULES_TTL_SECONDS:
+        return memo[2]
+
+    # Snapshots carry the time they were read from the database, so rules
+    # compiled from a cached copy expire when that copy does
+    key = RULES_SNAPSHOT_KEY.format(version)
+    cached = cache.get(key)
+    if cached is None:
+        cached = (now, _load_snapshots())
+        cache.set(key, cached, RULES_TTL_SECONDS)
+    loaded_at, snapshots = cached
+    rule_set = RuleSet(snapshots)
+    with _lock:
+        _memo['rules'] = (version, loaded_at, rule_set)
+    return rule_set
+
+
+def get_active_rule():
+    """RuleSnapshot of the global (unscoped) rule, or None when there is none"""
+    return get_rule_set().resolve()
+
+
+def resolve_rule(room=None, user=None, default=None):
+    """The rule that applies to `user` booking `room`
+
+    Only reads attributes the rule set is scoped by, so passing loaded
+    objects never costs a query.
+    """
+    rules = get_rule_set()
+    rule = rules.resolve(
+        room.pk if room is not None else None,
+        room.room_type if room is not None and rules.by_room_type else None,
+        getattr(user, 'faculty', None) if user is not None and rules.by_faculty else None,
+    )
+    return rule or default
+
+
+def rules_changed():
+    """Invalidate every process's rule set after a BookingRule write"""
+    bump_rules_version()
+    with _lock:
+        _memo.clear()
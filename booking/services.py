@@ -0,0 +1,333 @@
+# booking/services.py
+"""
+Booking write path.
+
+All code that creates or moves a booking should go through place_booking so
+the conflict check and the insert happen in one transaction while holding a
+per-room lock. Bookings for different rooms never wait on each other.
+"""
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+
+from datetime import timedelta
+
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, connection, transaction
+from django.utils import timezone
+
+from . import occupancy, quotas, stats
+from .availability import ACTIVE_STATUSES, room_changed
+from .dashboard import dashboard_changed
+from .models import Booking, BookingHold, Room, database_enforces_no_overlap
+from .rules import resolve_rule
+
+# How long a slot stays reserved while the user completes the booking form
+HOLD_TTL = timedelta(minutes=5)
+
+# Fallback for backends without SELECT ... FOR UPDATE (SQLite in development)
+_local_room_locks = defaultdict(threading.Lock)
+_local_room_locks_guard = threading.Lock()
+
+
+class BookingConflictError(ValidationError):
+    """Raised when the requested slot overlaps an active booking"""
+
+    def __init__(self, conflict):
+        self.conflict = conflict
+        conflict_time = timezone.localtime(conflict.start_time).strftime('%Y-%m-%d %H:%M')
+        super().__init__({
+            'start_time': f'This time slot conflicts with an existing booking at {conflict_time}.'
+        })
+
+
+class SeriesConflictError(ValidationError):
+    """Raised when occurrences of a recurring series overlap active bookings
+
+    `conflicts` lists (start_time, end_time, conflicting_booking_id) for
+    every rejected occurrence.
+    """
+
+    def __init__(self, conflicts):
+        self.conflicts = conflicts
+        dates = ', '.join(
+            timezone.localtime(start).strftime('%Y-%m-%d') for start, _, _ in conflicts
+        )
+        super().__init__(f'{len(conflicts)} occurrence(s) conflict with existing bookings: {dates}')
+
+
+class SlotHeldError(ValidationError):
+    """Raised when another user currently holds the requested slot"""
+
+    def __init__(self, hold):
+        self.hold = hold
+        super().__init__({
+            'start_time': 'Someone else is booking this time slot right now. '
+                          'Please try again in a few minutes or pick another time.'
+        })
+
+
+@contextmanager
+def room_write_lock(room_id):
+    """Open a transaction that holds an exclusive lock on one room"""
+    if connection.features.has_select_for_update:
+        with transaction.atomic():
+            # Row lock on the rooms row; released on commit/rollback
+            list(Room.objects.select_for_update().filter(pk=room_id).values_list('pk', flat=True))
+            yield
+    else:
+        with _local_room_locks_guard:
+            lock = _local_room_locks[room_id]
+        with lock:
+            with transaction.atomic():
+                yield
+
+
+def find_conflict(room_id, start_time, end_time, exclude_pk=None):
+    """First active booking overlapping the slot, read straight from the database"""
+    conflicts = Booking.objects.filter(
+        room_id=room_id,
+        status__in=ACTIVE_STATUSES,
+        start_time__lt=end_time,
+        end_time__gt=start_time
+    )
+    if exclude_pk:
+        conflicts = conflicts.exclude(pk=exclude_pk)
+    return conflicts.order_by('start_time').first()
+
+
+def find_hold_conflict(room_id, start_time, end_time, user_id=None):
+    """Unexpired hold of another user overlapping the slot, read from the database"""
+    holds = BookingHold.objects.filter(
+        room_id=room_id,
+        start_time__lt=end_time,
+        end_time__gt=start_time,
+        expires_at__gt=timezone.now(),
+    )
+    if user_id:
+        holds = holds.exclude(user_id=user_id)
+    return holds.first()
+
+
+def _release_user_holds(user_id, room_id=None):
+    """Delete a user's holds and invalidate the rooms they were in"""
+    holds = BookingHold.objects.filter(user_id=user_id)
+    if room_id is not None:
+        holds = holds.filter(room_id=room_id)
+    room_ids = set(holds.values_list('room_id', flat=True))
+    if room_ids:
+        holds.delete()
+        transaction.on_commit(lambda: [room_changed(held_room) for held_room in room_ids])
+    return room_ids
+
+
+def _is_overlap_error(error):
+    if not hasattr(error, 'error_dict'):
+        return False
+    return any(e.code == 'overlap' for e in error.error_dict.get('start_time', []))
+
+
+def place_booking(booking):
+    """Save a new or moved booking if its slot is still free
+
+    The conflict check runs against the database under the room lock, not
+    against the availability index, so it is authoritative even when several
+    workers race for the same slot. On PostgreSQL the exclusion constraint
+    makes the lock and the separate SELECT unnecessary.
+    """
+    if database_enforces_no_overlap():
+        # The exclusion constraint rejects overlaps in the insert itself
+        if booking.status in ACTIVE_STATUSES:
+            hold = find_hold_conflict(booking.room_id, booking.start_time, booking.end_time, booking.user_id)
+            if hold:
+                raise SlotHeldError(hold)
+        try:
+            booking.save()
+        except ValidationError as e:
+            if not _is_overlap_error(e):
+                raise
+            conflict = find_conflict(booking.room_id, booking.start_time, booking.end_time, exclude_pk=booking.pk)
+            if conflict is None:
+                raise
+            raise BookingConflictError(conflict)
+        _release_user_holds(booking.user_id, booking.room_id)
+        return booking
+
+    with room_write_lock(booking.room_id):
+        if booking.status in ACTIVE_STATUSES:
+            conflict = find_conflict(booking.room_id, booking.start_time, booking.end_time, exclude_pk=booking.pk)
+            if conflict:
+                raise BookingConflictError(conflict)
+            hold = find_hold_conflict(booking.room_id, booking.start_time, booking.end_time, booking.user_id)
+            if hold:
+                raise SlotHeldError(hold)
+        booking.save()
+        # The booking replaces whatever the user was holding in this room
+        _release_user_holds(booking.user_id, booking.room_id)
+    return booking
+
+
+def place_hold(user, room_id, start_time, end_time):
+    """Reserve a slot for `user` for HOLD_TTL while they finish the booking form
+
+    A user has at most one hold at a time; placing a new one replaces it.
+    Raises BookingConflictError or SlotHeldError if the slot is not free.
+    """
+    with room_write_lock(room_id):
+        now = timezone.now()
+        # Lazy expiry: clear out dead holds in this room while we hold its lock
+        BookingHold.objects.filter(room_id=room_id, expires_at__lte=now).delete()
+        _release_user_holds(user.pk)
+
+        conflict = find_conflict(room_id, start_time, end_time)
+        if conflict:
+            raise BookingConflictError(conflict)
+        hold = find_hold_conflict(room_id, start_time, end_time, user.pk)
+        if hold:
+            raise SlotHeldError(hold)
+
+        hold = BookingHold.objects.create(
+            user=user,
+            room_id=room_id,
+            start_time=start_time,
+            end_time=end_time,
+            expires_at=now + HOLD_TTL,
+        )
+        transaction.on_commit(lambda: room_changed(room_id))
+    return hold
+
+
+def release_holds(user):
+    """Give up every hold the user has"""
+    with transaction.atomic():
+        return bool(_release_user_holds(user.pk))
+
+
+def series_conflicts(room_id, occurrences, user_id=None):
+    """Occurrences overlapping active bookings or other users' holds
+
+    Bookings are checked with one ranged query and holds with another.
+    `occurrences` must be sorted and non-overlapping, as a series produces.
+    Conflicts with a hold report None as the booking id.
+    """
+    if not occurrences:
+        return []
+    existing = list(Booking.objects.filter(
+        room_id=room_id,
+        status__in=ACTIVE_STATUSES,
+        start_time__lt=occurrences[-1][1],
+        end_time__gt=occurrences[0][0],
+    ).order_by('start_time').values_list('start_time', 'end_time', 'id'))
+
+    holds = BookingHold.objects.filter(
+        room_id=room_id,
+        expires_at__gt=timezone.now(),
+        start_time__lt=occurrences[-1][1],
+        end_time__gt=occurrences[0][0],
+    )
+    if user_id:
+        holds = holds.exclude(user_id=user_id)
+    holds = list(holds.values_list('start_time', 'end_time'))
+
+    conflicts = []
+    i = 0
+    for start, end in occurrences:
+        # Active bookings in a room never overlap, so their ends are sorted too
+        while i < len(existing) and existing[i][1] <= start:
+            i += 1
+        if i < len(existing) and existing[i][0] < end:
+            conflicts.append((start, end, existing[i][2]))
+        elif any(hold_start < end and hold_end > start for hold_start, hold_end in holds):
+            conflicts.append((start, end, None))
+    return conflicts
+
+
+def _check_series_rule(rule, user_id, occurrences, status):
+    """Check every occurrence against `rule`, counting the earlier ones against the quotas
+
+    Raises ValidationError naming the first date that breaks the rule.
+    """
+    now = timezone.now()
+    first_day = timezone.localtime(occurrences[0][0]).date()
+    last_day = timezone.localtime(occurrences[-1][0]).date()
+    daily, weekly = quotas.get_usage_range(user_id, first_day, last_day)
+    counted = status in ACTIVE_STATUSES
+    for start, end in occurrences:
+        day = timezone.localtime(start).date()
+        week = quotas.week_start(day)
+        message = rule.check_request(start, end, daily.get(day, 0), weekly.get(week, 0), now=now)
+        if message:
+            raise ValidationError(f'{day:%Y-%m-%d}: {message}')
+        if counted:
+            daily[day] = daily.get(day, 0) + 1
+            weekly[week] = weekly.get(week, 0) + 1
+
+
+def book_series(series, skip_conflicts=False, status='pending'):
+    """Validate every occurrence of a series at once and insert the bookings
+
+    Raises SeriesConflictError listing all conflicting dates, unless
+    `skip_conflicts` is set, in which case only the free dates are booked.
+    Every date to be booked must also pass the booking rule scoped to the
+    room and user, with the series' own earlier dates counted against the
+    daily and weekly limits; the first date that does not raises
+    ValidationError. Returns (created_bookings, conflicts). The series is saved only if at
+    least one booking is created.
+    """
+    occurrences = series.occurrences()
+    if not occurrences:
+        raise ValidationError('The series has no dates between its start and end date.')
+
+    # The per-booking checks from Booking.clean, done once for the series
+    first_start, first_end = occurrences[0]
+    if first_start >= first_end:
+        raise ValidationError('End time must be after start time.')
+    if first_start < timezone.now():
+        raise ValidationError('Cannot book rooms in the past.')
+    rule = resolve_rule(series.room, series.user)
+    max_duration = timedelta(hours=rule.max_duration_hours if rule else 8)
+    if first_end - first_start > max_duration:
+        raise ValidationError(f'Booking duration cannot exceed {max_duration.total_seconds()/3600} hours.')
+
+    with room_write_lock(series.room_id):
+        conflicts = series_conflicts(series.room_id, occurrences, series.user_id)
+        if conflicts and not skip_conflicts:
+            raise SeriesConflictError(conflicts)
+
+        taken = {start for start, _, _ in conflicts}
+        accepted = [(start, end) for start, end in occurrences if start not in taken]
+        if not accepted:
+            raise SeriesConflictError(conflicts)
+        if rule:
+            _check_series_rule(rule, series.user_id, accepted, status)
+
+        series.save()
+        try:
+            with transaction.atomic():
+                bookings = Booking.objects.bulk_create([
+                    Booking(
+                        user_id=series.user_id,
+                        room_id=series.room_id,
+                        series=series,
+                        start_time=start,
+                        end_time=end,
+                        purpose=series.purpose,
+                        attendees=series.attendees,
+                        status=status,
+                    )
+                    for start, end in accepted
+                ])
+                # bulk_create skips the Booking signals that keep quotas and statistics current
+                quotas.bookings_added(series.user_id, [start for start, _ in accepted], status)
+                stats.bookings_added(bookings)
+        except IntegrityError as e:
+            # Lost a race against a single booking on PostgreSQL
+            raise ValidationError(f'Could not book the series: {e}')
+
+        # bulk_create skips the Booking signals
+        room_id = series.room_id
+        dates = [timezone.localtime(start).date() for start, _ in accepted]
+        transaction.on_commit(lambda: room_changed(room_id))
+        transaction.on_commit(lambda: occupancy.refresh_occupancy(room_id, dates))
+        transaction.on_commit(dashboard_changed)
+    return bookings, conflicts
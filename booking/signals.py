@@ -0,0 +1,121 @@
+# booking/signals.py
+from django.db import transaction
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from . import etags, occupancy, quotas, stats
+from .availability import booking_changed, booking_deleted
+from .dashboard import dashboard_changed
+from .models import Booking, BookingRule, Room
+from .rules import rules_changed
+
+
+@receiver(post_init, sender=Booking)
+def remember_booking_room(sender, instance, **kwargs):
+    """Remember the room and times a booking was loaded with so a move refreshes both places"""
+    # Read through __dict__ so deferred fields are not fetched one row at a time
+    loaded = instance.__dict__
+    instance._loaded_room_id = loaded.get('room_id')
+    instance._loaded_slot = (loaded.get('room_id'), loaded.get('start_time'), loaded.get('end_time'))
+    instance._loaded_quota = (loaded.get('user_id'), loaded.get('start_time'), loaded.get('status'))
+    instance._loaded_stats = tuple(loaded.get(field) for field in stats.STATS_FIELDS)
+
+
+def _quota_fields(instance):
+    return (instance.user_id, instance.start_time, instance.status)
+
+
+@receiver(post_save, sender=Booking)
+def update_availability_on_save(sender, instance, **kwargs):
+    """Keep the availability index current once the write is committed"""
+    previous_room_id = getattr(instance, '_loaded_room_id', None)
+    instance._loaded_room_id = instance.room_id
+    transaction.on_commit(lambda: booking_changed(instance, previous_room_id))
+
+
+@receiver(post_save, sender=Booking)
+def update_occupancy_on_save(sender, instance, **kwargs):
+    """Refresh the occupancy bitmaps of the days the booking covers"""
+    previous = getattr(instance, '_loaded_slot', None)
+    instance._loaded_slot = (instance.room_id, instance.start_time, instance.end_time)
+    transaction.on_commit(lambda: occupancy.booking_changed(instance, previous))
+
+
+@receiver(post_save, sender=Booking)
+def update_quotas_on_save(sender, instance, created, **kwargs):
+    """Move the booking's quota count in the same transaction as the write"""
+    current = _quota_fields(instance)
+    loaded = getattr(instance, '_loaded_quota', None)
+    instance._loaded_quota = current
+    previous = None
+    if not created and loaded:
+        # Fields that were deferred when the booking was loaded are unchanged
+        previous = tuple(old if old is not None else new for old, new in zip(loaded, current))
+    quotas.booking_changed(instance, previous)
+
+
+@receiver(post_save, sender=Booking)
+def update_stats_on_save(sender, instance, created, **kwargs):
+    """Move the booking between daily statistics rows in the same transaction as the write"""
+    loaded = getattr(instance, '_loaded_stats', None)
+    current = stats.stats_fields(instance)
+    instance._loaded_stats = current
+    previous = None
+    if not created and loaded:
+        previous = tuple(old if old is not None else new for old, new in zip(loaded, current))
+    stats.booking_changed(instance, previous)
+
+
+@receiver(post_delete, sender=Booking)
+def update_availability_on_delete(sender, instance, **kwargs):
+    """Drop deleted bookings from the availability index"""
+    booking_id, room_id = instance.pk, instance.room_id
+    transaction.on_commit(lambda: booking_deleted(booking_id, room_id))
+
+
+@receiver(post_delete, sender=Booking)
+def update_occupancy_on_delete(sender, instance, **kwargs):
+    """Clear a deleted booking's slots from the occupancy bitmaps"""
+    room_id = instance.room_id
+    dates = occupancy.local_dates(instance.start_time, instance.end_time)
+    transaction.on_commit(lambda: occupancy.refresh_occupancy(room_id, dates))
+
+
+@receiver(post_delete, sender=Booking)
+def update_quotas_on_delete(sender, instance, **kwargs):
+    """Remove a deleted booking from its owner's quota counts"""
+    quotas.booking_deleted(*getattr(instance, '_loaded_quota', None) or _quota_fields(instance))
+
+
+@receiver(post_delete, sender=Booking)
+def update_stats_on_delete(sender, instance, **kwargs):
+    """Remove a deleted booking from the daily statistics"""
+    loaded = getattr(instance, '_loaded_stats', None) or (None,) * len(stats.STATS_FIELDS)
+    # Deferred fields cannot be fetched any more; fall back to what is in memory
+    stats.booking_deleted(tuple(
+        old if old is not None else instance.__dict__.get(field)
+        for old, field in zip(loaded, stats.STATS_FIELDS)
+    ))
+
+
+@receiver(post_save, sender=BookingRule)
+@receiver(post_delete, sender=BookingRule)
+def invalidate_rules(sender, instance, **kwargs):
+    """Drop the cached rule snapshot everywhere once the write is committed"""
+    transaction.on_commit(rules_changed)
+
+
+@receiver(post_save, sender=Booking)
+@receiver(post_delete, sender=Booking)
+@receiver(post_save, sender=Room)
+@receiver(post_delete, sender=Room)
+def invalidate_dashboard(sender, instance, **kwargs):
+    """Drop the cached admin dashboard once the write is committed"""
+    transaction.on_commit(dashboard_changed)
+
+
+@receiver(post_save, sender=Room)
+@receiver(post_delete, sender=Room)
+def invalidate_room_catalog(sender, instance, **kwargs):
+    """Move the room catalog version once the write is committed"""
+    transaction.on_commit(etags.catalog_changed)
@@ -0,0 +1,154 @@
+# booking/slots.py
+"""
+Free slot search across rooms.
+
+Takes the active bookings of every matching room from the availability
+indexes (rooms whose index is missing or out of date are loaded together in
+one query), sweeps each room/day to find the gaps inside opening hours and
+keeps the k candidates closest to the preferred start time.
+"""
+import heapq
+from collections import namedtuple
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+
+from django.utils import timezone
+
+from .availability import get_room_indexes
+from .models import Room
+from .occupancy import SLOT_MINUTES
+from .rules import get_active_rule
+
+# Used when no active BookingRule defines opening hours
+DEFAULT_OPENING_TIME = time(8, 0)
+DEFAULT_CLOSING_TIME = time(22, 0)
+
+# Rooms have no building relation; buildings are encoded in the room number
+BUILDING_PREFIXES = {
+    '1': 'A-',
+    '2': 'S-',
+    '3': 'L-',
+    '4': 'B-',
+}
+
+FreeSlot = namedtuple('FreeSlot', ['room', 'start', 'end', 'distance'])
+
+
+def filter_rooms(rooms=None, capacity=None, room_type=None, building=None):
+    """Bookable rooms matching the search criteria"""
+    if rooms is None:
+        rooms = Room.objects.all()
+    rooms = rooms.filter(is_available=True, availability_status='available')
+    if capacity:
+        rooms = rooms.filter(capacity__gte=capacity)
+    if room_type:
+        rooms = rooms.filter(room_type=room_type)
+    if building:
+        prefix = BUILDING_PREFIXES.get(str(building), str(building))
+        rooms = rooms.filter(room_number__startswith=prefix)
+    return rooms
+
+
+def _opening_hours():
+    rule = get_active_rule()
+    if rule:
+        return rule.booking_start_time, rule.booking_end_time
+    return DEFAULT_OPENING_TIME, DEFAULT_CLOSING_TIME
+
+
+def find_free_slots(duration, date_from, date_to=None, preferred=None, rooms=None,
+                    capacity=None, room_type=None, building=None, limit=5, user_id=None):
+    """Return up to `limit` FreeSlots ranked by distance from `preferred`
+
+    `duration` is a timedelta, `preferred` an aware datetime (defaults to now).
+    Candidate starts are aligned to SLOT_MINUTES. Live holds count as busy
+    unless they belong to `user_id`.
+    """
+    date_to = date_to or date_from
+    now = timezone.now()
+    preferred = preferred or now
+    length = int(duration.total_seconds())
+    if length <= 0 or limit <= 0 or date_to < date_from:
+        return []
+
+    room_map = {room.id: room for room in filter_rooms(rooms, capacity, room_type, building)}
+    if not room_map:
+        return []
+
+    step = SLOT_MINUTES * 60
+    earliest = now.timestamp()
+    target = preferred.timestamp()
+
+    opening, closing = _opening_hours()
+    days = []
+    day = date_from
+    while day <= date_to:
+        day_open = timezone.make_aware(datetime.combine(day, opening)).timestamp()
+        day_close = timezone.make_aware(datetime.combine(day, closing)).timestamp()
+        if max(day_open, earliest) + length <= day_close:
+            # Closest any slot of this day can get to the target
+            bound = max(0, day_open - target, target - (day_close - length))
+            days.append((day_open, day_close, bound))
+        day += timedelta(days=1)
+    if not days:
+        return []
+
+    indexes = get_room_indexes(room_map)
+
+    # Min-heap of the worst kept candidate, as (-distance, -start, -room_id),
+    # capped at `limit`; ties go to the earlier start, then the lower room id
+    best = []
+
+    for room_id in sorted(room_map):
+        index = indexes[room_id]
+        starts, ends = index.start_stamps, index.end_stamps
+        held = [
+            (hold_start.timestamp(), hold_end.timestamp())
+            for hold_start, hold_end, expires_at, holder_id in index.holds
+            if expires_at > now and holder_id != user_id
+        ]
+        if held:
+            busy = sorted(list(zip(starts, ends)) + held)
+            starts, ends = [start for start, _ in busy], [end for _, end in busy]
+        count = len(starts)
+        i = 0
+        for day_open, day_close, bound in days:
+            if len(best) == limit and bound > -best[0][0]:
+                continue
+            cursor = max(day_open, earliest)
+            # Skip bookings that ended before this day's window
+            while i < count and ends[i] <= cursor:
+                i += 1
+            j = i
+            while cursor + length <= day_close:
+                if j < count and starts[j] < day_close:
+                    gap_end = starts[j]
+                else:
+                    gap_end = day_close
+                # Earliest aligned start in the gap, then the one nearest the target
+                first = -(-cursor // step) * step
+                last = gap_end - length
+                if first <= last and (len(best) < limit or max(first - target, target - last) <= -best[0][0]):
+                    candidate = min(max(target - (target - first) % step, first), last - (last - first) % step)
+                    if candidate + step <= last and abs(candidate + step - target) < abs(candidate - target):
+                        candidate += step
+                    item = (-abs(candidate - target), -candidate, -room_id)
+                    if len(best) < limit:
+                        heapq.heappush(best, item)
+                    elif item > best[0]:
+                        heapq.heapreplace(best, item)
+                if j >= count or starts[j] >= day_close:
+                    break
+                cursor = max(cursor, ends[j])
+                j += 1
+
+    slots = []
+    for neg_distance, neg_start, neg_room_id in sorted(best, reverse=True):
+        start, room_id = -neg_start, -neg_room_id
+        start_dt = timezone.localtime(datetime.fromtimestamp(start, tz=dt_timezone.utc))
+        slots.append(FreeSlot(
+            room=room_map[room_id],
+            start=start_dt,
+            end=start_dt + duration,
+            distance=timedelta(seconds=-neg_distance),
+        ))
+    return slots
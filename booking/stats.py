@@ -0,0 +1,144 @@
+# booking/stats.py
+"""
+Daily booking statistics rollup.
+
+BookingDailyStats holds, for every local date, room and status, how many
+bookings were made and how many minutes they cover. The Booking signals
+move a booking between rows whenever its room, status or times change,
+inside the same transaction as the write, so the admin statistics read a
+few rows per day instead of every booking.
+`manage.py backfill_booking_stats` rebuilds the rollup from the bookings
+table.
+"""
+from collections import Counter, defaultdict
+
+from django.db import transaction
+from django.db.models import F, Sum
+from django.utils import timezone
+
+from .models import Booking, BookingDailyStats
+from .occupancy import day_bounds
+
+STATS_FIELDS = ('created_at', 'room_id', 'status', 'start_time', 'end_time')
+
+
+def _minutes(start_time, end_time):
+    return int((end_time - start_time).total_seconds() // 60)
+
+
+def _counted(created_at, room_id, status, start_time, end_time):
+    """((date, room_id, status), minutes) a booking counts under, or None"""
+    if not (created_at and room_id and status and start_time and end_time):
+        return None
+    return (timezone.localtime(created_at).date(), room_id, status), _minutes(start_time, end_time)
+
+
+def stats_fields(booking):
+    return tuple(getattr(booking, field) for field in STATS_FIELDS)
+
+
+def _add(key, count, minutes):
+    """Add to the counters of one (date, room, status) row"""
+    day, room_id, status = key
+    rows = BookingDailyStats.objects.filter(date=day, room_id=room_id, status=status)
+    if rows.update(count=F('count') + count, booked_minutes=F('booked_minutes') + minutes) or count < 0:
+        return
+    # First booking of the row; a concurrent writer may create it too
+    BookingDailyStats.objects.bulk_create(
+        [BookingDailyStats(date=day, room_id=room_id, status=status)],
+        ignore_conflicts=True,
+    )
+    rows.update(count=F('count') + count, booked_minutes=F('booked_minutes') + minutes)
+
+
+def booking_changed(booking, previous=None):
+    """Move a saved booking from the row it was loaded under to its current one
+
+    `previous` holds the STATS_FIELDS the booking was loaded with, or None
+    for a new booking.
+    """
+    old = _counted(*previous) if previous else None
+    new = _counted(*stats_fields(booking))
+    if old == new:
+        return
+    with transaction.atomic():
+        if old:
+            _add(old[0], -1, -old[1])
+        if new:
+            _add(new[0], 1, new[1])
+
+
+def booking_deleted(fields):
+    """Remove a deleted booking from the rollup"""
+    counted = _counted(*fields)
+    if counted:
+        _add(counted[0], -1, -counted[1])
+
+
+def _apply(deltas):
+    with transaction.atomic():
+        for key, (count, minutes) in sorted(deltas.items()):
+            if count:
+                _add(key, count, minutes)
+
+
+def bookings_added(bookings):
+    """Count bookings inserted without signals (bulk_create)"""
+    deltas = defaultdict(lambda: [0, 0])
+    for booking in bookings:
+        counted = _counted(*stats_fields(booking))
+        if counted:
+            deltas[counted[0]][0] += 1
+            deltas[counted[0]][1] += counted[1]
+    _apply(deltas)
+
+
+def status_changed(rows, old_status, new_status):
+    """Move bookings whose status was changed without signals (bulk .update())
+
+    `rows` are (created_at, room_id, start_time, end_time) tuples.
+    """
+    deltas = defaultdict(lambda: [0, 0])
+    for created_at, room_id, start_time, end_time in rows:
+        day = timezone.localtime(created_at).date()
+        minutes = _minutes(start_time, end_time)
+        for status, sign in ((old_status, -1), (new_status, 1)):
+            deltas[(day, room_id, status)][0] += sign
+            deltas[(day, room_id, status)][1] += sign * minutes
+    _apply(deltas)
+
+
+def status_counts():
+    """Number of bookings per status, summed from the rollup in one grouped query"""
+    rows = BookingDailyStats.objects.order_by().values_list('status').annotate(total=Sum('count'))
+    return {status: total or 0 for status, total in rows}
+
+
+def rebuild_stats(date_from=None, date_to=None, batch_size=1000):
+    """Recompute BookingDailyStats from the bookings table and return the row count"""
+    bookings = Booking.objects.all()
+    rows = BookingDailyStats.objects.all()
+    if date_from:
+        bookings = bookings.filter(created_at__gte=day_bounds(date_from)[0])
+        rows = rows.filter(date__gte=date_from)
+    if date_to:
+        bookings = bookings.filter(created_at__lt=day_bounds(date_to)[1])
+        rows = rows.filter(date__lte=date_to)
+
+    counts = Counter()
+    minutes = Counter()
+    for fields in bookings.order_by().values_list(*STATS_FIELDS).iterator(chunk_size=2000):
+        counted = _counted(*fields)
+        if counted:
+            counts[counted[0]] += 1
+            minutes[counted[0]] += counted[1]
+
+    objects = [
+        BookingDailyStats(date=day, room_id=room_id, status=status, count=count,
+                          booked_minutes=minutes[(day, room_id, status)])
+        for (day, room_id, status), count in counts.items()
+    ]
+    with transaction.atomic():
+        rows.delete()
+        BookingDailyStats.objects.bulk_create(objects, batch_size=batch_size)
+    return len(objects)
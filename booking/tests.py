@@ -0,0 +1,34 @@
+from datetime import timedelta
+
+from django.test import TestCase
+from django.utils import timezone
+
+from accounts.models import User
+from .models import Booking, BookingRule, Room
+
+
+class CancellationRuleTests(TestCase):
+    """Booking.can_be_modified() and with_eligibility() apply the same rule"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email='student@example.com', student_id='e20190001', phone_number='012345678',
+            first_name='Test', last_name='Student',
+        )
+        self.room = Room.objects.create(name='Lab 1', room_number='L-101', capacity=30)
+        BookingRule.objects.create(name='Global', min_cancel_hours=2)
+        BookingRule.objects.create(name='Lab 1', room=self.room, min_cancel_hours=48)
+        self.booking = Booking.objects.create(
+            user=self.user, room=self.room, purpose='Study group', status='pending',
+            start_time=timezone.now() + timedelta(hours=36),
+            end_time=timezone.now() + timedelta(hours=37),
+        )
+
+    def test_room_rule_applies_to_model_methods_and_annotation(self):
+        annotated = Booking.objects.with_eligibility().get(pk=self.booking.pk)
+
+        self.assertEqual(self.booking.get_cancellation_deadline(), self.booking.start_time - timedelta(hours=48))
+        self.assertEqual(annotated.cancel_deadline, self.booking.get_cancellation_deadline())
+        self.assertFalse(self.booking.can_be_cancelled())
+        self.assertFalse(self.booking.can_be_modified())
+        self.assertEqual(annotated.is_modifiable, self.booking.can_be_modified())
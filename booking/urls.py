@@ -14,6 +14,8 @@ urlpatterns = [
 
     # Admin URLs - using admin_views
     path('admin/dashboard/', admin_views.admin_dashboard, name='admin_dashboard'),
+    path('admin/dashboard/counters/', admin_views.admin_dashboard_counters, name='admin_dashboard_counters'),
+    path('admin/dashboard/stream/', admin_views.admin_dashboard_stream, name='admin_dashboard_stream'),
     path('admin/rooms/', admin_views.admin_room_list, name='admin_room_list'),
     path('admin/rooms/create/', admin_views.admin_room_create, name='admin_room_create'),
     path('admin/rooms/<int:room_id>/edit/', admin_views.admin_room_edit, name='admin_room_edit'),
@@ -24,10 +26,14 @@ urlpatterns = [
     # Admin booking management
     path('admin/bookings/', admin_views.admin_booking_list, name='admin_booking_list'),
     path('admin/bookings/create/', admin_views.admin_booking_create, name='admin_booking_create'),
+    path('admin/bookings/export/', admin_views.admin_booking_export, name='admin_booking_export'),
     path('admin/bookings/<int:booking_id>/edit/', admin_views.admin_booking_edit, name='admin_booking_edit'),
     path('admin/bookings/<int:booking_id>/delete/', admin_views.admin_booking_delete, name='admin_booking_delete'),
     path('admin/bookings/<int:booking_id>/update-status/', admin_views.admin_booking_update_status, name='admin_booking_update_status'),
     
+    # Admin analytics
+    path('admin/utilization/', admin_views.admin_utilization, name='admin_utilization'),
+    
     # Admin system configuration
     path('admin/booking-rules/', admin_views.admin_booking_rules, name='admin_booking_rules'),
     path('admin/announcements/', admin_views.admin_announcements, name='admin_announcements'),
@@ -43,12 +49,14 @@ urlpatterns = [
     # Admin AJAX endpoints
     path('admin/api/room-availability/', admin_views.admin_get_room_availability, name='admin_get_room_availability'),
     path('admin/api/booking-stats/', admin_views.admin_booking_stats, name='admin_booking_stats'),
+    path('admin/api/utilization/', admin_views.admin_utilization_api, name='admin_utilization_api'),
 
     # User dashboard
     path('dashboard/', views.user_dashboard, name='user_dashboard'),
     
     # User booking URLs
     path('create/', views.create_booking, name='create_booking'),
+    path('create/recurring/', views.create_recurring_booking, name='create_recurring_booking'),
     path('my-bookings/', views.user_bookings, name='user_bookings'),
     path('bookings/<int:booking_id>/', views.booking_detail, name='booking_detail'),
     path('bookings/<int:booking_id>/cancel/', views.cancel_booking, name='cancel_booking'),
@@ -59,5 +67,7 @@ urlpatterns = [
     # AJAX endpoints
     path('api/check-availability/', views.check_room_availability, name='check_room_availability'),
     path('api/rooms-availability/', views.rooms_api_availability, name='rooms_api_availability'),
+    path('api/free-slots/', views.free_slots_api, name='free_slots_api'),
+    path('api/heatmap/', views.heatmap_api, name='heatmap_api'),
     path('check-availability/', views.check_availability, name='check_availability'),
 ]
\ No newline at end of file
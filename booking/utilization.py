@@ -0,0 +1,216 @@
+# booking/utilization.py
+"""
+Room utilization analytics.
+
+Booking intervals for the range are read from the database in primary key
+batches and each batch is added to a rooms x slots difference array (the
+same trick as booking.heatmap) as soon as it arrives, so no list of
+bookings is kept. The difference array is then summed block by block of
+days into a rooms x days x 15-minute-slots boolean array, and each block
+is folded into running totals per room, per hour of day and per weekday
+before the next one is built. Memory depends on the number of rooms and
+days, not on how many bookings there are.
+
+Occupancy percentages are booked slots over available slots. Per-room and
+per-weekday figures only count the opening hours (the global booking
+rule's booking window, or the whole day when it has none); per-hour
+figures cover all 24 hours. Attendee efficiency is attendees over room
+capacity, weighted by how long each booking lasts inside the range.
+"""
+from collections import namedtuple
+from datetime import datetime, time, timedelta
+
+import numpy as np
+from django.utils import timezone
+
+from .availability import ACTIVE_STATUSES
+from .models import Booking
+from .occupancy import SLOT_MINUTES, SLOTS_PER_DAY
+from .rules import get_active_rule
+
+SLOT_SECONDS = SLOT_MINUTES * 60
+SLOTS_PER_HOUR = 60 // SLOT_MINUTES
+
+# Bookings that held the room, including those that already took place
+UTILIZED_STATUSES = ACTIVE_STATUSES + ('completed',)
+
+# Days rasterized at a time
+BLOCK_DAYS = 28
+
+WEEKDAYS = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+
+Utilization = namedtuple('Utilization', [
+    'room_ids',
+    'first_day',
+    'days',
+    'open_slots',       # (first, last) slot of the day counted as opening hours
+    'by_room',          # (rooms,) occupancy % in opening hours
+    'by_room_hour',     # (rooms, 24) occupancy % per hour of day
+    'by_room_weekday',  # (rooms, 7) occupancy % in opening hours per weekday
+    'by_weekday_hour',  # (7, 24) occupancy % over all rooms
+    'efficiency',       # (rooms,) attendees / capacity %, NaN without bookings
+    'bookings',         # (rooms,) bookings overlapping the range
+])
+
+
+def opening_slots():
+    """(first, last) slot of the day that counts as opening hours"""
+    rule = get_active_rule()
+    if rule is None or rule.booking_start_time is None or rule.booking_end_time is None:
+        return 0, SLOTS_PER_DAY
+    start, end = rule.booking_start_time, rule.booking_end_time
+    first = (start.hour * 60 + start.minute) // SLOT_MINUTES
+    last = -(-(end.hour * 60 + end.minute) // SLOT_MINUTES)
+    if last <= first:
+        return 0, SLOTS_PER_DAY
+    return first, last
+
+
+def stream_intervals(room_ids, range_start, range_end, chunk_size=5000):
+    """Yield arrays (rows, starts, ends, attendees) of the bookings overlapping the range
+
+    One tuple per batch of at most `chunk_size` bookings, fetched by
+    primary key (id > last id seen) so that drivers which buffer whole
+    result sets, like PyMySQL, still hold one batch at a time. Starts and
+    ends are POSIX timestamps; rows index into `room_ids`.
+    """
+    position = {room_id: row for row, room_id in enumerate(room_ids)}
+    bookings = Booking.objects.filter(
+        room_id__in=room_ids,
+        status__in=UTILIZED_STATUSES,
+        start_time__lt=range_end,
+        end_time__gt=range_start,
+    ).order_by('id').values_list('id', 'room_id', 'start_time', 'end_time', 'attendees')
+    last_id = 0
+    while True:
+        batch = list(bookings.filter(id__gt=last_id)[:chunk_size])
+        if not batch:
+            return
+        last_id = batch[-1][0]
+        yield (
+            np.asarray([position[room_id] for _, room_id, _, _, _ in batch], dtype=np.intp),
+            np.asarray([start_time.timestamp() for _, _, start_time, _, _ in batch], dtype=np.float64),
+            np.asarray([end_time.timestamp() for _, _, _, end_time, _ in batch], dtype=np.float64),
+            np.asarray([count or 0 for _, _, _, _, count in batch], dtype=np.float64),
+        )
+        if len(batch) < chunk_size:
+            return
+
+
+def _percent(booked, available):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(available > 0, 100.0 * booked / available, 0.0)
+
+
+def compute_utilization(rooms, first_day, last_day):
+    """Utilization of `rooms` from `first_day` to `last_day` inclusive"""
+    rooms = list(rooms)
+    room_ids = [room.id for room in rooms]
+    n_rooms = len(room_ids)
+    days = (last_day - first_day).days + 1
+    open_first, open_last = opening_slots()
+
+    origin = timezone.make_aware(datetime.combine(first_day, time.min))
+    range_start = origin.timestamp()
+    range_end = range_start + days * SLOTS_PER_DAY * SLOT_SECONDS
+    n_slots = days * SLOTS_PER_DAY
+
+    diff = np.zeros((n_rooms, n_slots + 1), dtype=np.int32)
+    bookings = np.zeros(n_rooms, dtype=np.int64)
+    attended = np.zeros(n_rooms, dtype=np.float64)
+    held = np.zeros(n_rooms, dtype=np.float64)
+    for rows, starts, ends, attendees in stream_intervals(room_ids, origin, origin + timedelta(days=days)):
+        # Slot positions relative to the start of the range
+        first = np.clip(np.floor((starts - range_start) / SLOT_SECONDS), 0, n_slots).astype(np.intp)
+        last = np.clip(np.ceil((ends - range_start) / SLOT_SECONDS), 0, n_slots).astype(np.intp)
+        np.add.at(diff, (rows, first), 1)
+        np.add.at(diff, (rows, last), -1)
+
+        # Attendees over capacity, weighted by the time each booking spends in the range
+        duration = np.clip(np.minimum(ends, range_end) - np.maximum(starts, range_start), 0, None)
+        attended += np.bincount(rows, weights=attendees * duration, minlength=n_rooms)
+        held += np.bincount(rows, weights=duration, minlength=n_rooms)
+        bookings += np.bincount(rows, minlength=n_rooms)
+
+    room_hour = np.zeros((n_rooms, 24), dtype=np.int64)
+    room_weekday = np.zeros((n_rooms, 7), dtype=np.int64)
+    weekday_hour = np.zeros((7, 24), dtype=np.int64)
+    weekdays = (first_day.weekday() + np.arange(days)) % 7
+    # Bookings still running at the end of the previous block, per room
+    running = np.zeros(n_rooms, dtype=np.int32)
+
+    for block_start in range(0, days, BLOCK_DAYS):
+        block_days = min(BLOCK_DAYS, days - block_start)
+        lo = block_start * SLOTS_PER_DAY
+        hi = lo + block_days * SLOTS_PER_DAY
+        depth = running[:, None] + np.cumsum(diff[:, lo:hi], axis=1)
+        running = depth[:, -1]
+        booked = (depth > 0).reshape(n_rooms, block_days, SLOTS_PER_DAY)
+
+        hourly = booked.reshape(n_rooms, block_days, 24, SLOTS_PER_HOUR).sum(axis=3)
+        room_hour += hourly.sum(axis=1)
+        open_booked = booked[:, :, open_first:open_last].sum(axis=2)
+        block_weekdays = weekdays[block_start:block_start + block_days]
+        for weekday in range(7):
+            on_weekday = block_weekdays == weekday
+            if on_weekday.any():
+                room_weekday[:, weekday] += open_booked[:, on_weekday].sum(axis=1)
+                weekday_hour[weekday] += hourly[:, on_weekday].sum(axis=(0, 1))
+
+    days_per_weekday = np.bincount(weekdays, minlength=7)
+    open_slots_per_day = open_last - open_first
+
+    capacity = np.asarray([room.capacity or 0 for room in rooms], dtype=np.float64)
+    held *= capacity
+    with np.errstate(divide='ignore', invalid='ignore'):
+        efficiency = np.where(held > 0, 100.0 * attended / held, np.nan)
+
+    return Utilization(
+        room_ids=room_ids,
+        first_day=first_day,
+        days=days,
+        open_slots=(open_first, open_last),
+        by_room=_percent(room_weekday.sum(axis=1), days * open_slots_per_day),
+        by_room_hour=_percent(room_hour, days * SLOTS_PER_HOUR),
+        by_room_weekday=_percent(room_weekday, days_per_weekday * open_slots_per_day),
+        by_weekday_hour=_percent(weekday_hour, days_per_weekday[:, None] * SLOTS_PER_HOUR * n_rooms),
+        efficiency=efficiency,
+        bookings=bookings,
+    )
+
+
+def _rounded(values):
+    return [None if np.isnan(value) else round(float(value), 1) for value in values]
+
+
+def build_report(rooms, first_day, last_day):
+    """JSON-ready utilization report"""
+    rooms = list(rooms)
+    result = compute_utilization(rooms, first_day, last_day)
+    open_first, open_last = result.open_slots
+    return {
+        'start_date': first_day.strftime('%Y-%m-%d'),
+        'end_date': last_day.strftime('%Y-%m-%d'),
+        'days': result.days,
+        'opening_hours': {
+            'start': f'{open_first * SLOT_MINUTES // 60:02d}:{open_first * SLOT_MINUTES % 60:02d}',
+            'end': f'{open_last * SLOT_MINUTES // 60:02d}:{open_last * SLOT_MINUTES % 60:02d}',
+        },
+        'weekdays': WEEKDAYS,
+        'rooms': [{
+            'id': room.id,
+            'name': room.name,
+            'room_number': room.room_number,
+            'capacity': room.capacity,
+            'bookings': int(bookings),
+            'occupancy': round(float(occupancy), 1),
+            'efficiency': efficiency,
+            'by_hour': _rounded(by_hour),
+            'by_weekday': _rounded(by_weekday),
+        } for room, bookings, occupancy, efficiency, by_hour, by_weekday in zip(
+            rooms, result.bookings, result.by_room, _rounded(result.efficiency),
+            result.by_room_hour, result.by_room_weekday,
+        )],
+        # Occupancy of all rooms together, weekday x hour of day
+        'by_weekday_hour': [_rounded(row) for row in result.by_weekday_hour],
+    }
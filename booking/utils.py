@@ -1,12 +1,13 @@
 from django.utils import timezone
 from datetime import timedelta
-from .models import Booking, BookingRule
+from .quotas import get_usage
+from .rules import get_active_rule
 
 class BookingRuleEnforcer:
     """Utility class to enforce booking rules"""
     
     def __init__(self):
-        self.rules = BookingRule.objects.first()
+        self.rules = get_active_rule()
     
     def validate_booking_duration(self, start_time, end_time):
         """Validate booking duration against rules"""
@@ -59,22 +60,8 @@ class BookingRuleEnforcer:
         if not date:
             date = timezone.now().date()
         
-        # Daily bookings
-        daily_bookings = Booking.objects.filter(
-            user=user,
-            start_time__date=date,
-            status__in=['pending', 'confirmed']
-        ).count()
-        
-        # Weekly bookings
-        week_start = date - timedelta(days=date.weekday())
-        week_end = week_start + timedelta(days=6)
-        
-        weekly_bookings = Booking.objects.filter(
-            user=user,
-            start_time__date__range=[week_start, week_end],
-            status__in=['pending', 'confirmed']
-        ).count()
+        # Daily and weekly bookings from the quota counters
+        daily_bookings, weekly_bookings = get_usage(user.pk, date)
         
         return {
             'daily_bookings': daily_bookings,
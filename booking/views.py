@@ -4,11 +4,14 @@ from django.contrib.auth.decorators import login_required
 from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib import messages
 from django.core.paginator import Paginator
+from django.db import transaction
 from django.db.models import Q, Count
 from django.http import JsonResponse, HttpResponse
 from django.utils import timezone
-from django.views.decorators.http import require_http_methods
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition, require_http_methods
 from django.views.decorators.csrf import csrf_exempt
+from django.core.exceptions import ValidationError
 from datetime import datetime, timedelta, time
 from django.contrib.auth import get_user_model
 from .models import Room, Booking, BookingRule, Announcement  
@@ -16,10 +19,18 @@ from .models import Room, Booking, BookingRule, Announcement
 User = get_user_model()
 
 from booking.utils import BookingRuleEnforcer
+from booking.services import place_booking, book_series, SeriesConflictError
+from booking.availability import room_has_conflict
+from booking.email_utils import send_admin_notification_email, send_booking_cancellation_email
+from booking.etags import day_key, make_etag, room_day_key
+from booking.slots import find_free_slots
+from booking.occupancy import filter_free_rooms, get_day_occupancy, occupancy_string, slot_mask
+from booking.quotas import get_usage
+from booking.rules import resolve_rule
 from .models import Room, Booking, BookingRule
 from .forms import (
     RoomForm, RoomSearchForm, BookingForm, BookingSearchForm, 
-    QuickBookingForm, BookingRuleForm, 
+    QuickBookingForm, BookingRuleForm, RecurringBookingForm,
 )
 import json
 
@@ -67,20 +78,9 @@ def room_list(request):
         if available_only:
             rooms = rooms.filter(is_available=True)
         
-        # Filter by date/time availability
+        # Filter by date/time availability using the occupancy bitmaps
         if availability_date and start_time and end_time:
-            # Convert to datetime objects
-            start_datetime = datetime.combine(availability_date, start_time)
-            end_datetime = datetime.combine(availability_date, end_time)
-            
-            # Find rooms that don't have conflicting bookings
-            conflicting_bookings = Booking.objects.filter(
-                start_time__lt=end_datetime,
-                end_time__gt=start_datetime,
-                status__in=['confirmed', 'pending']
-            ).values_list('room_id', flat=True)
-            
-            rooms = rooms.exclude(id__in=conflicting_bookings)
+            rooms = filter_free_rooms(rooms, availability_date, start_time, end_time)
     
     # Pagination
     paginator = Paginator(rooms, 12)  # Show 12 rooms per page
@@ -341,71 +341,6 @@ def booking_detail(request, booking_id):
     
     return render(request, 'UserPage/booking-detail.html', context)
 
-@login_required
-def cancel_booking(request, booking_id):
-    """Cancel a booking"""
-    booking = get_object_or_404(Booking, id=booking_id, user=request.user)
-    
-    if booking.status not in ['pending', 'confirmed']:
-        messages.error(request, 'This booking cannot be cancelled.')
-        return redirect('booking_detail', booking_id=booking.id)
-    
-    # Check cancellation rules
-    enforcer = BookingRuleEnforcer()
-    if enforcer.rules:
-        can_cancel, message = enforcer.rules.can_cancel_booking(booking)
-        if not can_cancel:
-            messages.error(request, message)
-            return redirect('booking_detail', booking_id=booking.id)
-    
-    if request.method == 'POST':
-        booking.status = 'cancelled'
-        booking.save()
-        messages.success(request, 'Booking cancelled successfully.')
-        return redirect('user_bookings')
-    
-    return render(request, 'UserPage/booked.html', {'booking': booking})
-
-@login_required
-def modify_booking(request, booking_id):
-    """Modify an existing booking"""
-    booking = get_object_or_404(Booking, id=booking_id, user=request.user)
-    
-    if booking.status not in ['pending', 'confirmed']:
-        messages.error(request, 'This booking cannot be modified.')
-        return redirect('booking_detail', booking_id=booking.id)
-    
-    # Check modification rules
-    enforcer = BookingRuleEnforcer()
-    can_modify, message = enforcer.can_modify_booking(booking)
-    if not can_modify:
-        messages.error(request, message)
-        return redirect('booking_detail', booking_id=booking.id)
-    
-    if request.method == 'POST':
-        form = BookingForm(request.POST, instance=booking, user=request.user)
-        if form.is_valid():
-            modified_booking = form.save(commit=False)
-            modified_booking.start_time = form.cleaned_data['start_datetime']
-            modified_booking.end_time = form.cleaned_data['end_datetime']
-            modified_booking.save()
-            
-            messages.success(request, 'Booking modified successfully.')
-            return redirect('booking_detail', booking_id=booking.id)
-    else:
-        # Populate form with existing booking data
-        initial_data = {
-            'start_date': booking.start_time.date(),
-            'start_time': booking.start_time.time(),
-            'end_time': booking.end_time.time(),
-        }
-        form = BookingForm(instance=booking, user=request.user, initial=initial_data)
-    
-    return render(request, 'UserPage/booking.html', {
-        'form': form,
-        'booking': booking
-    })
-
 @login_required
 def booking_calendar(request):
     """Calendar view of user's bookings"""
@@ -463,15 +398,7 @@ def check_availability(request):
             })
         
         # Check for booking conflicts
-        conflicts = Booking.objects.filter(
-            room=room,
-            date=booking_date,
-            status__in=['confirmed', 'pending']
-        ).filter(
-            Q(start_time__lt=end_time) & Q(end_time__gt=start_time)
-        )
-
-        if conflicts.exists():
+        if room_has_conflict(room.pk, start_datetime, end_datetime):
             # Get suggested alternative times
             suggested_times = get_suggested_times(room, booking_date, start_time, end_time)
             return JsonResponse({
@@ -546,112 +473,40 @@ def check_conflicts(request):
             'error': str(e)
         })
 
-def get_suggested_times(room, date, preferred_start, preferred_end):
+def get_suggested_times(room, date, preferred_start, preferred_end, limit=3):
     """Generate suggested available time slots"""
     duration = datetime.combine(date, preferred_end) - datetime.combine(date, preferred_start)
-    duration_minutes = int(duration.total_seconds() / 60)
-    
-    # Get all bookings for the day
-    existing_bookings = Booking.objects.filter(
-        room=room,
-        date=date,
-        status__in=['confirmed', 'pending']
-    ).order_by('start_time')
-    
-    # Define operating hours (8 AM to 10 PM)
-    operating_start = time(8, 0)
-    operating_end = time(22, 0)
-    
-    suggested_times = []
-    current_time = operating_start
-    
-    for booking in existing_bookings:
-        # Check if there's a gap before this booking
-        if current_time < booking.start_time:
-            potential_end = min(
-                (datetime.combine(date, current_time) + timedelta(minutes=duration_minutes)).time(),
-                booking.start_time
-            )
-            
-            if (datetime.combine(date, potential_end) - datetime.combine(date, current_time)).total_seconds() >= duration_minutes * 60:
-                suggested_times.append({
-                    'start_time': current_time.strftime('%H:%M'),
-                    'end_time': potential_end.strftime('%H:%M')
-                })
-        
-        current_time = max(current_time, booking.end_time)
-        
-        if len(suggested_times) >= 3:  # Limit suggestions
-            break
-    
-    # Check for availability after last booking
-    if current_time < operating_end and len(suggested_times) < 3:
-        potential_end = min(
-            (datetime.combine(date, current_time) + timedelta(minutes=duration_minutes)).time(),
-            operating_end
-        )
-        
-        if (datetime.combine(date, potential_end) - datetime.combine(date, current_time)).total_seconds() >= duration_minutes * 60:
-            suggested_times.append({
-                'start_time': current_time.strftime('%H:%M'),
-                'end_time': potential_end.strftime('%H:%M')
-            })
-    
-    return suggested_times
+    preferred = timezone.make_aware(datetime.combine(date, preferred_start))
+    slots = find_free_slots(
+        duration,
+        date_from=date,
+        preferred=preferred,
+        rooms=Room.objects.filter(pk=room.pk),
+        limit=limit,
+    )
+    return [{
+        'start_time': slot.start.strftime('%H:%M'),
+        'end_time': slot.end.strftime('%H:%M')
+    } for slot in slots]
 
 def check_booking_rules(user, room, start_datetime, end_datetime):
-    """Check if booking complies with booking rules"""
+    """Check if booking complies with the rule scoped to the room and user"""
     try:
-        rules = BookingRule.objects.first()
+        rules = resolve_rule(room, user)
         if not rules:
             return {'valid': True}
         
-        # Check maximum duration
-        duration = end_datetime - start_datetime
-        if duration.total_seconds() / 3600 > rules.max_duration_hours:
-            return {
-                'valid': False,
-                'message': f'Booking duration cannot exceed {rules.max_duration_hours} hours'
-            }
-        
-        # Check daily limit
-        today = start_datetime.date()
-        today_bookings = Booking.objects.filter(
-            user=user,
-            date=today,
-            status__in=['confirmed', 'pending']
-        ).count()
-        
-        if today_bookings >= rules.daily_limit:
-            return {
-                'valid': False,
-                'message': f'Daily booking limit of {rules.daily_limit} bookings exceeded'
-            }
-        
-        # Check weekly limit
-        week_start = today - timedelta(days=today.weekday())
-        week_end = week_start + timedelta(days=6)
-        
-        weekly_bookings = Booking.objects.filter(
-            user=user,
-            date__range=[week_start, week_end],
-            status__in=['confirmed', 'pending']
-        ).count()
-        
-        if weekly_bookings >= rules.weekly_limit:
-            return {
-                'valid': False,
-                'message': f'Weekly booking limit of {rules.weekly_limit} bookings exceeded'
-            }
-        
-        # Check advance booking limit
-        now = timezone.now()
-        advance_days = (start_datetime.date() - now.date()).days
+        if timezone.is_naive(start_datetime):
+            start_datetime = timezone.make_aware(start_datetime)
+            end_datetime = timezone.make_aware(end_datetime)
         
-        if advance_days > rules.advance_booking_days:
+        # Daily and weekly counts from the quota counters
+        today_bookings, weekly_bookings = get_usage(user.pk, timezone.localtime(start_datetime).date())
+        message = rules.check_request(start_datetime, end_datetime, today_bookings, weekly_bookings)
+        if message:
             return {
                 'valid': False,
-                'message': f'Cannot book more than {rules.advance_booking_days} days in advance'
+                'message': message
             }
         
         return {'valid': True}
@@ -741,6 +596,21 @@ def room_list(request):
     if availability_status:
         rooms = rooms.filter(availability_status=availability_status)
     
+    # Filter to rooms free for a time window on a given day
+    free_date = request.GET.get('date')
+    free_start = request.GET.get('start_time')
+    free_end = request.GET.get('end_time')
+    if free_date and free_start and free_end:
+        try:
+            rooms = filter_free_rooms(
+                rooms,
+                datetime.strptime(free_date, '%Y-%m-%d').date(),
+                datetime.strptime(free_start, '%H:%M').time(),
+                datetime.strptime(free_end, '%H:%M').time(),
+            )
+        except ValueError:
+            pass
+    
     # Pagination
     paginator = Paginator(rooms, 12)
     page = request.GET.get('page')
@@ -753,6 +623,9 @@ def room_list(request):
         'selected_room_type': room_type,
         'selected_availability_status': availability_status,
         'min_capacity': min_capacity,
+        'selected_date': free_date,
+        'selected_start_time': free_start,
+        'selected_end_time': free_end,
     }
     
     return render(request, 'UserPage/featureRoom.html', context)
@@ -795,13 +668,15 @@ def room_detail(request, room_id):
 def create_booking(request):
     """Create a new booking"""
     if request.method == 'POST':
-        form = BookingForm(request.POST)
+        form = BookingForm(request.POST, user=request.user)
         if form.is_valid():
             booking = form.save(commit=False)
             booking.user = request.user
+            booking.start_time = form.cleaned_data['start_datetime']
+            booking.end_time = form.cleaned_data['end_datetime']
             
             try:
-                booking.save()
+                place_booking(booking)
                 messages.success(request, 'Booking created successfully! Please wait for confirmation.')
                 return redirect('booking:user_bookings')
             except Exception as e:
@@ -809,7 +684,7 @@ def create_booking(request):
         else:
             messages.error(request, 'Please correct the errors below.')
     else:
-        form = BookingForm()
+        form = BookingForm(user=request.user)
     
     # Get available rooms
     rooms = Room.objects.filter(is_available=True, availability_status='available')
@@ -821,6 +696,49 @@ def create_booking(request):
     
     return render(request, 'UserPage/booking.html', context)
 
+@login_required
+def create_recurring_booking(request):
+    """Book the same room every week or two in one submission"""
+    conflicts = []
+    if request.method == 'POST':
+        form = RecurringBookingForm(request.POST)
+        if form.is_valid():
+            series = form.save(commit=False)
+            series.user = request.user
+            
+            try:
+                bookings, conflicts = book_series(
+                    series,
+                    skip_conflicts=form.cleaned_data.get('skip_conflicts'),
+                )
+                if conflicts:
+                    messages.warning(request, f'{len(bookings)} booking(s) created. Skipped {len(conflicts)} date(s) '
+                                              f'that were already booked.')
+                else:
+                    messages.success(request, f'{len(bookings)} recurring booking(s) created! Please wait for confirmation.')
+                return redirect('booking:user_bookings')
+            except SeriesConflictError as e:
+                conflicts = e.conflicts
+                messages.error(request, e.messages[0])
+            except ValidationError as e:
+                messages.error(request, e.messages[0])
+        else:
+            messages.error(request, 'Please correct the errors below.')
+    else:
+        form = RecurringBookingForm()
+    
+    context = {
+        'form': form,
+        'series_conflicts': [{
+            'date': timezone.localtime(start).strftime('%Y-%m-%d'),
+            'start_time': timezone.localtime(start).strftime('%H:%M'),
+            'end_time': timezone.localtime(end).strftime('%H:%M'),
+            'booking_id': booking_id,
+        } for start, end, booking_id in conflicts],
+    }
+    
+    return render(request, 'UserPage/recurringBooking.html', context)
+
 @login_required
 def user_bookings(request):
     """Display user's bookings with filtering"""
@@ -877,8 +795,11 @@ def cancel_booking(request, booking_id):
         return redirect('booking:booking_detail', booking_id=booking_id)
     
     if request.method == 'POST':
-        booking.status = 'cancelled'
-        booking.save()
+        with transaction.atomic():
+            booking.status = 'cancelled'
+            booking.save()
+            send_booking_cancellation_email(booking)
+            send_admin_notification_email(booking, 'cancelled')
         messages.success(request, 'Booking cancelled successfully.')
         return redirect('booking:user_bookings')
     
@@ -913,11 +834,16 @@ def check_room_availability(request):
         # Check if room is available
         is_available = room.is_available_at(start_datetime, end_datetime)
         
-        return JsonResponse({
+        response = {
             'available': is_available,
             'room_name': room.name,
             'message': 'Room is available' if is_available else 'Room is not available for the selected time'
-        })
+        }
+        if not is_available:
+            response['suggested_times'] = get_suggested_times(
+                room, start_datetime.date(), start_datetime.time(), end_datetime.time()
+            )
+        return JsonResponse(response)
         
     except Room.DoesNotExist:
         return JsonResponse({'error': 'Room not found'}, status=404)
@@ -934,14 +860,20 @@ def quick_book(request, room_id):
         return redirect('booking:room_detail', room_id=room_id)
     
     if request.method == 'POST':
-        form = QuickBookingForm(request.POST)
+        form = QuickBookingForm(request.POST, user=request.user)
         if form.is_valid():
-            booking = form.save(commit=False)
-            booking.user = request.user
-            booking.room = room
+            booking = Booking(
+                user=request.user,
+                room=room,
+                start_time=form.cleaned_data['start_datetime'],
+                end_time=form.cleaned_data['end_datetime'],
+                purpose=form.cleaned_data['purpose'],
+                attendees=form.cleaned_data['attendees'],
+            )
+            form.validation.stamp(booking)
             
             try:
-                booking.save()
+                place_booking(booking)
                 messages.success(request, 'Booking created successfully!')
                 return redirect('booking:booking_detail', booking_id=booking.id)
             except Exception as e:
@@ -949,7 +881,7 @@ def quick_book(request, room_id):
         else:
             messages.error(request, 'Please correct the errors below.')
     else:
-        form = QuickBookingForm()
+        form = QuickBookingForm(user=request.user)
     
     context = {
         'form': form,
@@ -987,53 +919,111 @@ def booking_calendar(request):
     return render(request, 'UserPage/booking_calendar.html', context)
 
 # Additional API functions
+def _filter_rooms_for_grid(request, rooms):
+    """Narrow a room queryset to the optional room_ids/room_type query parameters"""
+    room_ids = []
+    for value in request.GET.getlist('room_ids'):
+        room_ids.extend(part for part in value.split(',') if part.strip())
+    if room_ids:
+        rooms = rooms.filter(id__in=[int(room_id) for room_id in room_ids])
+    
+    room_type = request.GET.get('room_type')
+    if room_type:
+        rooms = rooms.filter(room_type=room_type)
+    
+    return rooms
+
+def _availability_etag(request):
+    """ETag of rooms_api_availability from the room catalog and (room, date) versions"""
+    try:
+        room_ids = [int(part) for value in request.GET.getlist('room_ids') for part in value.split(',') if part.strip()]
+        date_str = request.GET.get('date')
+        target_date = datetime.strptime(date_str, '%Y-%m-%d').date() if date_str else None
+    except ValueError:
+        return None
+    if target_date is None:
+        keys = []
+    elif room_ids:
+        keys = [room_day_key(room_id, target_date) for room_id in sorted(set(room_ids))]
+    else:
+        keys = [day_key(target_date)]
+    return make_etag(request, keys)
+
 @login_required
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=_availability_etag)
 def rooms_api_availability(request):
     """API endpoint to get room availability information"""
     rooms = Room.objects.filter(is_available=True)
     
+    try:
+        rooms = _filter_rooms_for_grid(request, rooms)
+    except ValueError:
+        return JsonResponse({'error': 'room_ids must be a comma-separated list of integers'}, status=400)
+    
     # Get date parameter
     date_str = request.GET.get('date')
     if date_str:
         try:
             target_date = datetime.strptime(date_str, '%Y-%m-%d').date()
-            
-            room_data = []
-            for room in rooms:
-                # Get bookings for this room on the target date
-                bookings = Booking.objects.filter(
-                    room=room,
-                    start_time__date=target_date,
-                    status__in=['confirmed', 'pending']
-                ).order_by('start_time')
-                
-                booking_slots = []
-                for booking in bookings:
-                    booking_slots.append({
-                        'start': booking.start_time.strftime('%H:%M'),
-                        'end': booking.end_time.strftime('%H:%M'),
-                        'status': booking.status,
-                        'user': booking.user.get_full_name(),
-                    })
-                
-                room_data.append({
-                    'id': room.id,
-                    'name': room.name,
-                    'room_number': room.room_number,
-                    'capacity': room.capacity,
-                    'room_type': room.get_room_type_display(),
-                    'is_bookable': room.is_bookable(),
-                    'bookings': booking_slots,
-                })
-            
-            return JsonResponse({
-                'success': True,
-                'date': date_str,
-                'rooms': room_data
-            })
-            
         except ValueError:
             return JsonResponse({'error': 'Invalid date format. Use YYYY-MM-DD'}, status=400)
+        
+        # Optional window: report whether each room is free for it
+        window_mask = None
+        if request.GET.get('start_time') and request.GET.get('end_time'):
+            try:
+                window_mask = slot_mask(
+                    datetime.strptime(request.GET['start_time'], '%H:%M').time(),
+                    datetime.strptime(request.GET['end_time'], '%H:%M').time(),
+                )
+            except ValueError:
+                return JsonResponse({'error': 'Invalid time format. Use HH:MM'}, status=400)
+        
+        rooms = list(rooms)
+        occupancy = get_day_occupancy(target_date, [room.id for room in rooms])
+        
+        # One ranged query for the rooms that have anything booked that day
+        day_start = timezone.make_aware(datetime.combine(target_date, time.min))
+        day_end = day_start + timedelta(days=1)
+        bookings = []
+        if occupancy:
+            bookings = Booking.objects.filter(
+                room_id__in=list(occupancy),
+                start_time__gte=day_start,
+                start_time__lt=day_end,
+                status__in=['confirmed', 'pending']
+            ).select_related('user').order_by('start_time')
+        
+        slots_by_room = {}
+        for booking in bookings:
+            slots_by_room.setdefault(booking.room_id, []).append({
+                'start': timezone.localtime(booking.start_time).strftime('%H:%M'),
+                'end': timezone.localtime(booking.end_time).strftime('%H:%M'),
+                'status': booking.status,
+                'user': booking.user.get_full_name(),
+            })
+        
+        room_data = []
+        for room in rooms:
+            room_data.append({
+                'id': room.id,
+                'name': room.name,
+                'room_number': room.room_number,
+                'capacity': room.capacity,
+                'room_type': room.get_room_type_display(),
+                'is_bookable': room.is_bookable(),
+                'bookings': slots_by_room.get(room.id, []),
+                'occupancy': occupancy_string(occupancy.get(room.id, 0)),
+            })
+            if window_mask is not None:
+                room_data[-1]['is_free'] = not (occupancy.get(room.id, 0) & window_mask)
+        
+        return JsonResponse({
+            'success': True,
+            'date': date_str,
+            'rooms': room_data
+        })
     
     # Return basic room info if no date specified
     room_data = []
@@ -1052,6 +1042,87 @@ def rooms_api_availability(request):
         'rooms': room_data
     })
 
+@login_required
+def heatmap_api(request):
+    """API endpoint: rooms x 15-minute slots occupancy for a week"""
+    from booking.heatmap import ENCODERS, build_heatmap
+    
+    rooms = Room.objects.filter(is_available=True).order_by('room_number')
+    try:
+        rooms = _filter_rooms_for_grid(request, rooms)
+    except ValueError:
+        return JsonResponse({'error': 'room_ids must be a comma-separated list of integers'}, status=400)
+    
+    try:
+        start_str = request.GET.get('start_date')
+        if start_str:
+            first_day = datetime.strptime(start_str, '%Y-%m-%d').date()
+        else:
+            today = timezone.localdate()
+            first_day = today - timedelta(days=today.weekday())
+        days = int(request.GET.get('days', 7))
+    except ValueError:
+        return JsonResponse({'error': 'Invalid start_date or days'}, status=400)
+    
+    if not 1 <= days <= 31:
+        return JsonResponse({'error': 'days must be between 1 and 31'}, status=400)
+    
+    encoding = request.GET.get('encoding', 'bits')
+    if encoding not in ENCODERS:
+        return JsonResponse({'error': f"encoding must be one of: {', '.join(ENCODERS)}"}, status=400)
+    
+    heatmap = build_heatmap(rooms, first_day, days, encoding)
+    return JsonResponse({'success': True, **heatmap})
+
+@login_required
+def free_slots_api(request):
+    """API endpoint: best free slots across all matching rooms"""
+    try:
+        duration = timedelta(minutes=int(request.GET.get('duration', 60)))
+        capacity = int(request.GET['capacity']) if request.GET.get('capacity') else None
+        limit = max(1, min(int(request.GET.get('limit', 10)), 50))
+        today = timezone.localdate()
+        date_from = request.GET.get('date_from')
+        date_from = datetime.strptime(date_from, '%Y-%m-%d').date() if date_from else today
+        date_to = request.GET.get('date_to')
+        date_to = datetime.strptime(date_to, '%Y-%m-%d').date() if date_to else date_from
+        preferred_time = request.GET.get('preferred_time')
+        preferred = None
+        if preferred_time:
+            preferred = timezone.make_aware(datetime.combine(
+                date_from, datetime.strptime(preferred_time, '%H:%M').time()
+            ))
+    except (ValueError, KeyError) as e:
+        return JsonResponse({'success': False, 'error': f'Invalid parameters: {str(e)}'}, status=400)
+    
+    if (date_to - date_from).days > 31:
+        return JsonResponse({'success': False, 'error': 'Date range cannot exceed 31 days'}, status=400)
+    
+    slots = find_free_slots(
+        duration,
+        date_from=date_from,
+        date_to=date_to,
+        preferred=preferred,
+        capacity=capacity,
+        room_type=request.GET.get('room_type'),
+        building=request.GET.get('building'),
+        limit=limit,
+        user_id=request.user.id,
+    )
+    
+    return JsonResponse({
+        'success': True,
+        'slots': [{
+            'room_id': slot.room.id,
+            'room_name': slot.room.name,
+            'room_number': slot.room.room_number,
+            'capacity': slot.room.capacity,
+            'date': slot.start.strftime('%Y-%m-%d'),
+            'start_time': slot.start.strftime('%H:%M'),
+            'end_time': slot.end.strftime('%H:%M'),
+        } for slot in slots]
+    })
+
 @login_required
 def check_availability(request):
     """Check availability for multiple parameters"""
@@ -1067,10 +1138,11 @@ def modify_booking(request, booking_id):
         return redirect('booking:booking_detail', booking_id=booking_id)
     
     if request.method == 'POST':
-        form = BookingForm(request.POST, instance=booking)
+        form = BookingForm(request.POST, instance=booking, user=request.user)
         if form.is_valid():
             try:
-                booking = form.save()
+                # Moves are checked under the room lock like new bookings
+                booking = place_booking(form.save(commit=False))
                 messages.success(request, 'Booking modified successfully!')
                 return redirect('booking:booking_detail', booking_id=booking.id)
             except Exception as e:
@@ -1078,7 +1150,7 @@ def modify_booking(request, booking_id):
         else:
             messages.error(request, 'Please correct the errors below.')
     else:
-        form = BookingForm(instance=booking)
+        form = BookingForm(instance=booking, user=request.user)
     
     context = {
         'form': form,
@@ -9,6 +9,10 @@ backlog = 2048
 
 # Worker processes
 workers = 3
+# Sync workers serve the WSGI app; the admin dashboard polls its counters.
+# To push them over Server-Sent Events instead, serve the ASGI app with
+# uvicorn workers (pip install uvicorn):
+#   gunicorn room_booking_system.asgi:application -k uvicorn.workers.UvicornWorker
 worker_class = "sync"
 worker_connections = 1000
 timeout = 30
@@ -126,4 +126,15 @@ ADMIN_EMAIL = 'admin@rupp.edu.kh'
 # EMAIL_PORT = 587
 # EMAIL_USE_TLS = True
 # EMAIL_HOST_USER = 'your-email@gmail.com'
-# EMAIL_HOST_PASSWORD = 'your-app-password'
\ No newline at end of file
+# EMAIL_HOST_PASSWORD = 'your-app-password'
+
+# Cache shared by all worker processes (commented out for now). Availability
+# indexes, booking rules and the availability ETags use cache version numbers
+# to notice writes made by other workers; with the default per-process
+# LocMemCache they only catch up when their own expiry runs out.
+# CACHES = {
+#     'default': {
+#         'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+#         'LOCATION': 'redis://127.0.0.1:6379',
+#     }
+# }
@@ -417,19 +417,38 @@ class AdminFunctionality {
     }
 
     setupRealTimeUpdates() {
-        // Set up periodic updates for dashboard stats
-        if (window.location.pathname.includes('admin') && window.location.pathname.includes('dashboard')) {
-            setInterval(() => {
-                this.updateDashboardStats();
-            }, 30000); // Update every 30 seconds
+        // The server only offers a stream when it runs under ASGI; otherwise poll
+        const streamUrl = document.body.dataset.dashboardStream;
+        if (streamUrl && typeof EventSource !== 'undefined') {
+            this.dashboardStream = new EventSource(streamUrl);
+            this.dashboardStream.addEventListener('snapshot', (e) => this.updateStatCards(JSON.parse(e.data)));
+            this.dashboardStream.addEventListener('delta', (e) => this.updateStatCards(JSON.parse(e.data)));
+            this.dashboardStream.onerror = () => {
+                // EventSource reconnects by itself unless the server refused the stream
+                if (this.dashboardStream.readyState === EventSource.CLOSED) {
+                    this.startDashboardPolling();
+                }
+            };
+            window.addEventListener('beforeunload', () => this.dashboardStream.close());
+            return;
+        }
+        this.startDashboardPolling();
+    }
+
+    startDashboardPolling() {
+        const pollUrl = document.body.dataset.dashboardPoll;
+        if (!pollUrl || this.dashboardPoll) {
+            return;
         }
+        const seconds = parseInt(document.body.dataset.dashboardPollSeconds, 10) || 30;
+        this.dashboardPoll = setInterval(() => this.updateDashboardStats(pollUrl), seconds * 1000);
     }
 
-    async updateDashboardStats() {
+    async updateDashboardStats(pollUrl) {
         try {
-            const response = await fetch('/accounts/admin/ajax/dashboard-stats/');
+            const response = await fetch(pollUrl);
             const data = await response.json();
-            
+
             if (data.success) {
                 this.updateStatCards(data.stats);
             }
@@ -439,17 +458,10 @@ class AdminFunctionality {
     }
 
     updateStatCards(stats) {
-        // Update stat cards with new data
-        const statElements = {
-            'total-users': stats.total_users,
-            'total-bookings': stats.total_bookings,
-            'pending-bookings': stats.pending_bookings,
-            'total-rooms': stats.total_rooms
-        };
-
-        Object.entries(statElements).forEach(([id, value]) => {
-            const element = document.getElementById(id);
-            if (element && value !== undefined) {
+        // Update the stat cards whose counters are in `stats`
+        Object.entries(stats).forEach(([name, value]) => {
+            const element = document.querySelector(`[data-counter="${name}"]`);
+            if (element && value !== undefined && element.textContent !== String(value)) {
                 element.textContent = value;
                 element.classList.add('updated');
                 setTimeout(() => element.classList.remove('updated'), 1000);
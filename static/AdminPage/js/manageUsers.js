@@ -24,80 +24,23 @@ document.addEventListener('DOMContentLoaded', function() {
         }, 5000);
     }
 
-    // Enhanced user search functionality
+    // Server-side user search: the filters resubmit the form
     function initUserSearch() {
+        const form = document.getElementById('userFilterForm');
         const searchInput = document.getElementById('userSearch');
         const roleFilter = document.getElementById('roleFilter');
         const statusFilter = document.getElementById('statusFilter');
-        const tableRows = document.querySelectorAll('#usersTable tbody tr');
-
-        function filterUsers() {
-            const searchTerm = searchInput.value.toLowerCase();
-            const selectedRole = roleFilter.value;
-            const selectedStatus = statusFilter.value;
-
-            let visibleCount = 0;
-
-            tableRows.forEach(row => {
-                // Skip empty rows
-                if (row.cells.length < 8) return;
-
-                const userName = row.cells[0].textContent.toLowerCase();
-                const userEmail = row.cells[1].textContent.toLowerCase();
-                const userFaculty = row.cells[4].textContent.toLowerCase();
-                const userDepartment = row.cells[5].textContent.toLowerCase();
-                const userRole = row.getAttribute('data-role');
-                const userStatus = row.getAttribute('data-status');
-
-                const matchesSearch = userName.includes(searchTerm) || 
-                                    userEmail.includes(searchTerm) ||
-                                    userFaculty.includes(searchTerm) ||
-                                    userDepartment.includes(searchTerm);
-                const matchesRole = !selectedRole || userRole === selectedRole;
-                const matchesStatus = !selectedStatus || userStatus === selectedStatus;
-
-                if (matchesSearch && matchesRole && matchesStatus) {
-                    row.style.display = '';
-                    visibleCount++;
-                } else {
-                    row.style.display = 'none';
-                }
-            });
+        if (!form) return;
 
-            // Update search results count
-            updateSearchResults(visibleCount);
-        }
-
-        function updateSearchResults(count) {
-            let resultDiv = document.getElementById('searchResults');
-            if (!resultDiv) {
-                resultDiv = document.createElement('div');
-                resultDiv.id = 'searchResults';
-                resultDiv.className = 'text-muted mb-2';
-                const tableContainer = document.querySelector('.table-responsive');
-                tableContainer.parentNode.insertBefore(resultDiv, tableContainer);
-            }
-            
-            if (searchInput.value || roleFilter.value || statusFilter.value) {
-                resultDiv.textContent = `Showing ${count} user(s) matching your filters`;
-                resultDiv.style.display = 'block';
-            } else {
-                resultDiv.style.display = 'none';
-            }
-        }
-
-        // Debounced search to improve performance
+        // Debounced search so each keystroke does not reload the page
         let searchTimeout;
         searchInput.addEventListener('input', function() {
             clearTimeout(searchTimeout);
-            searchTimeout = setTimeout(filterUsers, 300);
+            searchTimeout = setTimeout(() => form.submit(), 500);
         });
 
-        roleFilter.addEventListener('change', filterUsers);
-        statusFilter.addEventListener('change', filterUsers);
-
-        // Initialize
-        filterUsers();
+        roleFilter.addEventListener('change', () => form.submit());
+        statusFilter.addEventListener('change', () => form.submit());
     }
 
     // AJAX user actions with better UX
@@ -365,13 +365,15 @@ function checkAvailability() {
             room_id: roomId,
             date: date,
             start_time: startTime,
-            end_time: endTime
+            end_time: endTime,
+            hold: true
         })
     })
     .then(response => response.json())
     .then(data => {
         if (data.available) {
-            availabilityDiv.innerHTML = '<div class="availability-success">✓ Room is available</div>';
+            const heldUntil = data.hold ? ` - held for you until ${data.hold.expires_at}` : '';
+            availabilityDiv.innerHTML = `<div class="availability-success">✓ Room is available${heldUntil}</div>`;
             enableSubmitButton();
         } else {
             availabilityDiv.innerHTML = `<div class="availability-error">✗ ${data.message}</div>`;